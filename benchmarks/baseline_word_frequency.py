@@ -0,0 +1,189 @@
+# coding=utf-8
+"""
+count_word_frequency 改为一次评分 + 堆选择之前的实现（冻结副本，仅供 bench_word_frequency.py 对比）
+
+函数体与改动前的 main.py 保持一致；归类不做按标题缓存，权重在每次排序比较时重新计算。
+其余辅助函数（CONFIG、is_first_crawl_today、format_time_display 等）取自当前的 main.py。
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+from main import CONFIG, KeywordMatcher, format_time_display, is_first_crawl_today
+
+
+class _UncachedMatcher:
+    """改动前的 KeywordMatcher.scan / classify：不缓存归类结果，空词表时也逐字扫描"""
+
+    def __init__(self, word_groups: List[Dict], filter_words: List[str]):
+        self._matcher = KeywordMatcher(word_groups, filter_words)
+
+    def scan(self, title: str) -> int:
+        m = self._matcher
+        goto, fail, output = m.goto, m.fail, m.output
+        found, node = m.always, 0
+        for ch in title.lower():
+            while node and ch not in goto[node]: node = fail[node]
+            node = goto[node].get(ch, 0)
+            found |= output[node]
+        return found
+
+    def classify(self, title: str) -> Optional[int]:
+        m = self._matcher
+        found = self.scan(title)
+        if found & m.filter_mask: return None
+        for i, (req_mask, norm_mask) in enumerate(m.groups):
+            if found & req_mask != req_mask: continue
+            if norm_mask and not found & norm_mask: continue
+            return i
+        return None
+
+
+_keyword_matchers: Dict[Tuple, _UncachedMatcher] = {}
+
+def get_keyword_matcher(word_groups: List[Dict], filter_words: List[str]) -> _UncachedMatcher:
+    key = (tuple((tuple(g["required"]), tuple(g["normal"])) for g in word_groups), tuple(filter_words))
+    if key not in _keyword_matchers:
+        _keyword_matchers[key] = _UncachedMatcher(word_groups, filter_words)
+    return _keyword_matchers[key]
+
+
+def calculate_news_weight(title_data: Dict, rank_threshold: int = CONFIG["RANK_THRESHOLD"]) -> float:
+    ranks = title_data.get("ranks", [])
+    if not ranks: return 0.0
+    count = title_data.get("count", len(ranks))
+    wc = CONFIG["WEIGHT_CONFIG"]
+    rank_score = sum(11 - min(r, 10) for r in ranks) / len(ranks)
+    freq_score = min(count, 10) * 10
+    hot_score = (sum(1 for r in ranks if r <= rank_threshold) / len(ranks)) * 100
+    return rank_score * wc["RANK_WEIGHT"] + freq_score * wc["FREQUENCY_WEIGHT"] + hot_score * wc["HOTNESS_WEIGHT"]
+
+
+def count_word_frequency(
+    results: Dict,
+    word_groups: List[Dict],
+    filter_words: List[str],
+    id_to_name: Dict,
+    title_info: Optional[Dict] = None,
+    rank_threshold: int = CONFIG["RANK_THRESHOLD"],
+    new_titles: Optional[Dict] = None,
+    mode: str = "daily",
+) -> Tuple[List[Dict], int]:
+    """
+    统计词频
+    【需求1】随机推荐总量不超过 35 条
+    【需求2】每组关键词热点：每个平台不超过 3 条
+    """
+    if not word_groups:
+        word_groups = [{"required": [], "normal": [], "group_key": "全部新闻"}]
+        filter_words = []
+
+    is_first = is_first_crawl_today()
+    if mode == "incremental":
+        results_to_process = results if is_first else (new_titles or {})
+        all_news_are_new = True
+    elif mode == "current" and title_info:
+         results_to_process = results 
+         all_news_are_new = False
+    else:
+        results_to_process = results
+        all_news_are_new = False
+
+    word_stats = {g["group_key"]: {"count": 0, "titles": {}} for g in word_groups}
+    total_titles = 0
+    processed = {}
+    
+    # 用于记录每个平台是否匹配到了新闻，用于随机推荐逻辑
+    platform_matched_counts = {sid: 0 for sid in results.keys()}
+
+    matcher = get_keyword_matcher(word_groups, filter_words)
+
+    # 第一步：收集所有匹配的新闻
+    for source_id, titles_data in results_to_process.items():
+        total_titles += len(titles_data)
+        if source_id not in processed: processed[source_id] = {}
+
+        for title, title_data in titles_data.items():
+            if title in processed[source_id]: continue
+            
+            # 一次扫描同时完成过滤与归类
+            group_index = matcher.classify(title)
+            if group_index is None: continue
+            
+            # 匹配成功
+            platform_matched_counts[source_id] += 1
+            group_key = word_groups[group_index]["group_key"]
+            
+            # 构建数据对象
+            info = title_info.get(source_id, {}).get(title, {}) if title_info else {}
+            ranks = info.get("ranks", title_data.get("ranks", [99]))
+            url = info.get("url", title_data.get("url", ""))
+            murl = info.get("mobileUrl", title_data.get("mobileUrl", ""))
+            first = info.get("first_time", "")
+            last = info.get("last_time", "")
+            
+            is_new = True if all_news_are_new else (new_titles and source_id in new_titles and title in new_titles[source_id])
+            
+            # 先存入字典，后续再根据平台限制过滤
+            word_stats[group_key]["count"] += 1
+            if source_id not in word_stats[group_key]["titles"]: word_stats[group_key]["titles"][source_id] = []
+            
+            word_stats[group_key]["titles"][source_id].append({
+                "title": title, "source_name": id_to_name.get(source_id, source_id),
+                "time_display": format_time_display(first, last), "count": info.get("count", 1),
+                "ranks": ranks, "rank_threshold": rank_threshold,
+                "url": url, "mobileUrl": murl, "is_new": is_new
+            })
+            processed[source_id][title] = True
+
+    # 第二步：处理关键词分组，实施【需求2】每个平台不超过3条
+    final_stats = []
+    for k, v in word_stats.items():
+        if v["count"] == 0: continue
+        
+        group_all_titles = []
+        
+        # 遍历该组下的每个平台
+        for source_id, s_titles in v["titles"].items():
+            # 先按权重排序该平台的新闻
+            s_titles.sort(key=lambda x: (-calculate_news_weight(x, rank_threshold), min(x["ranks"]), -x["count"]))
+            
+            # 【需求2】截取前 3 条
+            top_titles = s_titles[:3]
+            
+            group_all_titles.extend(top_titles)
+            
+        # 对所有平台汇总后的新闻再次按权重排序
+        group_all_titles.sort(key=lambda x: (-calculate_news_weight(x, rank_threshold), min(x["ranks"]), -x["count"]))
+        
+        final_stats.append({"word": k, "count": len(group_all_titles), "titles": group_all_titles})
+
+    # 第三步：处理随机推荐，实施【需求1】总量不超过35条
+    random_candidates = []
+    if mode != "incremental" or is_first:
+        for source_id, count in platform_matched_counts.items():
+            if count == 0 and source_id in results:
+                all_items = list(results[source_id].items())
+                # 从该平台提取候选
+                for title, title_data in all_items:
+                    random_candidates.append({
+                        "title": title, "source_name": id_to_name.get(source_id, source_id),
+                        "time_display": "", "count": 1, "ranks": title_data.get("ranks", [99]),
+                        "rank_threshold": rank_threshold, "url": title_data.get("url", ""),
+                        "mobileUrl": title_data.get("mobileUrl", ""), "is_new": False
+                    })
+        
+        # 【需求1】从所有候选池中随机抽取至多 35 条
+        final_random_count = min(len(random_candidates), 35)
+        if final_random_count > 0:
+            final_randoms = random.sample(random_candidates, final_random_count)
+            # 为了展示美观，将随机结果简单排序（如按排名）
+            final_randoms.sort(key=lambda x: min(x["ranks"]) if x["ranks"] else 99)
+            
+            final_stats.append({"word": "🎲 随机推荐 (猜你喜欢)", "count": len(final_randoms), "titles": final_randoms})
+
+    # 最后按新闻总数排序分组
+    final_stats.sort(key=lambda x: x["count"], reverse=True)
+    return final_stats, total_titles
+
+
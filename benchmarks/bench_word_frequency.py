@@ -0,0 +1,139 @@
+# coding=utf-8
+"""
+词频统计基准：用 output/ 中某一天的全部快照比较 count_word_frequency 新旧实现的 CPU 耗时
+
+旧实现默认使用同目录下冻结的 baseline_word_frequency.py（改为一次评分 + 堆选择之前的版本），
+也可以用 --baseline 指定 git 历史中任意版本的 main.py。
+两边使用同一份当日聚合数据和同一份频率词，并核对统计结果一致。
+
+用法：
+    python benchmarks/bench_word_frequency.py
+    python benchmarks/bench_word_frequency.py --date 2025年11月20日 --repeat 20
+    python benchmarks/bench_word_frequency.py --baseline <提交> --no-words
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+
+
+def load_module(name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_baseline(rev: Optional[str], tmp_dir: str):
+    if rev is None:
+        return load_module("baseline_word_frequency", BENCH_DIR / "baseline_word_frequency.py")
+    source = subprocess.run(["git", "show", f"{rev}:main.py"], cwd=ROOT, check=True, capture_output=True).stdout
+    path = Path(tmp_dir) / "main_baseline.py"
+    path.write_bytes(source)
+    return load_module("main_baseline", path)
+
+
+def build_day(main, date_folder: str, tmp_dir: str):
+    """按时间顺序合并某天的 txt 快照，返回 (all_results, id_to_name, title_info, 快照数)"""
+    txt_dir = ROOT / "output" / date_folder / "txt"
+    files = sorted(txt_dir.glob("*.txt"))
+    if not files:
+        raise SystemExit(f"{txt_dir} 中没有快照")
+    # 聚合只在内存中合并，不写入 output/
+    aggregate = main.DailyAggregate(Path(tmp_dir) / "aggregate.json")
+    for f in files:
+        titles, names = main.parse_file_titles(f)
+        aggregate.merge(f.stem, "", titles, names)
+    return aggregate.to_results() + (len(files),)
+
+
+def reset_caches(module):
+    """清掉跨调用复用的匹配器，每轮都从冷启动开始计时"""
+    matchers = getattr(module, "_keyword_matchers", None)
+    if matchers is not None:
+        matchers.clear()
+
+
+def run_once(module, day, word_groups, filter_words, modes):
+    results, id_to_name, title_info = day
+    outputs = []
+    for mode in modes:
+        random.seed(0)
+        stats, total = module.count_word_frequency(results, word_groups, filter_words, id_to_name, title_info, mode=mode)
+        outputs.append((stats, total))
+    return outputs
+
+
+def measure(module, day, word_groups, filter_words, modes, repeat):
+    timings, outputs = [], None
+    for _ in range(repeat):
+        reset_caches(module)
+        start = time.process_time()
+        outputs = run_once(module, day, word_groups, filter_words, modes)
+        timings.append(time.process_time() - start)
+    return min(timings), sorted(timings)[len(timings) // 2], outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较 count_word_frequency 新旧实现的 CPU 耗时")
+    parser.add_argument("--date", help="output/ 下的日期目录，默认取最新一天")
+    parser.add_argument("--baseline", help="旧实现所在的 git 版本（默认使用冻结的 baseline_word_frequency.py）")
+    parser.add_argument("--repeat", type=int, default=10, help="每个实现的重复次数（默认 10）")
+    parser.add_argument("--modes", default="daily,current", help="统计模式，逗号分隔（默认 daily,current）")
+    parser.add_argument("--no-words", action="store_true", help="不使用频率词（全部新闻模式）")
+    args = parser.parse_args()
+
+    # main.py 在导入时按相对路径读取 config/
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+
+    dates = sorted(p.name for p in (ROOT / "output").iterdir() if (p / "txt").is_dir())
+    date_folder = args.date or (dates[-1] if dates else None)
+    if not date_folder:
+        raise SystemExit("output/ 中没有可用的日期目录")
+    modes = [m for m in args.modes.split(",") if m]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("加载当前实现 ...")
+        # 以 main 的名字导入，冻结的旧实现与当前实现共用同一份配置和辅助函数
+        import main as current
+        print(f"加载旧实现 ({args.baseline or 'baseline_word_frequency.py'}) ...")
+        baseline = load_baseline(args.baseline, tmp_dir)
+
+        results, id_to_name, title_info, snapshot_count = build_day(current, date_folder, tmp_dir)
+        day = (results, id_to_name, title_info)
+        word_groups, filter_words = ([], []) if args.no_words else current.load_frequency_words()
+
+        title_count = sum(len(titles) for titles in results.values())
+        print(f"\n日期: {date_folder}  快照: {snapshot_count}  平台: {len(results)}  标题: {title_count}")
+        print(f"词组: {len(word_groups)}  过滤词: {len(filter_words)}  模式: {', '.join(modes)}  重复: {args.repeat}\n")
+
+        old_min, old_median, old_out = measure(baseline, day, word_groups, filter_words, modes, args.repeat)
+        new_min, new_median, new_out = measure(current, day, word_groups, filter_words, modes, args.repeat)
+
+    print(f"{'实现':<8}{'最小(ms)':>12}{'中位(ms)':>12}")
+    print(f"{'旧':<8}{old_min * 1000:>12.2f}{old_median * 1000:>12.2f}")
+    print(f"{'新':<8}{new_min * 1000:>12.2f}{new_median * 1000:>12.2f}")
+    if new_min > 0:
+        print(f"\n加速: {old_min / new_min:.2f}x")
+
+    if old_out != new_out:
+        for mode, (old_stats, old_total), (new_stats, new_total) in zip(modes, old_out, new_out):
+            if (old_stats, old_total) != (new_stats, new_total):
+                print(f"统计结果不一致: 模式 {mode}（总数 {old_total} / {new_total}）")
+        sys.exit(1)
+    print("统计结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-新闻爬虫容器管理工具 - supercronic
+新闻爬虫容器管理工具 - supercronic / 常驻模式
 """
 
+import json
 import os
 import sys
 import subprocess
 import time
+import urllib.error
+import urllib.request
 from pathlib import Path
 
 
+HEALTH_URL = f"http://127.0.0.1:{os.environ.get('HEALTH_PORT', '').strip() or 8090}"
+
+
 def run_command(cmd, shell=True, capture_output=True):
     """执行系统命令"""
     try:
@@ -22,8 +28,38 @@ def run_command(cmd, shell=True, capture_output=True):
         return False, "", str(e)
 
 
+def is_daemon_mode():
+    """是否以常驻模式运行（main.py --daemon 作为 PID 1）"""
+    return os.environ.get("RUN_MODE", "").strip() == "daemon"
+
+
+def query_health(timeout=3):
+    """查询常驻进程的健康状态，返回 (HTTP状态码, 内容)，无法连接时返回 (None, 错误信息)"""
+    try:
+        with urllib.request.urlopen(f"{HEALTH_URL}/health", timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        try:
+            return e.code, json.loads(e.read().decode("utf-8"))
+        except Exception:
+            return e.code, {}
+    except Exception as e:
+        return None, str(e)
+
+
 def manual_run():
     """手动执行一次爬虫"""
+    if is_daemon_mode():
+        # 常驻模式下交给常驻进程执行，避免两个进程同时写输出文件
+        try:
+            request = urllib.request.Request(f"{HEALTH_URL}/run", method="POST")
+            with urllib.request.urlopen(request, timeout=3):
+                pass
+            print("✅ 已通知常驻进程立即执行一次，可用 docker logs -f trend-radar 查看进度")
+            return
+        except Exception as e:
+            print(f"⚠️ 无法连接常驻进程（{e}），改为直接执行")
+
     print("🔄 手动执行爬虫...")
     try:
         result = subprocess.run(
@@ -118,8 +154,60 @@ def parse_cron_schedule(cron_expr):
         return f"解析失败: {cron_expr}"
 
 
+def show_health():
+    """显示常驻进程健康状态（退出码 0 表示健康，可用于 docker healthcheck）"""
+    code, body = query_health()
+    if code is None:
+        print(f"❌ 无法连接常驻进程健康检查 {HEALTH_URL}/health: {body}")
+        sys.exit(1)
+    print(json.dumps(body, ensure_ascii=False, indent=2))
+    if code != 200:
+        sys.exit(1)
+
+
+def show_daemon_status():
+    """显示常驻模式状态"""
+    print("📊 容器状态（常驻模式）:")
+    try:
+        with open('/proc/1/cmdline', 'r') as f:
+            pid1_cmdline = f.read().replace('\x00', ' ').strip()
+        print(f"  🔍 PID 1 进程: {pid1_cmdline}")
+        if "main.py" in pid1_cmdline and "--daemon" in pid1_cmdline:
+            print("  ✅ main.py --daemon 正确运行为 PID 1")
+        else:
+            print("  ❌ PID 1 不是常驻模式的 main.py")
+    except Exception as e:
+        print(f"  ❌ 无法读取 PID 1 信息: {e}")
+
+    cron_schedule = os.environ.get("CRON_SCHEDULE", "未设置")
+    print(f"  ⚙️ 运行配置:")
+    print(f"    CRON_SCHEDULE: {cron_schedule}")
+    print(f"    ⏰ 执行频率: {parse_cron_schedule(cron_schedule)}")
+
+    code, body = query_health()
+    if code is None:
+        print(f"  ❌ 健康检查不可用: {body}")
+        print("    💡 检查容器日志: docker logs trend-radar")
+        return
+
+    print(f"  {'✅' if code == 200 else '❌'} 调度状态: {body.get('status')}")
+    print(f"    已执行: {body.get('runs')} 次，失败 {body.get('failures')} 次")
+    last_run = body.get("last_run")
+    if last_run:
+        result = "成功" if last_run.get("success") else f"失败（{last_run.get('error')}）"
+        print(f"    上次执行: {last_run.get('started_at')}，耗时 {last_run.get('duration')} 秒，{result}")
+    print(f"    下次执行: {body.get('next_run')}")
+    pool = body.get("warm", {}).get("http_pool", {})
+    if pool:
+        print(f"    连接池: 请求 {pool.get('requests')} 次，复用 {pool.get('reused')} 次")
+
+
 def show_status():
     """显示容器状态"""
+    if is_daemon_mode():
+        show_daemon_status()
+        return
+
     print("📊 容器状态:")
 
     # 检查 PID 1 状态
@@ -373,6 +461,10 @@ def show_logs():
 def restart_supercronic():
     """重启supercronic进程"""
     print("🔄 重启supercronic...")
+    if is_daemon_mode():
+        print("⚠️ 注意: 常驻模式下 main.py 是 PID 1，修改配置后需要重启整个容器:")
+        print("    docker restart trend-radar")
+        return
     print("⚠️ 注意: supercronic 是 PID 1，无法直接重启")
     
     # 检查当前 PID 1
@@ -402,6 +494,7 @@ def show_help():
 📋 命令列表:
   run         - 手动执行一次爬虫
   status      - 显示容器运行状态
+  health      - 查询常驻模式健康状态（RUN_MODE=daemon）
   config      - 显示当前配置
   files       - 显示输出文件
   logs        - 实时查看日志
@@ -436,6 +529,10 @@ def show_help():
   4. 重启服务: restart
      - 由于 supercronic 是 PID 1，需要重启整个容器
      - 使用: docker restart trend-radar
+
+  5. 常驻模式: RUN_MODE=daemon
+     - main.py 常驻运行并按 CRON_SCHEDULE 定时执行，两次执行间保持配置和连接池
+     - health 查看调度状态，run 会通知常驻进程立即执行一次
 """
     print(help_text)
 
@@ -449,6 +546,7 @@ def main():
     commands = {
         "run": manual_run,
         "status": show_status,
+        "health": show_health,
         "config": show_config,
         "files": show_files,
         "logs": show_logs,
@@ -1,23 +1,46 @@
 # coding=utf-8
 
+import argparse
+import base64
+import gzip
+import hashlib
+import heapq
+import io
 import json
 import os
 import random
 import re
+import shutil
+import signal
+import struct
+import sys
+import threading
 import time
 import webbrowser
 import smtplib
+import sqlite3
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
-from email.utils import formataddr, formatdate, make_msgid
-from datetime import datetime
+from email.utils import formataddr, formatdate, make_msgid, parsedate_to_datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Union
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Tuple, Optional, Union
 
 import pytz
 import requests
 import yaml
+from requests.adapters import HTTPAdapter
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖：未安装时权重计算回退到纯 Python
+    np = None
 
 
 VERSION = "3.0.7"  # 修改版本号
@@ -62,9 +85,30 @@ def load_config():
         "VERSION_CHECK_URL": config_data["app"]["version_check_url"],
         "SHOW_VERSION_UPDATE": config_data["app"]["show_version_update"],
         "REQUEST_INTERVAL": config_data["crawler"]["request_interval"],
+        "MAX_CONCURRENCY": config_data["crawler"].get("max_concurrency", 1),
+        "OUTBOX_ENABLED": config_data["notification"].get("outbox", {}).get("enabled", True),
+        "OUTBOX_RETRY": {
+            "max_retries": config_data["notification"].get("outbox", {}).get("max_retries", 3),
+            "base_delay": config_data["notification"].get("outbox", {}).get("base_delay", 2.0),
+            "max_delay": config_data["notification"].get("outbox", {}).get("max_delay", 30.0),
+            "budget": config_data["notification"].get("outbox", {}).get("budget", 20),
+        },
+        "RETRY": {
+            "max_retries": config_data["crawler"].get("retry", {}).get("max_retries", 2),
+            "base_delay": config_data["crawler"].get("retry", {}).get("base_delay", 1.0),
+            "max_delay": config_data["crawler"].get("retry", {}).get("max_delay", 10.0),
+            "budget": config_data["crawler"].get("retry", {}).get("budget", 20),
+        },
+        "CIRCUIT_BREAKER": {
+            "enabled": config_data["crawler"].get("circuit_breaker", {}).get("enabled", True),
+            "failure_threshold": config_data["crawler"].get("circuit_breaker", {}).get("failure_threshold", 3),
+            "cooldown_minutes": config_data["crawler"].get("circuit_breaker", {}).get("cooldown_minutes", 120),
+            "max_cooldown_minutes": config_data["crawler"].get("circuit_breaker", {}).get("max_cooldown_minutes", 1440),
+        },
         "REPORT_MODE": os.environ.get("REPORT_MODE", "").strip()
         or config_data["report"]["mode"],
         "RANK_THRESHOLD": config_data["report"]["rank_threshold"],
+        "PARALLEL_REPORTS": config_data["report"].get("parallel_reports", True),
         "USE_PROXY": config_data["crawler"]["use_proxy"],
         "DEFAULT_PROXY": config_data["crawler"]["default_proxy"],
         "ENABLE_CRAWLER": os.environ.get("ENABLE_CRAWLER", "").strip().lower()
@@ -121,6 +165,11 @@ def load_config():
             "FREQUENCY_WEIGHT": config_data["weight"]["frequency_weight"],
             "HOTNESS_WEIGHT": config_data["weight"]["hotness_weight"],
         },
+        "STORAGE": {
+            "SNAPSHOT_STORE": config_data.get("storage", {}).get("snapshot_store", True),
+            "TXT_EXPORT": config_data.get("storage", {}).get("txt_export", True),
+            "SQLITE": config_data.get("storage", {}).get("sqlite", False),
+        },
         "PLATFORMS": config_data["platforms"],
     }
 
@@ -279,12 +328,7 @@ def check_version_update(
 
 
 def is_first_crawl_today() -> bool:
-    date_folder = format_date_folder()
-    txt_dir = Path("output") / date_folder / "txt"
-    if not txt_dir.exists():
-        return True
-    files = sorted([f for f in txt_dir.iterdir() if f.suffix == ".txt"])
-    return len(files) <= 1
+    return len(list_today_snapshot_names()) <= 1
 
 
 def html_escape(text: str) -> str:
@@ -316,9 +360,10 @@ class PushRecordManager:
     def cleanup_old_records(self):
         retention_days = CONFIG["PUSH_WINDOW"]["RECORD_RETENTION_DAYS"]
         current_time = get_beijing_time()
-        for record_file in self.record_dir.glob("push_record_*.json"):
+        record_files = list(self.record_dir.glob("push_record_*.json")) + list(self.record_dir.glob("outbox_*.json"))
+        for record_file in record_files:
             try:
-                date_str = record_file.stem.replace("push_record_", "")
+                date_str = record_file.stem.rsplit("_", 1)[-1]
                 file_date = datetime.strptime(date_str, "%Y%m%d")
                 file_date = pytz.timezone("Asia/Shanghai").localize(file_date)
                 if (current_time - file_date).days > retention_days:
@@ -363,17 +408,266 @@ class PushRecordManager:
         return normalize_time(start_time) <= normalize_time(current_time) <= normalize_time(end_time)
 
 
+# === 重试策略 ===
+class FetchError(Exception):
+    """带分类的请求失败：kind 决定是否重试以及等待多久"""
+
+    def __init__(self, kind: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """错误分类 + 指数退避（full jitter）+ 单次运行的全局重试预算"""
+
+    RETRYABLE_KINDS = {"timeout", "connection", "server_error", "rate_limited", "invalid_json"}
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 1.0, max_delay: float = 10.0, budget: int = 20):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._remaining = budget
+        self._lock = threading.Lock()
+
+    def reset_budget(self):
+        with self._lock:
+            self._remaining = self.budget
+
+    @property
+    def remaining_budget(self) -> int:
+        return self._remaining
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析 Retry-After 头（秒数或 HTTP 日期）"""
+        if not value: return None
+        value = value.strip()
+        if value.isdigit(): return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def classify(self, exc: Exception) -> FetchError:
+        if isinstance(exc, FetchError): return exc
+        if isinstance(exc, requests.Timeout): return FetchError("timeout", str(exc))
+        if isinstance(exc, requests.ConnectionError): return FetchError("connection", str(exc))
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            code = exc.response.status_code
+            if code == 429:
+                return FetchError("rate_limited", "HTTP 429", self.parse_retry_after(exc.response.headers.get("Retry-After")))
+            if code >= 500: return FetchError("server_error", f"HTTP {code}")
+            return FetchError("client_error", f"HTTP {code}")
+        if isinstance(exc, ValueError): return FetchError("invalid_json", str(exc))
+        return FetchError("unknown", str(exc))
+
+    def next_delay(self, attempt: int, error: FetchError) -> Optional[float]:
+        """返回第 attempt 次失败后的等待秒数，None 表示放弃重试"""
+        if error.kind not in self.RETRYABLE_KINDS or attempt > self.max_retries: return None
+        with self._lock:
+            if self._remaining <= 0: return None
+            self._remaining -= 1
+        if error.retry_after is not None:
+            return min(error.retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+# === 平台熔断 ===
+class CircuitBreaker:
+    """按平台 ID 熔断：连续失败达到阈值后跳过，冷却期满后半开探测一次"""
+
+    # 只有平台自身的失败计入熔断；连接错误、5xx、重试预算耗尽等更可能是网络或上游整体故障
+    COUNTED_KINDS = {"bad_status", "client_error", "timeout", "invalid_data"}
+
+    def __init__(self, state_file: Optional[Path] = None, failure_threshold: int = 3, cooldown_minutes: float = 120, max_cooldown_minutes: float = 1440, enabled: bool = True):
+        self.state_file = state_file or Path("output") / ".crawler_state" / "circuit_breaker.json"
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown_minutes * 60
+        self.max_cooldown = max(cooldown_minutes, max_cooldown_minutes) * 60
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.platforms: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.state_file.exists(): return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("platforms", {})
+        except Exception:
+            return {}
+
+    def save(self):
+        with self._lock:
+            data = {"updated_at": get_beijing_time().strftime("%Y-%m-%d %H:%M:%S"), "platforms": self.platforms}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.state_file.with_suffix(".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"保存熔断状态失败: {e}")
+
+    def allow(self, platform_id: str) -> bool:
+        """是否允许本次请求；冷却期满的熔断平台转为半开状态并放行一次探测"""
+        if not self.enabled: return True
+        with self._lock:
+            entry = self.platforms.get(platform_id)
+            if not entry or entry["state"] == "closed": return True
+            if time.time() >= entry.get("next_probe_at", 0):
+                entry["state"] = "half_open"
+                return True
+            return False
+
+    def record_success(self, platform_id: str):
+        with self._lock:
+            if platform_id in self.platforms:
+                del self.platforms[platform_id]
+
+    def record_failure(self, platform_id: str):
+        now = time.time()
+        with self._lock:
+            entry = self.platforms.setdefault(platform_id, {"state": "closed", "failures": 0, "cooldown": self.cooldown})
+            entry["failures"] += 1
+            entry["last_failure"] = get_beijing_time().strftime("%Y-%m-%d %H:%M:%S")
+            if entry["state"] == "half_open":
+                # 探测失败：冷却时间翻倍
+                entry["cooldown"] = min(entry.get("cooldown", self.cooldown) * 2, self.max_cooldown)
+            elif entry["failures"] < self.failure_threshold:
+                return
+            entry["state"] = "open"
+            entry["next_probe_at"] = now + entry["cooldown"]
+            entry["next_probe_time"] = datetime.fromtimestamp(entry["next_probe_at"], pytz.timezone("Asia/Shanghai")).strftime("%Y-%m-%d %H:%M:%S")
+
+    def quarantined(self) -> List[str]:
+        with self._lock:
+            return [pid for pid, entry in self.platforms.items() if entry["state"] != "closed"]
+
+
+# === 响应指纹 ===
+SAME_AS_MARKER = "@SAME_AS "
+
+
+def payload_fingerprint(text: str) -> str:
+    """对响应中的 items 部分做哈希（跳过 updatedTime 等易变字段），无需解析 JSON"""
+    idx = text.find('"items"')
+    segment = text[idx:] if idx >= 0 else text
+    return hashlib.blake2b(segment.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PayloadFingerprints:
+    """记录各平台当天上次响应的内容指纹（哈希 / ETag / Last-Modified）及完整数据所在的快照"""
+
+    def __init__(self, state_file: Optional[Path] = None):
+        self.state_file = state_file or Path("output") / ".crawler_state" / "fingerprints.json"
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}
+        self.date, self.platforms = self._load()
+
+    def _load(self) -> Tuple[str, Dict[str, Dict]]:
+        today = format_date_folder()
+        if self.state_file.exists():
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("date") == today:
+                    return today, data.get("platforms", {})
+            except Exception:
+                pass
+        return today, {}
+
+    def lookup(self, platform_id: str) -> Optional[Dict]:
+        """返回可引用的上次指纹；跨天后引用失效"""
+        with self._lock:
+            if self.date != format_date_folder():
+                self.date, self.platforms = format_date_folder(), {}
+            entry = self.platforms.get(platform_id)
+            return entry if entry and entry.get("snapshot") else None
+
+    def stage(self, platform_id: str, digest: str, etag: str = "", last_modified: str = ""):
+        """记录本次变化的指纹，快照写入后再 commit"""
+        with self._lock:
+            self._pending[platform_id] = {"hash": digest, "etag": etag, "last_modified": last_modified}
+
+    def discard(self, platform_id: str):
+        with self._lock:
+            self.platforms.pop(platform_id, None)
+            self._pending.pop(platform_id, None)
+
+    def commit(self, snapshot_name: str):
+        """本次完整写入的平台指向新快照，并持久化"""
+        with self._lock:
+            for platform_id, entry in self._pending.items():
+                self.platforms[platform_id] = {**entry, "snapshot": snapshot_name}
+            self._pending = {}
+            data = {"date": self.date, "platforms": self.platforms}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.state_file.with_suffix(".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"保存响应指纹失败: {e}")
+
+
 # === 数据获取 ===
 class DataFetcher:
-    def __init__(self, proxy_url: Optional[str] = None):
-        self.proxy_url = proxy_url
+    """数据获取器"""
 
-    def fetch_data(self, id_info: Union[str, Tuple[str, str]], max_retries: int = 2, min_retry_wait: int = 3, max_retry_wait: int = 5) -> Tuple[Optional[str], str, str]:
-        if isinstance(id_info, tuple):
-            id_value, alias = id_info
-        else:
-            id_value = id_info
-            alias = id_value
+    def __init__(self, proxy_url: Optional[str] = None, max_concurrency: int = CONFIG["MAX_CONCURRENCY"], retry_policy: Optional[RetryPolicy] = None, circuit_breaker: Optional[CircuitBreaker] = None):
+        self.proxy_url = proxy_url
+        self.retry_policy = retry_policy or RetryPolicy(**CONFIG["RETRY"])
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(**CONFIG["CIRCUIT_BREAKER"])
+        self.fingerprints = PayloadFingerprints()
+        # 本次运行内容未变化的平台 -> 完整数据所在快照
+        self.last_unchanged: Dict[str, str] = {}
+        # 本次运行各平台最后一次失败的类型（budget_exhausted 表示重试预算用尽）
+        self.last_errors: Dict[str, str] = {}
+        self.max_concurrency = max(1, int(max_concurrency or 1))
+        # 按主机错开请求发起时间（并发模式下的礼貌爬取）
+        self._host_lock = threading.Lock()
+        self._host_next_slot: Dict[str, float] = {}
+        self._host_interval = 0.0
+        # 持久化连接池：所有 HTTP 请求（爬取、通知推送）共用，复用 keep-alive 连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.last_connection_stats: Dict[str, int] = {}
+
+    def get_connection_stats(self) -> Dict[str, int]:
+        """统计连接池累计的请求数与新建连接数"""
+        requests_count = new_connections = 0
+        for adapter in set(self.session.adapters.values()):
+            managers = [adapter.poolmanager] + list(getattr(adapter, "proxy_manager", {}).values())
+            for manager in managers:
+                if manager is None: continue
+                for key in list(manager.pools.keys()):
+                    pool = manager.pools.get(key)
+                    if pool is None: continue
+                    requests_count += pool.num_requests
+                    new_connections += pool.num_connections
+        return {"requests": requests_count, "new_connections": new_connections, "reused": max(0, requests_count - new_connections)}
+
+    def close(self):
+        self.session.close()
+
+    def _wait_for_host_slot(self, url: str):
+        """同一主机的请求至少间隔 _host_interval 秒发起"""
+        if self._host_interval <= 0: return
+        host = urlparse(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._host_next_slot.get(host, 0.0))
+            self._host_next_slot[host] = slot + self._host_interval
+        if slot > now: time.sleep(slot - now)
+
+    def _fetch_payload(self, id_value: str, max_retries: Optional[int] = None, previous: Optional[Dict] = None) -> Tuple[str, Optional[str], Optional[Dict]]:
+        """请求平台数据，返回 (状态, 原始文本, JSON)；状态为 ok / unchanged / failed"""
         url = f"https://newsnow.busiyi.world/api/s?id={id_value}&latest"
         proxies = {"http": self.proxy_url, "https": self.proxy_url} if self.proxy_url else None
         headers = {
@@ -381,59 +675,732 @@ class DataFetcher:
             "Accept": "application/json, text/plain, */*",
             "Connection": "keep-alive",
         }
-        retries = 0
-        while retries <= max_retries:
+        if previous:
+            if previous.get("etag"): headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"): headers["If-Modified-Since"] = previous["last_modified"]
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                response = requests.get(url, proxies=proxies, headers=headers, timeout=10)
+                self._wait_for_host_slot(url)
+                response = self.session.get(url, proxies=proxies, headers=headers, timeout=10)
+                if previous and response.status_code == 304:
+                    return "unchanged", None, None
                 response.raise_for_status()
-                data_json = response.json()
+                text = response.text
+                digest = payload_fingerprint(text)
+                if previous and digest == previous.get("hash"):
+                    # 内容与上次相同：跳过 JSON 解析
+                    return "unchanged", None, None
+                data_json = json.loads(text)
                 if data_json.get("status") in ["success", "cache"]:
-                    return response.text, id_value, alias
-                raise ValueError(f"Status: {data_json.get('status')}")
+                    self.fingerprints.stage(id_value, digest, response.headers.get("ETag", ""), response.headers.get("Last-Modified", ""))
+                    return "ok", text, data_json
+                raise FetchError("bad_status", f"Status: {data_json.get('status')}")
             except Exception as e:
-                retries += 1
-                time.sleep(random.uniform(min_retry_wait, max_retry_wait))
-        return None, id_value, alias
+                error = policy.classify(e)
+                if max_retries is not None and attempt > max_retries:
+                    delay = None
+                else:
+                    delay = policy.next_delay(attempt, error)
+                if delay is None:
+                    print(f"请求 {id_value} 失败（{error.kind}）: {error}")
+                    exhausted = (max_retries is None and error.kind in policy.RETRYABLE_KINDS
+                                 and attempt <= policy.max_retries and policy.remaining_budget <= 0)
+                    with self._host_lock:
+                        self.last_errors[id_value] = "budget_exhausted" if exhausted else error.kind
+                    return "failed", None, None
+                print(f"请求 {id_value} 失败（{error.kind}）: {error}. {delay:.2f}秒后重试...")
+                time.sleep(delay)
+
+    def fetch_data(self, id_info: Union[str, Tuple[str, str]], max_retries: Optional[int] = None) -> Tuple[Optional[str], str, str]:
+        if isinstance(id_info, tuple):
+            id_value, alias = id_info
+        else:
+            id_value = id_info
+            alias = id_value
+        _, text, _ = self._fetch_payload(id_value, max_retries)
+        return text, id_value, alias
+
+    def _crawl_one(self, id_info: Union[str, Tuple[str, str]]) -> Tuple[str, str, Optional[Dict]]:
+        """爬取并解析单个平台，失败时返回 None"""
+        id_value = id_info[0] if isinstance(id_info, tuple) else id_info
+        name = id_info[1] if isinstance(id_info, tuple) else id_value
+        breaker = self.circuit_breaker
+        if not breaker.allow(id_value):
+            print(f"平台 {id_value} 处于熔断状态，本次跳过")
+            with self._host_lock:
+                self.last_errors[id_value] = "quarantined"
+            return id_value, name, None
+        previous = self.fingerprints.lookup(id_value)
+        state, _, data = self._fetch_payload(id_value, previous=previous)
+        if state == "unchanged":
+            titles = load_snapshot_section(previous["snapshot"], id_value)
+            if titles is not None:
+                breaker.record_success(id_value)
+                with self._host_lock:
+                    self.last_unchanged[id_value] = previous["snapshot"]
+                return id_value, name, titles
+            # 引用的快照已不存在：丢弃指纹后完整重取
+            self.fingerprints.discard(id_value)
+            state, _, data = self._fetch_payload(id_value)
+        if state != "ok":
+            # 失败在本次全部平台结束后统一计入熔断（见 crawl_websites）
+            return id_value, name, None
+        try:
+            titles = {}
+            for idx, item in enumerate(data.get("items", []), 1):
+                title = item["title"]
+                if title in titles:
+                    titles[title]["ranks"].append(idx)
+                else:
+                    titles[title] = {
+                        "ranks": [idx],
+                        "url": item.get("url", ""),
+                        "mobileUrl": item.get("mobileUrl", "")
+                    }
+            breaker.record_success(id_value)
+            return id_value, name, titles
+        except:
+            self.fingerprints.discard(id_value)
+            with self._host_lock:
+                self.last_errors[id_value] = "invalid_data"
+            return id_value, name, None
 
     def crawl_websites(self, ids_list: List, request_interval: int = CONFIG["REQUEST_INTERVAL"]) -> Tuple[Dict, Dict, List]:
         results = {}
         id_to_name = {}
         failed_ids = []
-        for i, id_info in enumerate(ids_list):
-            id_value = id_info[0] if isinstance(id_info, tuple) else id_info
-            name = id_info[1] if isinstance(id_info, tuple) else id_value
+        stats_before = self.get_connection_stats()
+        self.retry_policy.reset_budget()
+        self.last_unchanged = {}
+        self.last_errors = {}
+        if self.max_concurrency > 1 and len(ids_list) > 1:
+            # 并发模式：同一主机的请求发起间隔仍为 request_interval，只让各平台的响应等待相互重叠
+            self._host_interval = request_interval / 1000
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                    outcomes = list(pool.map(self._crawl_one, ids_list))
+            finally:
+                self._host_interval = 0.0
+        else:
+            outcomes = []
+            for i, id_info in enumerate(ids_list):
+                outcomes.append(self._crawl_one(id_info))
+                if i < len(ids_list) - 1:
+                    time.sleep(request_interval / 1000)
+        # 按配置顺序汇总，保证输出稳定
+        for id_value, name, titles in outcomes:
             id_to_name[id_value] = name
-            resp, _, _ = self.fetch_data(id_info)
-            if resp:
-                try:
-                    data = json.loads(resp)
-                    results[id_value] = {}
-                    for idx, item in enumerate(data.get("items", []), 1):
-                        title = item["title"]
-                        if title in results[id_value]:
-                            results[id_value][title]["ranks"].append(idx)
-                        else:
-                            results[id_value][title] = {
-                                "ranks": [idx],
-                                "url": item.get("url", ""),
-                                "mobileUrl": item.get("mobileUrl", "")
-                            }
-                except:
-                    failed_ids.append(id_value)
-            else:
+            if titles is None:
                 failed_ids.append(id_value)
-            if i < len(ids_list) - 1:
-                time.sleep(request_interval / 1000)
+            else:
+                results[id_value] = titles
+        attempted_failures = [i for i in failed_ids if self.last_errors.get(i) != "quarantined"]
+        if attempted_failures and not results:
+            # 所有请求的平台都失败：多半是网络或上游整体故障，不让一次故障隔离全部平台
+            print("本次所有平台均请求失败，不计入平台熔断")
+        else:
+            for id_value in attempted_failures:
+                if self.last_errors.get(id_value) in CircuitBreaker.COUNTED_KINDS:
+                    self.circuit_breaker.record_failure(id_value)
+        self.circuit_breaker.save()
+        quarantined = self.circuit_breaker.quarantined()
+        if quarantined:
+            print(f"熔断中的平台: {quarantined}")
+        if self.last_unchanged:
+            print(f"内容未变化的平台: {len(self.last_unchanged)} 个")
+        stats_after = self.get_connection_stats()
+        self.last_connection_stats = {k: max(0, stats_after[k] - stats_before[k]) for k in stats_after}
+        print(f"连接池: 本次 {self.last_connection_stats['requests']} 次请求, "
+              f"新建连接 {self.last_connection_stats['new_connections']} 个, 复用 {self.last_connection_stats['reused']} 次")
         return results, id_to_name, failed_ids
 
 
+# === 快照存储 ===
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+def _pack_u32(values) -> bytes:
+    arr = array("I", values)
+    if not _LITTLE_ENDIAN: arr.byteswap()
+    return arr.tobytes()
+
+def _unpack_array(typecode: str, buf: bytes, offset: int, count: int) -> Tuple[array, int]:
+    arr = array(typecode)
+    end = offset + arr.itemsize * count
+    arr.frombytes(buf[offset:end])
+    if not _LITTLE_ENDIAN: arr.byteswap()
+    return arr, end
+
+def _pack_strings(strings: List[str]) -> bytes:
+    encoded = [x.encode("utf-8") for x in strings]
+    return struct.pack("<I", len(encoded)) + _pack_u32([len(b) for b in encoded]) + b"".join(encoded)
+
+def _unpack_strings(buf: bytes, offset: int) -> Tuple[List[str], int]:
+    (count,) = struct.unpack_from("<I", buf, offset)
+    lengths, offset = _unpack_array("I", buf, offset + 4, count)
+    strings = []
+    for n in lengths:
+        strings.append(buf[offset:offset + n].decode("utf-8"))
+        offset += n
+    return strings, offset
+
+
+class SnapshotStore:
+    """
+    按天追加写入的二进制快照库 output/<日期>/snapshots.bin
+
+    文件头 MAGIC 之后是若干帧：类型(1字节) + 长度(u32) + 内容
+      P: 新增平台 [id, name, ...]（平台表，按出现顺序编号）
+      T: 新增标题 [title, url, mobileUrl, ...]（标题字典，按出现顺序编号）
+      S: 快照 名称 + 时间戳 + 行数 + 平台编号(u16[]) + 标题编号(u32[]) + 排名(u16[]) + 失败平台编号(u16[])
+    一次顺序读取即可加载全天数据；写入只追加新字典项和一帧快照
+    """
+
+    MAGIC = b"TRSS\x01"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.platforms: List[Tuple[str, str]] = []
+        self.titles: List[Tuple[str, str, str]] = []
+        self.snapshots: Dict[str, Dict] = {}
+        self._platform_index: Dict[Tuple[str, str], int] = {}
+        self._title_index: Dict[Tuple[str, str, str], int] = {}
+        self._valid_size = 0
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self):
+        """增量读取自上次加载以来追加的帧；末尾不完整的帧（写入中断）被忽略"""
+        with self._lock:
+            self._load_locked()
+
+    def _load_locked(self):
+        if not self.path.exists(): return
+        with open(self.path, "rb") as f:
+            if self._valid_size == 0:
+                header = f.read(len(self.MAGIC))
+                if header == self.MAGIC:
+                    self._valid_size = len(self.MAGIC)
+            if self._valid_size:
+                f.seek(self._valid_size)
+                buf = f.read()
+        if self._valid_size == 0:
+            # 比文件头还短（创建后尚未写完文件头就中断）按空文件处理，下次追加时重写；
+            # 文件头不正确则移到一边后重建，不让当天后续运行全部失败
+            if len(header) == len(self.MAGIC):
+                bad_path = self.path.with_name(f"{self.path.name}.bad-{int(time.time())}")
+                print(f"快照库文件头不正确，已移至 {bad_path.name} 并重建: {self.path}")
+                os.replace(self.path, bad_path)
+            return
+        offset = 0
+        while offset + 5 <= len(buf):
+            kind, length = struct.unpack_from("<cI", buf, offset)
+            if offset + 5 + length > len(buf): break
+            payload = buf[offset + 5:offset + 5 + length]
+            if kind == b"P":
+                values, _ = _unpack_strings(payload, 0)
+                for i in range(0, len(values), 2):
+                    self._platform_index[(values[i], values[i + 1])] = len(self.platforms)
+                    self.platforms.append((values[i], values[i + 1]))
+            elif kind == b"T":
+                values, _ = _unpack_strings(payload, 0)
+                for i in range(0, len(values), 3):
+                    key = (values[i], values[i + 1], values[i + 2])
+                    self._title_index[key] = len(self.titles)
+                    self.titles.append(key)
+            elif kind == b"S":
+                names, pos = _unpack_strings(payload, 0)
+                crawl_time, rows = struct.unpack_from("<dI", payload, pos)
+                platform_col, pos = _unpack_array("H", payload, pos + 12, rows)
+                title_col, pos = _unpack_array("I", payload, pos, rows)
+                rank_col, pos = _unpack_array("H", payload, pos, rows)
+                (failed_count,) = struct.unpack_from("<I", payload, pos)
+                failed_col, pos = _unpack_array("H", payload, pos + 4, failed_count)
+                # 同一分钟内重复写入时以最后一次为准（与 txt 覆盖写一致）
+                self.snapshots.pop(names[0], None)
+                self.snapshots[names[0]] = {"time": crawl_time, "platform": platform_col, "title": title_col, "rank": rank_col, "failed": failed_col}
+            offset += 5 + length
+        self._valid_size += offset
+
+    def append(self, name: str, results: Dict, id_to_name: Dict, failed_ids: List, crawl_time: Optional[float] = None):
+        """追加一次快照"""
+        with self._lock:
+            self._load_locked()
+            new_platforms, new_titles = [], []
+            platform_col, title_col, rank_col, failed_col = array("H"), array("I"), array("H"), array("H")
+
+            def platform_no(pid):
+                key = (pid, id_to_name.get(pid, pid))
+                if key not in self._platform_index:
+                    self._platform_index[key] = len(self.platforms)
+                    self.platforms.append(key)
+                    new_platforms.extend(key)
+                return self._platform_index[key]
+
+            for pid, title_data in results.items():
+                p_no = platform_no(pid)
+                rows = []
+                for title, info in title_data.items():
+                    ranks = info.get("ranks", []) if isinstance(info, dict) else (info if isinstance(info, list) else [])
+                    url = info.get("url", "") if isinstance(info, dict) else ""
+                    mobile = info.get("mobileUrl", "") if isinstance(info, dict) else ""
+                    key = (clean_title(title), url or "", mobile or "")
+                    if key not in self._title_index:
+                        self._title_index[key] = len(self.titles)
+                        self.titles.append(key)
+                        new_titles.extend(key)
+                    rows.append((ranks[0] if ranks else 1, self._title_index[key]))
+                rows.sort()
+                for rank, t_no in rows:
+                    platform_col.append(p_no)
+                    title_col.append(t_no)
+                    rank_col.append(min(rank, 65535))
+            for pid in failed_ids:
+                failed_col.append(platform_no(pid))
+
+            crawl_time = crawl_time if crawl_time is not None else time.time()
+            frames = []
+            if new_platforms: frames.append((b"P", _pack_strings(new_platforms)))
+            if new_titles: frames.append((b"T", _pack_strings(new_titles)))
+            columns = [platform_col, title_col, rank_col, failed_col]
+            if not _LITTLE_ENDIAN:
+                columns = [array(c.typecode, c) for c in columns]
+                for c in columns: c.byteswap()
+            snap = (_pack_strings([name]) + struct.pack("<dI", crawl_time, len(platform_col))
+                    + columns[0].tobytes() + columns[1].tobytes() + columns[2].tobytes()
+                    + struct.pack("<I", len(failed_col)) + columns[3].tobytes())
+            frames.append((b"S", snap))
+            data = b"".join(struct.pack("<cI", kind, len(payload)) + payload for kind, payload in frames)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "r+b" if self.path.exists() else "wb") as f:
+                if self._valid_size == 0:
+                    f.write(self.MAGIC)
+                    self._valid_size = len(self.MAGIC)
+                # 截掉上次中断写入留下的残帧后追加
+                f.seek(self._valid_size)
+                f.truncate()
+                f.write(data)
+            self._valid_size += len(data)
+            self.snapshots.pop(name, None)
+            self.snapshots[name] = {"time": crawl_time, "platform": platform_col, "title": title_col, "rank": rank_col, "failed": failed_col}
+
+    def names(self) -> List[str]:
+        return sorted(self.snapshots)
+
+    def get_snapshot(self, name: str, platform_ids: Optional[List[str]] = None) -> Tuple[Dict, Dict]:
+        """返回与 parse_file_titles 相同结构的 (titles_by_id, id_to_name)"""
+        snap = self.snapshots[name]
+        titles_by_id, id_to_name = {}, {}
+        for p_no, t_no, rank in zip(snap["platform"], snap["title"], snap["rank"]):
+            pid, pname = self.platforms[p_no]
+            if platform_ids and pid not in platform_ids: continue
+            if pid not in titles_by_id:
+                titles_by_id[pid] = {}
+                id_to_name[pid] = pname
+            title, url, mobile = self.titles[t_no]
+            if title not in titles_by_id[pid]:
+                titles_by_id[pid][title] = {"ranks": [rank], "url": url, "mobileUrl": mobile}
+        return titles_by_id, id_to_name
+
+
+_snapshot_stores: Dict[str, SnapshotStore] = {}
+
+def get_snapshot_store(date_folder: Optional[str] = None) -> SnapshotStore:
+    """获取某天的快照库（进程内复用，只增量读取新追加的帧）"""
+    date_folder = date_folder or format_date_folder()
+    if date_folder not in _snapshot_stores:
+        _snapshot_stores.clear()
+        _snapshot_stores[date_folder] = SnapshotStore(Path("output") / date_folder / "snapshots.bin")
+    store = _snapshot_stores[date_folder]
+    store.load()
+    return store
+
+class NewsDatabase:
+    """可选的 SQLite 新闻库 output/news.db（平台 / 标题 / 出现记录），供 MCP 按日期、平台、标题做索引查询"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS platforms (
+        id INTEGER PRIMARY KEY,
+        platform_id TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS titles (
+        id INTEGER PRIMARY KEY,
+        platform_ref INTEGER NOT NULL REFERENCES platforms(id),
+        title TEXT NOT NULL,
+        title_lower TEXT NOT NULL,
+        url TEXT NOT NULL DEFAULT '',
+        mobile_url TEXT NOT NULL DEFAULT '',
+        UNIQUE (platform_ref, title)
+    );
+    CREATE TABLE IF NOT EXISTS snapshots (
+        date TEXT NOT NULL,
+        snapshot_time TEXT NOT NULL,
+        crawl_time REAL NOT NULL,
+        PRIMARY KEY (date, snapshot_time)
+    );
+    CREATE TABLE IF NOT EXISTS appearances (
+        title_id INTEGER NOT NULL REFERENCES titles(id),
+        platform_ref INTEGER NOT NULL REFERENCES platforms(id),
+        date TEXT NOT NULL,
+        snapshot_time TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        PRIMARY KEY (title_id, date, snapshot_time)
+    );
+    CREATE INDEX IF NOT EXISTS idx_appearances_date_platform ON appearances (date, platform_ref);
+    CREATE INDEX IF NOT EXISTS idx_appearances_title_date ON appearances (title_id, date);
+    CREATE INDEX IF NOT EXISTS idx_titles_title ON titles (title);
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else Path("output") / "news.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self._platform_refs: Dict[str, int] = {}
+
+    def close(self):
+        self.conn.close()
+
+    def has_date(self, date_str: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM snapshots WHERE date = ? LIMIT 1", (date_str,)).fetchone() is not None
+
+    def _platform_ref(self, platform_id: str, name: str) -> int:
+        if platform_id not in self._platform_refs:
+            self.conn.execute(
+                "INSERT INTO platforms (platform_id, name) VALUES (?, ?) ON CONFLICT(platform_id) DO UPDATE SET name = excluded.name",
+                (platform_id, name))
+            self._platform_refs[platform_id] = self.conn.execute("SELECT id FROM platforms WHERE platform_id = ?", (platform_id,)).fetchone()[0]
+        return self._platform_refs[platform_id]
+
+    def record_snapshot(self, date_str: str, snapshot_time: str, results: Dict, id_to_name: Dict, crawl_time: Optional[float] = None):
+        """写入一次快照（同一快照重复写入时覆盖）"""
+        with self.conn:
+            self.conn.execute("DELETE FROM appearances WHERE date = ? AND snapshot_time = ?", (date_str, snapshot_time))
+            self.conn.execute("INSERT OR REPLACE INTO snapshots (date, snapshot_time, crawl_time) VALUES (?, ?, ?)",
+                              (date_str, snapshot_time, crawl_time if crawl_time is not None else time.time()))
+            for pid, title_data in results.items():
+                p_ref = self._platform_ref(pid, id_to_name.get(pid, pid))
+                rows = []
+                for title, info in title_data.items():
+                    title = clean_title(title)
+                    ranks = info.get("ranks", []) if isinstance(info, dict) else []
+                    url = (info.get("url") or "") if isinstance(info, dict) else ""
+                    mobile = (info.get("mobileUrl") or "") if isinstance(info, dict) else ""
+                    self.conn.execute(
+                        "INSERT INTO titles (platform_ref, title, title_lower, url, mobile_url) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(platform_ref, title) DO UPDATE SET "
+                        "url = CASE WHEN titles.url = '' THEN excluded.url ELSE titles.url END, "
+                        "mobile_url = CASE WHEN titles.mobile_url = '' THEN excluded.mobile_url ELSE titles.mobile_url END",
+                        (p_ref, title, title.lower(), url, mobile))
+                    title_id = self.conn.execute("SELECT id FROM titles WHERE platform_ref = ? AND title = ?", (p_ref, title)).fetchone()[0]
+                    rows.append((title_id, p_ref, date_str, snapshot_time, ranks[0] if ranks else 1))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO appearances (title_id, platform_ref, date, snapshot_time, rank) VALUES (?, ?, ?, ?, ?)", rows)
+
+
+_news_database: Optional[NewsDatabase] = None
+
+def get_news_database() -> NewsDatabase:
+    global _news_database
+    if _news_database is None:
+        _news_database = NewsDatabase()
+    return _news_database
+
+def save_snapshot(results: Dict, id_to_name: Dict, failed_ids: List, unchanged: Optional[Dict[str, str]] = None) -> str:
+    """保存本次爬取结果，返回快照名（HH时MM分）"""
+    name = format_time_filename()
+    storage = CONFIG["STORAGE"]
+    if storage["SNAPSHOT_STORE"]:
+        get_snapshot_store().append(name, results, id_to_name, failed_ids)
+    if storage["TXT_EXPORT"] or not storage["SNAPSHOT_STORE"]:
+        save_titles_to_file(results, id_to_name, failed_ids, unchanged, name)
+    if storage["SQLITE"]:
+        try:
+            sync_news_database(name, results, id_to_name)
+        except sqlite3.Error as e:
+            print(f"写入 SQLite 新闻库失败: {e}")
+    return name
+
+def sync_news_database(name: str, results: Dict, id_to_name: Dict):
+    """写入当前快照；当天首次写入时补录当天已有的快照"""
+    db = get_news_database()
+    date_str = datetime.strptime(format_date_folder(), "%Y年%m月%d日").strftime("%Y-%m-%d")
+    if not db.has_date(date_str):
+        for earlier_name, titles, names in load_today_snapshots():
+            if earlier_name != name:
+                db.record_snapshot(date_str, earlier_name, titles, names)
+    db.record_snapshot(date_str, name, results, id_to_name)
+
+def load_today_snapshots(current_platform_ids: Optional[List[str]] = None) -> List[Tuple[str, Dict, Dict]]:
+    """按时间顺序返回当天所有快照 [(快照名, titles_by_id, id_to_name)]，优先读取快照库，缺失的再读 txt"""
+    txt_dir = Path("output") / format_date_folder() / "txt"
+    store = get_snapshot_store()
+    sources = {name: None for name in store.names()}
+    if txt_dir.exists():
+        for f in txt_dir.glob("*.txt"):
+            sources.setdefault(f.stem, f)
+    snapshots = []
+    for name in sorted(sources):
+        if sources[name] is None:
+            titles, names = store.get_snapshot(name, current_platform_ids)
+        else:
+            titles, names = parse_file_titles(sources[name])
+            if current_platform_ids:
+                titles = {k: v for k, v in titles.items() if k in current_platform_ids}
+                names = {k: v for k, v in names.items() if k in current_platform_ids}
+        snapshots.append((name, titles, names))
+    return snapshots
+
+def list_today_snapshot_names() -> List[str]:
+    names = set(get_snapshot_store().names())
+    txt_dir = Path("output") / format_date_folder() / "txt"
+    if txt_dir.exists():
+        names.update(f.stem for f in txt_dir.glob("*.txt"))
+    return sorted(names)
+
+def today_snapshot_signatures() -> Dict[str, str]:
+    """当天各快照的签名（快照库写入时间 / txt 修改时间与大小），用于判断聚合是否过期"""
+    store = get_snapshot_store()
+    sigs = {name: f"s{store.snapshots[name]['time']}" for name in store.names()}
+    txt_dir = Path("output") / format_date_folder() / "txt"
+    if txt_dir.exists():
+        for f in txt_dir.glob("*.txt"):
+            if f.stem not in sigs:
+                st = f.stat()
+                sigs[f.stem] = f"t{st.st_mtime_ns}:{st.st_size}"
+    return dict(sorted(sigs.items()))
+
+def load_today_snapshot(name: str) -> Tuple[Dict, Dict]:
+    """读取当天单个快照 (titles_by_id, id_to_name)"""
+    store = get_snapshot_store()
+    if name in store.snapshots:
+        return store.get_snapshot(name)
+    return parse_file_titles(Path("output") / format_date_folder() / "txt" / f"{name}.txt")
+
+
+# === 当日聚合 ===
+class DailyAggregate:
+    """当天标题聚合 output/<日期>/aggregate.json（标题 → 首末出现时间、次数、排名、链接），每次只合并新增快照"""
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.snapshots: List[List[str]] = []  # 已合并的 [快照名, 签名]，按时间顺序
+        self.names: Dict[str, str] = {}
+        self.titles: Dict[str, Dict[str, Dict]] = {}
+        self._loaded = False
+
+    def _reset(self):
+        self.snapshots, self.names, self.titles = [], {}, {}
+
+    def _load(self):
+        self._loaded = True
+        if not self.path.exists(): return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != self.VERSION: raise ValueError(f"版本不匹配: {data.get('version')}")
+            snapshots, names, titles = data["snapshots"], data["names"], data["titles"]
+            if not isinstance(snapshots, list) or not isinstance(names, dict) or not isinstance(titles, dict):
+                raise ValueError("结构不正确")
+            self.snapshots, self.names, self.titles = snapshots, names, titles
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"当日聚合文件损坏，将重建: {e}")
+            self._reset()
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "snapshots": self.snapshots, "names": self.names, "titles": self.titles}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def merge(self, name: str, signature: str, titles_by_id: Dict, id_to_name: Dict):
+        self.names.update(id_to_name)
+        for sid, tdata in titles_by_id.items():
+            platform = self.titles.setdefault(sid, {})
+            for t, d in tdata.items():
+                entry = platform.get(t)
+                if entry is None:
+                    platform[t] = {"first_time": name, "last_time": name, "count": 1, "ranks": list(d["ranks"]), "url": d.get("url", ""), "mobileUrl": d.get("mobileUrl", "")}
+                    continue
+                entry["last_time"] = name
+                entry["count"] += 1
+                entry["ranks"] = sorted(set(entry["ranks"] + d["ranks"]))
+                if not entry["url"]: entry["url"] = d.get("url", "")
+                if not entry["mobileUrl"]: entry["mobileUrl"] = d.get("mobileUrl", "")
+        self.snapshots.append([name, signature])
+
+    def sync(self) -> "DailyAggregate":
+        """合并尚未聚合的快照；已合并的快照有变化或顺序不符时从头重建"""
+        if not self._loaded: self._load()
+        sigs = [[name, sig] for name, sig in today_snapshot_signatures().items()]
+        if self.snapshots != sigs[:len(self.snapshots)]:
+            if self.snapshots: print("当日快照有变化，重建当日聚合")
+            self._reset()
+        pending = sigs[len(self.snapshots):]
+        for name, sig in pending:
+            titles, names = load_today_snapshot(name)
+            self.merge(name, sig, titles, names)
+        if pending: self.save()
+        return self
+
+    def to_results(self, platform_ids: Optional[List[str]] = None) -> Tuple[Dict, Dict, Dict]:
+        """返回与逐个解析快照相同结构的 (all_results, id_to_name, title_info)"""
+        all_results, id_to_name, title_info = {}, {}, {}
+        for sid, platform in self.titles.items():
+            if platform_ids and sid not in platform_ids: continue
+            all_results[sid] = {t: {"ranks": list(e["ranks"]), "url": e["url"], "mobileUrl": e["mobileUrl"]} for t, e in platform.items()}
+            title_info[sid] = {t: dict(e, ranks=list(e["ranks"])) for t, e in platform.items()}
+        for sid, name in self.names.items():
+            if not platform_ids or sid in platform_ids: id_to_name[sid] = name
+        return all_results, id_to_name, title_info
+
+
+_daily_aggregates: Dict[str, DailyAggregate] = {}
+
+def get_daily_aggregate(date_folder: Optional[str] = None) -> DailyAggregate:
+    date_folder = date_folder or format_date_folder()
+    if date_folder not in _daily_aggregates:
+        _daily_aggregates.clear()
+        path = Path("output") / date_folder / "aggregate.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _daily_aggregates[date_folder] = DailyAggregate(path)
+    return _daily_aggregates[date_folder].sync()
+
+
+class SeenTitles:
+    """
+    当天已出现标题的集合 output/<日期>/seen_titles.bin（64 位哈希键 → 首次出现的快照序号）
+
+    MAGIC 之后每个快照一帧：长度(u32) + [快照名, 签名] + 新出现的键数(u32) + 键(u64[])
+    判断最新快照中的新增标题只需读取该快照本身，与当天已有快照数量无关
+    """
+
+    MAGIC = b"TRSEEN\x01"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.snapshots: List[List[str]] = []  # 已记录的 [快照名, 签名]，下标即快照序号
+        self.first_seen: Dict[int, int] = {}
+        self.latest: Optional[Tuple[Dict, Dict]] = None  # 本进程最近一次读取的最新快照
+        self._valid_size = 0
+        self._load()
+
+    @staticmethod
+    def key(source_id: str, title: str) -> int:
+        return int.from_bytes(hashlib.blake2b(f"{source_id}\x00{title}".encode("utf-8"), digest_size=8).digest(), "little")
+
+    def _load(self):
+        if not self.path.exists(): return
+        with open(self.path, "rb") as f:
+            buf = f.read()
+        if not buf.startswith(self.MAGIC):
+            print(f"已见标题文件损坏，将重建: {self.path}")
+            return
+        offset = len(self.MAGIC)
+        try:
+            while offset + 4 <= len(buf):
+                (length,) = struct.unpack_from("<I", buf, offset)
+                if offset + 4 + length > len(buf): break
+                payload = buf[offset + 4:offset + 4 + length]
+                (name, sig), pos = _unpack_strings(payload, 0)
+                (count,) = struct.unpack_from("<I", payload, pos)
+                keys, _ = _unpack_array("Q", payload, pos + 4, count)
+                if len(keys) != count: raise ValueError("键数量与帧长度不符")
+                ordinal = len(self.snapshots)
+                for k in keys: self.first_seen.setdefault(k, ordinal)
+                self.snapshots.append([name, sig])
+                offset += 4 + length
+        except (struct.error, UnicodeDecodeError, ValueError) as e:
+            # 帧内容损坏：丢弃已读内容，sync 时从当天快照重建
+            print(f"已见标题文件损坏（{e}），将重建: {self.path}")
+            self._reset()
+            return
+        self._valid_size = offset
+
+    def _reset(self):
+        self.snapshots, self.first_seen, self._valid_size = [], {}, 0
+
+    def _append(self, name: str, signature: str, titles_by_id: Dict):
+        ordinal = len(self.snapshots)
+        keys = array("Q")
+        for sid, tdata in titles_by_id.items():
+            for t in tdata:
+                k = self.key(sid, t)
+                if k not in self.first_seen:
+                    self.first_seen[k] = ordinal
+                    keys.append(k)
+        self.snapshots.append([name, signature])
+        if not _LITTLE_ENDIAN: keys.byteswap()
+        payload = _pack_strings([name, signature]) + struct.pack("<I", len(keys)) + keys.tobytes()
+        data = struct.pack("<I", len(payload)) + payload
+        with open(self.path, "r+b" if self.path.exists() and self._valid_size else "wb") as f:
+            if self._valid_size == 0:
+                f.write(self.MAGIC)
+                self._valid_size = len(self.MAGIC)
+            f.seek(self._valid_size)
+            f.truncate()
+            f.write(data)
+        self._valid_size += len(data)
+
+    def sync(self) -> "SeenTitles":
+        """记录尚未记录的快照；已记录的快照有变化或顺序不符时从头重建"""
+        sigs = [[name, sig] for name, sig in today_snapshot_signatures().items()]
+        if self.snapshots != sigs[:len(self.snapshots)]:
+            print("当日快照有变化，重建已见标题集合")
+            self._reset()
+        self.latest = None
+        for name, sig in sigs[len(self.snapshots):]:
+            self.latest = load_today_snapshot(name)
+            self._append(name, sig, self.latest[0])
+        return self
+
+    def new_in_latest(self, platform_ids: Optional[List[str]] = None) -> Dict:
+        """最新快照中首次出现的标题 {source_id: {title: info}}"""
+        if len(self.snapshots) < 2: return {}
+        latest_ordinal = len(self.snapshots) - 1
+        titles, _ = self.latest or load_today_snapshot(self.snapshots[-1][0])
+        new_titles = {}
+        for sid, tdata in titles.items():
+            if platform_ids and sid not in platform_ids: continue
+            for t, info in tdata.items():
+                if self.first_seen.get(self.key(sid, t)) == latest_ordinal:
+                    new_titles.setdefault(sid, {})[t] = info
+        return new_titles
+
+
+_seen_titles: Dict[str, SeenTitles] = {}
+
+def get_seen_titles(date_folder: Optional[str] = None) -> SeenTitles:
+    date_folder = date_folder or format_date_folder()
+    if date_folder not in _seen_titles:
+        _seen_titles.clear()
+        path = Path("output") / date_folder / "seen_titles.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _seen_titles[date_folder] = SeenTitles(path)
+    return _seen_titles[date_folder].sync()
+
+
 # === 数据处理 ===
-def save_titles_to_file(results: Dict, id_to_name: Dict, failed_ids: List) -> str:
-    file_path = get_output_path("txt", f"{format_time_filename()}.txt")
+def save_titles_to_file(results: Dict, id_to_name: Dict, failed_ids: List, unchanged: Optional[Dict[str, str]] = None, snapshot_name: Optional[str] = None) -> str:
+    """导出 txt 快照；内容未变化的平台只写入对完整快照的引用"""
+    file_path = get_output_path("txt", f"{snapshot_name or format_time_filename()}.txt")
+    unchanged = unchanged or {}
     with open(file_path, "w", encoding="utf-8") as f:
         for id_value, title_data in results.items():
             name = id_to_name.get(id_value, id_value)
             f.write(f"{id_value} | {name}\n")
+            if unchanged.get(id_value, Path(file_path).stem) != Path(file_path).stem:
+                f.write(f"{SAME_AS_MARKER}{unchanged[id_value]}\n\n")
+                continue
             sorted_titles = []
             for title, info in title_data.items():
                 ranks = info.get("ranks", []) if isinstance(info, dict) else (info if isinstance(info, list) else [])
@@ -473,9 +1440,12 @@ def load_frequency_words(frequency_file: Optional[str] = None) -> Tuple[List[Dic
             groups.append({"required": req, "normal": norm, "group_key": " ".join(norm) if norm else " ".join(req)})
     return groups, filters
 
-def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
+@lru_cache(maxsize=32)
+def _parse_snapshot_text(file_path: str, mtime_ns: int) -> Tuple[Dict, Dict, Dict]:
+    """解析快照文本（按路径和修改时间缓存），返回 (titles_by_id, id_to_name, 引用)"""
     titles_by_id = {}
     id_to_name = {}
+    refs = {}
     with open(file_path, "r", encoding="utf-8") as f:
         content = f.read()
     for section in content.split("\n\n"):
@@ -485,6 +1455,9 @@ def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
         header = lines[0].split(" | ")
         sid = header[0].strip()
         id_to_name[sid] = header[1].strip() if len(header) > 1 else sid
+        if lines[1].startswith(SAME_AS_MARKER):
+            refs[sid] = lines[1][len(SAME_AS_MARKER):].strip()
+            continue
         titles_by_id[sid] = {}
         for line in lines[1:]:
             if not line.strip(): continue
@@ -501,96 +1474,248 @@ def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
                     mobile = mobile.rstrip("]")
                 titles_by_id[sid][clean_title(rest)] = {"ranks": [rank], "url": url, "mobileUrl": mobile}
             except: pass
-    return titles_by_id, id_to_name
+    return titles_by_id, id_to_name, refs
+
+def _copy_titles(titles: Dict) -> Dict:
+    return {t: {"ranks": list(d["ranks"]), "url": d["url"], "mobileUrl": d["mobileUrl"]} for t, d in titles.items()}
+
+def parse_file_titles(file_path: Path) -> Tuple[Dict, Dict]:
+    file_path = Path(file_path)
+    titles, names, refs = _parse_snapshot_text(str(file_path), file_path.stat().st_mtime_ns)
+    titles_by_id = {sid: _copy_titles(tdata) for sid, tdata in titles.items()}
+    for sid, ref in refs.items():
+        # 内容未变化的平台：从被引用的完整快照中取数据
+        ref_path = file_path.parent / f"{ref}.txt"
+        if not ref_path.exists(): continue
+        ref_titles, _, _ = _parse_snapshot_text(str(ref_path), ref_path.stat().st_mtime_ns)
+        if sid in ref_titles:
+            titles_by_id[sid] = _copy_titles(ref_titles[sid])
+    return titles_by_id, dict(names)
+
+def load_snapshot_section(snapshot_name: str, source_id: str) -> Optional[Dict]:
+    """读取当天某个快照中指定平台的数据，不存在时返回 None"""
+    store = get_snapshot_store()
+    if snapshot_name in store.snapshots:
+        return store.get_snapshot(snapshot_name, [source_id])[0].get(source_id)
+    file_path = Path("output") / format_date_folder() / "txt" / f"{snapshot_name}.txt"
+    if not file_path.exists(): return None
+    titles, _ = parse_file_titles(file_path)
+    return titles.get(source_id)
 
 def read_all_today_titles(current_platform_ids: Optional[List[str]] = None) -> Tuple[Dict, Dict, Dict]:
-    date_folder = format_date_folder()
-    txt_dir = Path("output") / date_folder / "txt"
-    if not txt_dir.exists(): return {}, {}, {}
-    all_results, final_id_to_name, title_info = {}, {}, {}
-    for f in sorted(txt_dir.glob("*.txt")):
-        titles, names = parse_file_titles(f)
-        if current_platform_ids:
-            titles = {k: v for k, v in titles.items() if k in current_platform_ids}
-            names = {k: v for k, v in names.items() if k in current_platform_ids}
-        final_id_to_name.update(names)
-        for sid, tdata in titles.items():
-            process_source_data(sid, tdata, f.stem, all_results, title_info)
-    return all_results, final_id_to_name, title_info
-
-def process_source_data(source_id, title_data, time_info, all_results, title_info):
-    if source_id not in all_results:
-        all_results[source_id] = title_data
-        if source_id not in title_info: title_info[source_id] = {}
-        for t, d in title_data.items():
-            title_info[source_id][t] = {"first_time": time_info, "last_time": time_info, "count": 1, **d}
-    else:
-        for t, d in title_data.items():
-            if t not in all_results[source_id]:
-                all_results[source_id][t] = d
-                title_info[source_id][t] = {"first_time": time_info, "last_time": time_info, "count": 1, **d}
-            else:
-                exist = all_results[source_id][t]
-                merged = list(set(exist["ranks"] + d["ranks"]))
-                all_results[source_id][t] = {"ranks": merged, "url": exist["url"] or d["url"], "mobileUrl": exist["mobileUrl"] or d["mobileUrl"]}
-                title_info[source_id][t].update({"last_time": time_info, "ranks": merged})
-                title_info[source_id][t]["count"] += 1
-                if not title_info[source_id][t]["url"]: title_info[source_id][t]["url"] = d["url"]
+    return get_daily_aggregate().to_results(current_platform_ids)
 
 def detect_latest_new_titles(current_platform_ids: Optional[List[str]] = None) -> Dict:
-    date_folder = format_date_folder()
-    txt_dir = Path("output") / date_folder / "txt"
-    if not txt_dir.exists() or len(list(txt_dir.glob("*.txt"))) < 2: return {}
-    files = sorted(txt_dir.glob("*.txt"))
-    latest, _ = parse_file_titles(files[-1])
-    if current_platform_ids: latest = {k: v for k, v in latest.items() if k in current_platform_ids}
-    history = set()
-    for f in files[:-1]:
-        h_data, _ = parse_file_titles(f)
-        if current_platform_ids: h_data = {k: v for k, v in h_data.items() if k in current_platform_ids}
-        for sid, tdata in h_data.items():
-            for t in tdata: history.add(f"{sid}_{t}")
-    new_titles = {}
-    for sid, tdata in latest.items():
-        for t, info in tdata.items():
-            if f"{sid}_{t}" not in history:
-                if sid not in new_titles: new_titles[sid] = {}
-                new_titles[sid][t] = info
-    return new_titles
+    return get_seen_titles().new_in_latest(current_platform_ids)
+
+
+# === 关键词匹配 ===
+class KeywordMatcher:
+    """
+    频率词多模式匹配器（Aho–Corasick）
+
+    所有过滤词、必须词、普通词编译进同一个自动机，每个标题只扫描一遍得到命中词的位集，
+    再用每组的必须词掩码 / 普通词掩码判断归属，耗时与词表大小基本无关
+    """
+
+    CLASSIFY_CACHE_SIZE = 50000
+    _MISSING = object()
+
+    def __init__(self, word_groups: List[Dict], filter_words: List[str]):
+        # 归类缓存由并发的报告流水线共用：读取不加锁（单次 get），清空和写入在锁内完成
+        self._classified: Dict[str, Optional[int]] = {}
+        self._classified_lock = threading.Lock()
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[int] = [0]
+        self._pattern_bits: Dict[str, int] = {}
+        self.always = 0  # 空词视为总是命中
+        self.filter_mask = 0
+        for w in filter_words: self.filter_mask |= self._add(w)
+        self.groups = []  # [(必须词掩码, 普通词掩码)]
+        for g in word_groups:
+            req_mask = norm_mask = 0
+            for w in g["required"]: req_mask |= self._add(w)
+            for w in g["normal"]: norm_mask |= self._add(w)
+            self.groups.append((req_mask, norm_mask))
+        self._build_fail_links()
+
+    def _add(self, word: str) -> int:
+        word = word.lower()
+        if word in self._pattern_bits: return self._pattern_bits[word]
+        bit = 1 << len(self._pattern_bits)
+        self._pattern_bits[word] = bit
+        if not word:
+            self.always |= bit
+            return bit
+        node = 0
+        for ch in word:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(0)
+            node = nxt
+        self.output[node] |= bit
+        return bit
+
+    def _build_fail_links(self):
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for ch, nxt in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]: f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.output[nxt] |= self.output[self.fail[nxt]]
+                queue.append(nxt)
+
+    def scan(self, title: str) -> int:
+        """返回标题命中的所有词的位集"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found, node = self.always, 0
+        if not goto[0]: return found
+        for ch in title.lower():
+            while node and ch not in goto[node]: node = fail[node]
+            node = goto[node].get(ch, 0)
+            found |= output[node]
+        return found
+
+    def classify(self, title: str) -> Optional[int]:
+        """返回标题所属的第一个词组下标；被过滤或不匹配任何词组时返回 None（结果按标题缓存，同一次运行的多个报告共用）"""
+        group = self._classified.get(title, self._MISSING)
+        if group is not self._MISSING: return group
+        found = self.scan(title)
+        group = None
+        if not found & self.filter_mask:
+            for i, (req_mask, norm_mask) in enumerate(self.groups):
+                if found & req_mask != req_mask: continue
+                if norm_mask and not found & norm_mask: continue
+                group = i
+                break
+        with self._classified_lock:
+            if len(self._classified) >= self.CLASSIFY_CACHE_SIZE: self._classified.clear()
+            self._classified[title] = group
+        return group
+
+
+_keyword_matchers: Dict[Tuple, KeywordMatcher] = {}
+
+def get_keyword_matcher(word_groups: List[Dict], filter_words: List[str]) -> KeywordMatcher:
+    """按词表内容复用已编译的匹配器；词表变化后只保留最新的匹配器，旧匹配器及其归类缓存随之释放"""
+    key = (tuple((tuple(g["required"]), tuple(g["normal"])) for g in word_groups), tuple(filter_words))
+    matcher = _keyword_matchers.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(word_groups, filter_words)
+        _keyword_matchers.clear()
+        _keyword_matchers[key] = matcher
+    return matcher
+
+def classify_titles(results: Dict, word_groups: List[Dict], filter_words: List[str]) -> KeywordMatcher:
+    """预先为所有标题归类（结果缓存在匹配器中），之后的各个报告流水线直接复用"""
+    if not word_groups:
+        word_groups, filter_words = [{"required": [], "normal": [], "group_key": "全部新闻"}], []
+    matcher = get_keyword_matcher(word_groups, filter_words)
+    for titles_data in results.values():
+        for title in titles_data:
+            matcher.classify(title)
+    return matcher
 
 
 # === 统计和分析 ===
-def calculate_news_weight(title_data: Dict, rank_threshold: int = CONFIG["RANK_THRESHOLD"]) -> float:
-    ranks = title_data.get("ranks", [])
+def news_weight(ranks: List[int], count: int, rank_threshold: int = CONFIG["RANK_THRESHOLD"]) -> float:
     if not ranks: return 0.0
-    count = title_data.get("count", len(ranks))
     wc = CONFIG["WEIGHT_CONFIG"]
-    rank_score = sum(11 - min(r, 10) for r in ranks) / len(ranks)
+    rank_total = hot = 0
+    for r in ranks:
+        rank_total += 11 - r if r < 10 else 1
+        if r <= rank_threshold: hot += 1
+    rank_score = rank_total / len(ranks)
     freq_score = min(count, 10) * 10
-    hot_score = (sum(1 for r in ranks if r <= rank_threshold) / len(ranks)) * 100
+    hot_score = (hot / len(ranks)) * 100
     return rank_score * wc["RANK_WEIGHT"] + freq_score * wc["FREQUENCY_WEIGHT"] + hot_score * wc["HOTNESS_WEIGHT"]
 
+def calculate_news_weight(title_data: Dict, rank_threshold: int = CONFIG["RANK_THRESHOLD"]) -> float:
+    ranks = title_data.get("ranks", [])
+    return news_weight(ranks, title_data.get("count", len(ranks)), rank_threshold)
+
+def pack_rank_arrays(rank_lists: List[List[int]]) -> Tuple[List[int], List[int]]:
+    """把多条新闻的排名列表压成 (offsets, values)：第 i 条的排名为 values[offsets[i]:offsets[i+1]]"""
+    offsets, values = [0], []
+    for ranks in rank_lists:
+        values.extend(ranks)
+        offsets.append(len(values))
+    return offsets, values
+
+def batch_news_weights(offsets, values, counts, rank_threshold: int = CONFIG["RANK_THRESHOLD"], weight_config: Optional[Dict] = None) -> List[float]:
+    """批量计算权重（与 news_weight 逐条结果一致）；安装了 numpy 时一次向量化完成"""
+    wc = weight_config or CONFIG["WEIGHT_CONFIG"]
+    n = len(counts)
+    if n == 0: return []
+    if np is None:
+        return [news_weight(values[offsets[i]:offsets[i + 1]], counts[i], rank_threshold) if offsets[i + 1] > offsets[i] else 0.0
+                for i in range(n)]
+    offsets = np.asarray(offsets, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    lengths = np.diff(offsets)
+    # 前缀和做分段求和，空分段（无排名）权重为 0
+    rank_cum = np.concatenate(([0], np.cumsum(11 - np.minimum(values, 10))))
+    hot_cum = np.concatenate(([0], np.cumsum(values <= rank_threshold)))
+    safe_len = np.maximum(lengths, 1)
+    rank_score = (rank_cum[offsets[1:]] - rank_cum[offsets[:-1]]) / safe_len
+    hot_score = (hot_cum[offsets[1:]] - hot_cum[offsets[:-1]]) / safe_len * 100
+    freq_score = np.minimum(np.asarray(counts, dtype=np.int64), 10) * 10
+    weights = rank_score * wc["RANK_WEIGHT"] + freq_score * wc["FREQUENCY_WEIGHT"] + hot_score * wc["HOTNESS_WEIGHT"]
+    return np.where(lengths > 0, weights, 0.0).tolist()
+
 def matches_word_groups(title: str, word_groups: List[Dict], filter_words: List[str]) -> bool:
     if not word_groups: return True
-    t_lower = title.lower()
-    if any(fw.lower() in t_lower for fw in filter_words): return False
-    for g in word_groups:
-        req, norm = g["required"], g["normal"]
-        if req and not all(w.lower() in t_lower for w in req): continue
-        if norm and not any(w.lower() in t_lower for w in norm): continue
-        return True
-    return False
+    return get_keyword_matcher(word_groups, filter_words).classify(title) is not None
 
 def format_time_display(first, last):
     if not first: return ""
     return first if first == last or not last else f"[{first} ~ {last}]"
 
-def format_rank_display(ranks, threshold, ftype):
-    if not ranks: return ""
-    ur = sorted(set(ranks))
-    mn, mx = ur[0], ur[-1]
-    if mn == mx: return f"[{mn}]"
-    return f"[{mn} - {mx}]"
+def format_rank_display(ranks: List[int], rank_threshold: int, format_type: str) -> str:
+    """统一的排名格式化方法"""
+    if not ranks:
+        return ""
+
+    unique_ranks = sorted(set(ranks))
+    min_rank = unique_ranks[0]
+    max_rank = unique_ranks[-1]
+
+    if format_type == "html":
+        highlight_start = "<font color='red'><strong>"
+        highlight_end = "</strong></font>"
+    elif format_type == "feishu":
+        highlight_start = "<font color='red'>**"
+        highlight_end = "**</font>"
+    elif format_type == "dingtalk":
+        highlight_start = "**"
+        highlight_end = "**"
+    elif format_type == "wework":
+        highlight_start = "**"
+        highlight_end = "**"
+    elif format_type == "telegram":
+        highlight_start = "<b>"
+        highlight_end = "</b>"
+    else:
+        highlight_start = "**"
+        highlight_end = "**"
+
+    if min_rank <= rank_threshold:
+        if min_rank == max_rank:
+            return f"{highlight_start}[{min_rank}]{highlight_end}"
+        else:
+            return f"{highlight_start}[{min_rank} - {max_rank}]{highlight_end}"
+    else:
+        if min_rank == max_rank:
+            return f"[{min_rank}]"
+        else:
+            return f"[{min_rank} - {max_rank}]"
 
 def count_word_frequency(
     results: Dict,
@@ -629,6 +1754,9 @@ def count_word_frequency(
     # 用于记录每个平台是否匹配到了新闻，用于随机推荐逻辑
     platform_matched_counts = {sid: 0 for sid in results.keys()}
 
+    matcher = get_keyword_matcher(word_groups, filter_words)
+    matched = []
+
     # 第一步：收集所有匹配的新闻
     for source_id, titles_data in results_to_process.items():
         total_titles += len(titles_data)
@@ -637,62 +1765,54 @@ def count_word_frequency(
         for title, title_data in titles_data.items():
             if title in processed[source_id]: continue
             
-            if not matches_word_groups(title, word_groups, filter_words): continue
+            # 一次扫描同时完成过滤与归类
+            group_index = matcher.classify(title)
+            if group_index is None: continue
             
             # 匹配成功
             platform_matched_counts[source_id] += 1
+            group_key = word_groups[group_index]["group_key"]
             
-            # 归类
-            group_key = word_groups[0]["group_key"]
-            t_lower = title.lower()
-            for g in word_groups:
-                req, norm = g["required"], g["normal"]
-                if req and not all(w.lower() in t_lower for w in req): continue
-                if norm and not any(w.lower() in t_lower for w in norm): continue
-                group_key = g["group_key"]
-                break
-            
-            # 构建数据对象
+            # 先收集匹配项，权重在全部匹配完成后批量计算
             info = title_info.get(source_id, {}).get(title, {}) if title_info else {}
-            ranks = info.get("ranks", title_data.get("ranks", [99]))
-            url = info.get("url", title_data.get("url", ""))
-            murl = info.get("mobileUrl", title_data.get("mobileUrl", ""))
-            first = info.get("first_time", "")
-            last = info.get("last_time", "")
-            
-            is_new = True if all_news_are_new else (new_titles and source_id in new_titles and title in new_titles[source_id])
-            
-            # 先存入字典，后续再根据平台限制过滤
-            word_stats[group_key]["count"] += 1
-            if source_id not in word_stats[group_key]["titles"]: word_stats[group_key]["titles"][source_id] = []
-            
-            word_stats[group_key]["titles"][source_id].append({
-                "title": title, "source_name": id_to_name.get(source_id, source_id),
-                "time_display": format_time_display(first, last), "count": info.get("count", 1),
-                "ranks": ranks, "rank_threshold": rank_threshold,
-                "url": url, "mobileUrl": murl, "is_new": is_new
-            })
+            matched.append((group_key, len(processed[source_id]), source_id, title, title_data, info))
             processed[source_id][title] = True
 
+    # 批量计算权重，构建紧凑记录：完整的展示对象留到入选后再构建
+    rank_lists = [info.get("ranks", title_data.get("ranks", [99])) for _, _, _, _, title_data, info in matched]
+    counts = [info.get("count", 1) for _, _, _, _, _, info in matched]
+    weights = batch_news_weights(*pack_rank_arrays(rank_lists), counts, rank_threshold)
+    for (group_key, seq, source_id, title, title_data, info), ranks, count, weight in zip(matched, rank_lists, counts, weights):
+        # 先按平台暂存，后续再根据平台限制过滤
+        word_stats[group_key]["count"] += 1
+        word_stats[group_key]["titles"].setdefault(source_id, []).append(
+            (-weight, min(ranks) if ranks else 99, -count, seq, source_id, title, title_data, info)
+        )
+
+    def build_item(record):
+        _, _, _, _, source_id, title, title_data, info = record
+        is_new = True if all_news_are_new else (new_titles and source_id in new_titles and title in new_titles[source_id])
+        return {
+            "title": title, "source_name": id_to_name.get(source_id, source_id),
+            "time_display": format_time_display(info.get("first_time", ""), info.get("last_time", "")), "count": info.get("count", 1),
+            "ranks": info.get("ranks", title_data.get("ranks", [99])), "rank_threshold": rank_threshold,
+            "url": info.get("url", title_data.get("url", "")), "mobileUrl": info.get("mobileUrl", title_data.get("mobileUrl", "")), "is_new": is_new
+        }
+
     # 第二步：处理关键词分组，实施【需求2】每个平台不超过3条
     final_stats = []
     for k, v in word_stats.items():
         if v["count"] == 0: continue
         
-        group_all_titles = []
+        group_records = []
         
-        # 遍历该组下的每个平台
-        for source_id, s_titles in v["titles"].items():
-            # 先按权重排序该平台的新闻
-            s_titles.sort(key=lambda x: (-calculate_news_weight(x, rank_threshold), min(x["ranks"]), -x["count"]))
-            
-            # 【需求2】截取前 3 条
-            top_titles = s_titles[:3]
-            
-            group_all_titles.extend(top_titles)
+        # 遍历该组下的每个平台：按 (权重, 最高排名, 出现次数) 取前 3 条，堆选择代替整表排序
+        for source_id, records in v["titles"].items():
+            group_records.extend(heapq.nsmallest(3, records))
             
         # 对所有平台汇总后的新闻再次按权重排序
-        group_all_titles.sort(key=lambda x: (-calculate_news_weight(x, rank_threshold), min(x["ranks"]), -x["count"]))
+        group_records.sort(key=lambda r: r[:3])
+        group_all_titles = [build_item(r) for r in group_records]
         
         final_stats.append({"word": k, "count": len(group_all_titles), "titles": group_all_titles})
 
@@ -755,93 +1875,205 @@ def prepare_report_data(stats, failed_ids, new_titles, id_to_name, mode):
         
     return {"stats": processed_stats, "new_titles": processed_new, "failed_ids": failed_ids or [], "total_new_count": sum(len(s["titles"]) for s in processed_new)}
 
-def format_title_for_platform(platform, title_data, show_source=True):
-    # 简化的格式化函数，保留完整逻辑需引用原代码
-    return title_data["title"] 
-
-def generate_html_report(
-    stats: List[Dict],
-    total_titles: int,
-    failed_ids: Optional[List] = None,
-    new_titles: Optional[Dict] = None,
-    id_to_name: Optional[Dict] = None,
-    mode: str = "daily",
-    is_daily_summary: bool = False,
-    update_info: Optional[Dict] = None,
-    raw_data: Optional[Dict] = None,
+def format_title_for_platform(
+    platform: str, title_data: Dict, show_source: bool = True
 ) -> str:
-    filename = "当日汇总.html" if is_daily_summary and mode == "daily" else f"{format_time_filename()}.html"
-    if is_daily_summary and mode == "current": filename = "当前榜单汇总.html"
-    file_path = get_output_path("html", filename)
-    report_data = prepare_report_data(stats, failed_ids, new_titles, id_to_name, mode)
-    
-    html_content = render_html_content(report_data, total_titles, is_daily_summary, mode, update_info, raw_data, id_to_name)
-    
-    with open(file_path, "w", encoding="utf-8") as f: f.write(html_content)
-    if is_daily_summary:
-        with open("index.html", "w", encoding="utf-8") as f: f.write(html_content)
-    return file_path
+    """统一的标题格式化方法"""
+    rank_display = format_rank_display(
+        title_data["ranks"], title_data["rank_threshold"], platform
+    )
 
-def render_html_content(
-    report_data: Dict,
-    total_titles: int,
-    is_daily_summary: bool = False,
-    mode: str = "daily",
-    update_info: Optional[Dict] = None,
-    raw_data: Optional[Dict] = None,
-    id_to_name: Optional[Dict] = None
-) -> str:
-    """
-    渲染 HTML，集成【需求1: 置顶新增】、【需求4: 全局搜索】、【新需求: 随机推荐沉底】
-    """
-    # 准备搜索数据
-    search_list = []
-    if raw_data:
-        for sid, tdata in raw_data.items():
-            sname = id_to_name.get(sid, sid) if id_to_name else sid
-            for t, info in tdata.items():
-                u = info.get("url") or info.get("mobileUrl") or ""
-                search_list.append({"t": t, "u": u, "s": sname})
-    search_json = json.dumps(search_list, ensure_ascii=False)
+    link_url = title_data["mobile_url"] or title_data["url"]
+
+    cleaned_title = clean_title(title_data["title"])
+
+    if platform == "feishu":
+        if link_url:
+            formatted_title = f"[{cleaned_title}]({link_url})"
+        else:
+            formatted_title = cleaned_title
+
+        title_prefix = "🆕 " if title_data.get("is_new") else ""
+
+        if show_source:
+            result = f"<font color='grey'>[{title_data['source_name']}]</font> {title_prefix}{formatted_title}"
+        else:
+            result = f"{title_prefix}{formatted_title}"
+
+        if rank_display:
+            result += f" {rank_display}"
+        if title_data["time_display"]:
+            result += f" <font color='grey'>- {title_data['time_display']}</font>"
+        if title_data["count"] > 1:
+            result += f" <font color='green'>({title_data['count']}次)</font>"
+
+        return result
+
+    elif platform == "dingtalk":
+        if link_url:
+            formatted_title = f"[{cleaned_title}]({link_url})"
+        else:
+            formatted_title = cleaned_title
+
+        title_prefix = "🆕 " if title_data.get("is_new") else ""
+
+        if show_source:
+            result = f"[{title_data['source_name']}] {title_prefix}{formatted_title}"
+        else:
+            result = f"{title_prefix}{formatted_title}"
+
+        if rank_display:
+            result += f" {rank_display}"
+        if title_data["time_display"]:
+            result += f" - {title_data['time_display']}"
+        if title_data["count"] > 1:
+            result += f" ({title_data['count']}次)"
+
+        return result
+
+    elif platform == "wework":
+        if link_url:
+            formatted_title = f"[{cleaned_title}]({link_url})"
+        else:
+            formatted_title = cleaned_title
+
+        title_prefix = "🆕 " if title_data.get("is_new") else ""
+
+        if show_source:
+            result = f"[{title_data['source_name']}] {title_prefix}{formatted_title}"
+        else:
+            result = f"{title_prefix}{formatted_title}"
+
+        if rank_display:
+            result += f" {rank_display}"
+        if title_data["time_display"]:
+            result += f" - {title_data['time_display']}"
+        if title_data["count"] > 1:
+            result += f" ({title_data['count']}次)"
+
+        return result
+
+    elif platform == "telegram":
+        if link_url:
+            formatted_title = f'<a href="{link_url}">{html_escape(cleaned_title)}</a>'
+        else:
+            formatted_title = cleaned_title
+
+        title_prefix = "🆕 " if title_data.get("is_new") else ""
+
+        if show_source:
+            result = f"[{title_data['source_name']}] {title_prefix}{formatted_title}"
+        else:
+            result = f"{title_prefix}{formatted_title}"
+
+        if rank_display:
+            result += f" {rank_display}"
+        if title_data["time_display"]:
+            result += f" <code>- {title_data['time_display']}</code>"
+        if title_data["count"] > 1:
+            result += f" <code>({title_data['count']}次)</code>"
+
+        return result
+
+    elif platform == "ntfy":
+        if link_url:
+            formatted_title = f"[{cleaned_title}]({link_url})"
+        else:
+            formatted_title = cleaned_title
+
+        title_prefix = "🆕 " if title_data.get("is_new") else ""
+
+        if show_source:
+            result = f"[{title_data['source_name']}] {title_prefix}{formatted_title}"
+        else:
+            result = f"{title_prefix}{formatted_title}"
+
+        if rank_display:
+            result += f" {rank_display}"
+        if title_data["time_display"]:
+            result += f" `- {title_data['time_display']}`"
+        if title_data["count"] > 1:
+            result += f" `({title_data['count']}次)`"
+
+        return result
+
+    elif platform == "html":
+        rank_display = format_rank_display(
+            title_data["ranks"], title_data["rank_threshold"], "html"
+        )
+
+        link_url = title_data["mobile_url"] or title_data["url"]
+
+        escaped_title = html_escape(cleaned_title)
+        escaped_source_name = html_escape(title_data["source_name"])
+
+        if link_url:
+            escaped_url = html_escape(link_url)
+            formatted_title = f'[{escaped_source_name}] <a href="{escaped_url}" target="_blank" class="news-link">{escaped_title}</a>'
+        else:
+            formatted_title = (
+                f'[{escaped_source_name}] <span class="no-link">{escaped_title}</span>'
+            )
+
+        if rank_display:
+            formatted_title += f" {rank_display}"
+        if title_data["time_display"]:
+            escaped_time = html_escape(title_data["time_display"])
+            formatted_title += f" <font color='grey'>- {escaped_time}</font>"
+        if title_data["count"] > 1:
+            formatted_title += f" <font color='green'>({title_data['count']}次)</font>"
+
+        if title_data.get("is_new"):
+            formatted_title = f"<div class='new-title'>🆕 {formatted_title}</div>"
 
-    html = f"""
+        return formatted_title
+
+    else:
+        return cleaned_title
+
+# 页面外壳与样式：模块加载时构建一次，每次渲染只填入少量动态字段
+HTML_STYLE = """
+        <style>
+            body { font-family: -apple-system, sans-serif; margin: 0; padding: 16px; background: #fafafa; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; background: white; border-radius: 12px; box-shadow: 0 2px 16px rgba(0,0,0,0.06); overflow: hidden; }
+            .header { background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%); color: white; padding: 20px; text-align: center; }
+            .content { padding: 20px; }
+            .word-group { margin-bottom: 30px; }
+            .word-header { display: flex; justify-content: space-between; border-bottom: 1px solid #eee; padding-bottom: 8px; margin-bottom: 12px; }
+            .word-name { font-weight: 600; font-size: 18px; }
+            .news-item { display: flex; gap: 10px; margin-bottom: 12px; font-size: 14px; align-items: center; }
+            .news-num { min-width: 20px; color: #999; text-align: center; }
+            .news-link { color: #2563eb; text-decoration: none; }
+            .new-section { margin-bottom: 30px; padding: 15px; background: #fffbeb; border-radius: 8px; border: 1px solid #fcd34d; }
+            .new-title { color: #92400e; font-weight: bold; margin-bottom: 10px; }
+            .search-box { margin-bottom: 20px; position: relative; }
+            #search-input { width: 100%; padding: 10px; border: 2px solid #eee; border-radius: 8px; box-sizing: border-box; font-size: 14px; }
+            #search-results { display: none; position: absolute; top: 100%; left: 0; right: 0; background: white; border: 1px solid #eee; border-radius: 8px; max-height: 300px; overflow-y: auto; z-index: 100; box-shadow: 0 4px 10px rgba(0,0,0,0.1); }
+            .search-item { padding: 10px; border-bottom: 1px solid #f5f5f5; font-size: 13px; }
+            .search-item a { color: #333; text-decoration: none; display: block; }
+            .search-source { font-size: 12px; color: #999; margin-top: 2px; }
+            
+            /* 随机推荐分隔样式 */
+            .random-divider { margin: 40px 0 20px 0; border-top: 2px dashed #eee; text-align: center; position: relative; }
+            .random-divider span { background: #fff; padding: 0 15px; color: #999; position: relative; top: -10px; font-size: 12px; }
+        </style>"""
+
+HTML_PAGE_START = """
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>TrendRadar 热点追踪</title>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
-        <style>
-            body {{ font-family: -apple-system, sans-serif; margin: 0; padding: 16px; background: #fafafa; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; background: white; border-radius: 12px; box-shadow: 0 2px 16px rgba(0,0,0,0.06); overflow: hidden; }}
-            .header {{ background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%); color: white; padding: 20px; text-align: center; }}
-            .content {{ padding: 20px; }}
-            .word-group {{ margin-bottom: 30px; }}
-            .word-header {{ display: flex; justify-content: space-between; border-bottom: 1px solid #eee; padding-bottom: 8px; margin-bottom: 12px; }}
-            .word-name {{ font-weight: 600; font-size: 18px; }}
-            .news-item {{ display: flex; gap: 10px; margin-bottom: 12px; font-size: 14px; align-items: center; }}
-            .news-num {{ min-width: 20px; color: #999; text-align: center; }}
-            .news-link {{ color: #2563eb; text-decoration: none; }}
-            .new-section {{ margin-bottom: 30px; padding: 15px; background: #fffbeb; border-radius: 8px; border: 1px solid #fcd34d; }}
-            .new-title {{ color: #92400e; font-weight: bold; margin-bottom: 10px; }}
-            .search-box {{ margin-bottom: 20px; position: relative; }}
-            #search-input {{ width: 100%; padding: 10px; border: 2px solid #eee; border-radius: 8px; box-sizing: border-box; font-size: 14px; }}
-            #search-results {{ display: none; position: absolute; top: 100%; left: 0; right: 0; background: white; border: 1px solid #eee; border-radius: 8px; max-height: 300px; overflow-y: auto; z-index: 100; box-shadow: 0 4px 10px rgba(0,0,0,0.1); }}
-            .search-item {{ padding: 10px; border-bottom: 1px solid #f5f5f5; font-size: 13px; }}
-            .search-item a {{ color: #333; text-decoration: none; display: block; }}
-            .search-source {{ font-size: 12px; color: #999; margin-top: 2px; }}
-            
-            /* 随机推荐分隔样式 */
-            .random-divider {{ margin: 40px 0 20px 0; border-top: 2px dashed #eee; text-align: center; position: relative; }}
-            .random-divider span {{ background: #fff; padding: 0 15px; color: #999; position: relative; top: -10px; font-size: 12px; }}
-        </style>
-    </head>
+        <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>""" + HTML_STYLE + """
+    </head>"""
+
+HTML_BODY_START = """
     <body>
         <div class="container">
             <div class="header">
                 <h2>TrendRadar 热点分析</h2>
-                <div style="font-size:12px; opacity:0.8;">{get_beijing_time().strftime('%Y-%m-%d %H:%M')} · {total_titles} 条资讯</div>
+                <div style="font-size:12px; opacity:0.8;">{time} · {total} 条资讯</div>
             </div>
             <div class="content">
                 <div class="search-box">
@@ -851,121 +2083,1245 @@ def render_html_content(
 
     """
 
-    # 1. 新增热点 (置顶)
-    if report_data["new_titles"]:
-        html += f"""
+HTML_NEW_SECTION_START = """
                 <div class="new-section">
-                    <div class="new-title">🆕 本次新增热点 ({report_data['total_new_count']} 条)</div>
+                    <div class="new-title">🆕 本次新增热点 ({count} 条)</div>
         """
-        for source in report_data["new_titles"]:
-            html += f"""<div style="margin-top:8px; font-weight:600; font-size:13px; color:#b45309;">{source['source_name']}</div>"""
-            for idx, item in enumerate(source["titles"], 1):
-                u = item.get('url') or item.get('mobile_url')
-                link = f"<a href='{u}' target='_blank' style='color:#333;'>{item['title']}</a>" if u else item['title']
-                html += f"""<div style="font-size:13px; margin-top:4px; padding-left:10px;">{idx}. {link}</div>"""
-        html += "</div>"
+HTML_NEW_SOURCE = """<div style="margin-top:8px; font-weight:600; font-size:13px; color:#b45309;">{name}</div>"""
+HTML_NEW_ITEM = """<div style="font-size:13px; margin-top:4px; padding-left:10px;">{idx}. {link}</div>"""
 
-    # --- 分离【普通热点】和【随机推荐】 ---
-    normal_stats = []
-    random_stats = []
-    
-    if report_data["stats"]:
-        for stat in report_data["stats"]:
-            if "随机" in stat["word"]:
-                random_stats.append(stat)
-            else:
-                normal_stats.append(stat)
-
-    # 2. 渲染普通热点
-    for stat in normal_stats:
-        word = html_escape(stat["word"])
-        html += f"""
+HTML_WORD_GROUP_START = """
             <div class="word-group">
                 <div class="word-header">
-                    <div class="word-name">{word}</div>
-                    <div style="font-size:12px; color:#666;">{stat['count']} 条</div>
+                    <div class="word-name"{style}>{word}</div>
+                    <div style="font-size:12px; color:#666;">{count} 条</div>
                 </div>
         """
-        for idx, item in enumerate(stat["titles"], 1):
-            u = item.get('url') or item.get('mobile_url')
-            title_html = f"<a href='{u}' target='_blank' class='news-link'>{item['title']}</a>" if u else item['title']
-            html += f"""
+HTML_NEWS_ITEM = """
                 <div class="news-item">
                     <div class="news-num">{idx}</div>
                     <div style="flex:1;">
-                        <span style="color:#999; font-size:12px;">[{item['source_name']}]</span>
+                        <span style="color:#999; font-size:12px;">[{source}]</span>
                         {title_html}
                     </div>
                 </div>
             """
-        html += "</div>"
-        
-    # 3. 渲染随机推荐 (沉底)
-    if random_stats:
-        html += """
+HTML_RANDOM_DIVIDER = """
             <div class="random-divider">
                 <span>以下为随机推荐内容</span>
             </div>
         """
-        for stat in random_stats:
-            word = html_escape(stat["word"])
-            html += f"""
-                <div class="word-group">
-                    <div class="word-header">
-                        <div class="word-name" style="color:#059669;">{word}</div>
-                        <div style="font-size:12px; color:#666;">{stat['count']} 条</div>
-                    </div>
-            """
-            for idx, item in enumerate(stat["titles"], 1):
-                u = item.get('url') or item.get('mobile_url')
-                title_html = f"<a href='{u}' target='_blank' class='news-link'>{item['title']}</a>" if u else item['title']
-                html += f"""
-                    <div class="news-item">
-                        <div class="news-num">{idx}</div>
-                        <div style="flex:1;">
-                            <span style="color:#999; font-size:12px;">[{item['source_name']}]</span>
-                            {title_html}
-                        </div>
-                    </div>
-                """
-            html += "</div>"
-
-    if report_data["failed_ids"]:
-         html += f"<div style='color:red; font-size:12px; margin-top:20px; padding:10px; background:#fff1f2; border-radius:8px;'>⚠️ 获取失败: {', '.join(report_data['failed_ids'])}</div>"
+HTML_FAILED = "<div style='color:red; font-size:12px; margin-top:20px; padding:10px; background:#fff1f2; border-radius:8px;'>⚠️ 获取失败: {ids}</div>"
 
-    html += f"""
+HTML_PAGE_FOOTER = """
             </div>
             <div style="text-align:center; padding:20px; color:#999; font-size:12px; background:#f8f9fa;">
-                Powered by TrendRadar v{VERSION}
+                Powered by TrendRadar v""" + VERSION + """
             </div>
         </div>
         
         <script>
-            const allData = {search_json};
+            const SEARCH_INDEX_SRC = """
+
+HTML_PAGE_END = """;
             const input = document.getElementById('search-input');
             const results = document.getElementById('search-results');
-            input.addEventListener('input', (e) => {{
-                const val = e.target.value.trim().toLowerCase();
-                if (!val) {{ results.style.display = 'none'; return; }}
-                const filtered = allData.filter(i => i.t.toLowerCase().includes(val)).slice(0, 50);
-                if (filtered.length > 0) {{
+            // 搜索索引按天单独存放（gzip + base64），首次使用搜索框时才加载
+            // 不支持 DecompressionStream 的浏览器改为加载同目录下未压缩的 search-index.plain.js
+            const CAN_GUNZIP = typeof DecompressionStream === 'function';
+            let allData = null, grams = {}, indexLoading = null;
+            const decoded = {};
+            // 取二元组的倒排列表（差分编码，用到时解码一次）；未收录的二元组返回 null
+            function postings(gram) {
+                if (!Object.prototype.hasOwnProperty.call(grams, gram)) return null;
+                if (!(gram in decoded)) {
+                    const deltas = grams[gram];
+                    const docs = new Array(deltas.length);
+                    let doc = 0;
+                    for (let i = 0; i < deltas.length; i++) { doc += deltas[i]; docs[i] = doc; }
+                    decoded[gram] = docs;
+                }
+                return decoded[gram];
+            }
+            // 查询词中已收录的二元组倒排列表求交集，再逐条确认包含关系；单字或没有可用二元组时直接扫描
+            function searchTitles(val, limit) {
+                const lists = [];
+                for (let i = 0; i < val.length - 1; i++) {
+                    const list = postings(val.slice(i, i + 2));
+                    if (list) lists.push(list);
+                }
+                if (!lists.length) {
+                    const out = [];
+                    for (const item of allData) { if (item.l.includes(val) && out.push(item) >= limit) break; }
+                    return out;
+                }
+                lists.sort((a, b) => a.length - b.length);
+                const out = [];
+                for (const doc of lists[0]) {
+                    if (lists.every(list => binarySearch(list, doc)) && allData[doc].l.includes(val) && out.push(allData[doc]) >= limit) break;
+                }
+                return out;
+            }
+            function binarySearch(list, doc) {
+                let lo = 0, hi = list.length - 1;
+                while (lo <= hi) {
+                    const mid = (lo + hi) >> 1;
+                    if (list[mid] === doc) return true;
+                    if (list[mid] < doc) lo = mid + 1; else hi = mid - 1;
+                }
+                return false;
+            }
+            function loadSearchIndex() {
+                if (!SEARCH_INDEX_SRC) return Promise.resolve([]);
+                if (!indexLoading) {
+                    indexLoading = new Promise((resolve, reject) => {
+                        const s = document.createElement('script');
+                        s.src = CAN_GUNZIP ? SEARCH_INDEX_SRC : SEARCH_INDEX_SRC.replace('search-index.js', 'search-index.plain.js');
+                        s.onload = resolve; s.onerror = reject;
+                        document.head.appendChild(s);
+                    }).then(() => {
+                        if (!CAN_GUNZIP) return window.TRENDRADAR_SEARCH_INDEX_PLAIN;
+                        const bytes = Uint8Array.from(atob(window.TRENDRADAR_SEARCH_INDEX), c => c.charCodeAt(0));
+                        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+                        return new Response(stream).json();
+                    }).then(index => {
+                        allData = index.d.map(i => ({ t: i[0], u: i[1], s: index.s[i[2]], l: i[0].toLowerCase() }));
+                        grams = index.g || {};
+                        return allData;
+                    }).catch(err => {
+                        // 加载失败不缓存，下次输入时重新加载
+                        indexLoading = null;
+                        throw err;
+                    });
+                }
+                return indexLoading;
+            }
+            function renderSearch() {
+                const val = input.value.trim().toLowerCase();
+                if (!val) { results.style.display = 'none'; return; }
+                if (!allData) {
+                    results.innerHTML = '<div style="padding:10px; text-align:center; color:#999;">加载中...</div>';
+                    results.style.display = 'block';
+                    loadSearchIndex().then(renderSearch, () => { results.innerHTML = '<div style="padding:10px; text-align:center; color:#999;">搜索索引加载失败</div>'; });
+                    return;
+                }
+                const filtered = searchTitles(val, 50);
+                if (filtered.length > 0) {
                     results.innerHTML = filtered.map(i => `
                         <div class="search-item">
-                            <a href="${{i.u}}" target="_blank">${{i.t}}</a>
-                            <div class="search-source">${{i.s}}</div>
+                            <a href="${i.u}" target="_blank">${i.t}</a>
+                            <div class="search-source">${i.s}</div>
                         </div>
                     `).join('');
-                }} else {{ results.innerHTML = '<div style="padding:10px; text-align:center; color:#999;">无结果</div>'; }}
+                } else { results.innerHTML = '<div style="padding:10px; text-align:center; color:#999;">无结果</div>'; }
                 results.style.display = 'block';
-            }});
-            document.addEventListener('click', (e) => {{
+            }
+            input.addEventListener('focus', () => { loadSearchIndex().catch(() => {}); }, { once: true });
+            input.addEventListener('input', renderSearch);
+            document.addEventListener('click', (e) => {
                 if (!e.target.closest('.search-box')) results.style.display = 'none';
-            }});
+            });
         </script>
     </body>
     </html>
     """
-    return html
+
+SEARCH_INDEX_FILE = "search-index.js"
+SEARCH_INDEX_PLAIN_FILE = "search-index.plain.js"
+
+def build_bigram_index(titles: List[str], min_df: int = 2) -> Dict[str, List[int]]:
+    """
+    字符二元组倒排索引（中文按字、英文按字母，统一小写）：{二元组: 标题序号的差分编码}
+    只出现在一个标题里的二元组占大半键数却很少被查询，默认不收录；页面对未收录的二元组不做过滤，最终仍逐条确认包含关系
+    """
+    postings: Dict[str, List[int]] = {}
+    for doc, title in enumerate(titles):
+        t = title.lower()
+        for gram in {t[i:i + 2] for i in range(len(t) - 1)}:
+            postings.setdefault(gram, []).append(doc)
+    index = {}
+    for gram, docs in postings.items():
+        if len(docs) < min_df: continue
+        # 差分编码：序号递增，存相邻差值更短、压缩率更高
+        index[gram] = [docs[0]] + [docs[i] - docs[i - 1] for i in range(1, len(docs))]
+    return index
+
+def write_search_index(raw_data: Dict, id_to_name: Optional[Dict] = None) -> str:
+    """
+    写入当天的搜索索引 output/<日期>/html/search-index.js（gzip + base64），返回带内容哈希的引用路径（相对 html 目录）
+    同时写入未压缩的 search-index.plain.js，供不支持 DecompressionStream 的浏览器使用
+    内容不变时不重写；页面通过 ?v=<哈希> 区分版本，早先的页面也会加载到当天最新（更完整）的索引
+    """
+    sources, source_index, entries = [], {}, []
+    for sid, tdata in raw_data.items():
+        sname = id_to_name.get(sid, sid) if id_to_name else sid
+        if sname not in source_index:
+            source_index[sname] = len(sources)
+            sources.append(sname)
+        for t, info in tdata.items():
+            entries.append([t, info.get("url") or info.get("mobileUrl") or "", source_index[sname]])
+    payload = json.dumps({"s": sources, "d": entries, "g": build_bigram_index([e[0] for e in entries])}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha1(payload).hexdigest()[:12]
+
+    header = f"/* {digest} */\n"
+    for name in (SEARCH_INDEX_FILE, SEARCH_INDEX_PLAIN_FILE):
+        file_path = Path(get_output_path("html", name))
+        if file_path.exists():
+            with open(file_path, "r", encoding="utf-8") as f:
+                if f.readline() == header: continue
+        if name == SEARCH_INDEX_FILE:
+            encoded = base64.b64encode(gzip.compress(payload, mtime=0)).decode("ascii")
+            body = f'window.TRENDRADAR_SEARCH_INDEX = "{encoded}";\n'
+        else:
+            # 转义为 ASCII，避免旧浏览器把 U+2028/U+2029 当作换行
+            body = f"window.TRENDRADAR_SEARCH_INDEX_PLAIN = {json.dumps(json.loads(payload), separators=(',', ':'))};\n"
+        tmp = file_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp, file_path)
+    return f"{SEARCH_INDEX_FILE}?v={digest}"
+
+def generate_html_report(
+    stats: List[Dict],
+    total_titles: int,
+    failed_ids: Optional[List] = None,
+    new_titles: Optional[Dict] = None,
+    id_to_name: Optional[Dict] = None,
+    mode: str = "daily",
+    is_daily_summary: bool = False,
+    update_info: Optional[Dict] = None,
+    raw_data: Optional[Dict] = None,
+    search_src: Optional[str] = None,
+) -> str:
+    """生成 HTML 报告；search_src 为当天搜索索引的引用（未提供时由 raw_data 生成）"""
+    filename = "当日汇总.html" if is_daily_summary and mode == "daily" else f"{format_time_filename()}.html"
+    if is_daily_summary and mode == "current": filename = "当前榜单汇总.html"
+    file_path = get_output_path("html", filename)
+    report_data = prepare_report_data(stats, failed_ids, new_titles, id_to_name, mode)
+    if search_src is None and raw_data:
+        search_src = write_search_index(raw_data, id_to_name)
+    
+    with open(file_path, "w", encoding="utf-8") as f:
+        write_html_content(f, report_data, total_titles, is_daily_summary, mode, update_info, search_src)
+    if is_daily_summary:
+        # 根目录的 index.html 与报告内容相同，只是索引路径要相对项目根目录
+        with open(file_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        if search_src:
+            root_src = f"output/{format_date_folder()}/html/{search_src}"
+            content = content.replace(f"const SEARCH_INDEX_SRC = {json.dumps(search_src)};", f"const SEARCH_INDEX_SRC = {json.dumps(root_src, ensure_ascii=False)};", 1)
+        with open("index.html", "w", encoding="utf-8") as f: f.write(content)
+    return file_path
+
+def _write_news_items(out, titles: List[Dict]):
+    for idx, item in enumerate(titles, 1):
+        u = item.get('url') or item.get('mobile_url')
+        title_html = f"<a href='{u}' target='_blank' class='news-link'>{item['title']}</a>" if u else item['title']
+        out.write(HTML_NEWS_ITEM.format(idx=idx, source=item['source_name'], title_html=title_html))
+
+def write_html_content(
+    out,
+    report_data: Dict,
+    total_titles: int,
+    is_daily_summary: bool = False,
+    mode: str = "daily",
+    update_info: Optional[Dict] = None,
+    search_src: Optional[str] = None
+):
+    """
+    流式渲染 HTML 到文件对象，集成【需求1: 置顶新增】、【需求4: 全局搜索】、【新需求: 随机推荐沉底】
+    """
+    out.write(HTML_PAGE_START)
+    out.write(HTML_BODY_START.format(time=get_beijing_time().strftime('%Y-%m-%d %H:%M'), total=total_titles))
+
+    # 1. 新增热点 (置顶)
+    if report_data["new_titles"]:
+        out.write(HTML_NEW_SECTION_START.format(count=report_data['total_new_count']))
+        for source in report_data["new_titles"]:
+            out.write(HTML_NEW_SOURCE.format(name=source['source_name']))
+            for idx, item in enumerate(source["titles"], 1):
+                u = item.get('url') or item.get('mobile_url')
+                link = f"<a href='{u}' target='_blank' style='color:#333;'>{item['title']}</a>" if u else item['title']
+                out.write(HTML_NEW_ITEM.format(idx=idx, link=link))
+        out.write("</div>")
+
+    # --- 分离【普通热点】和【随机推荐】 ---
+    normal_stats = [stat for stat in report_data["stats"] if "随机" not in stat["word"]]
+    random_stats = [stat for stat in report_data["stats"] if "随机" in stat["word"]]
+
+    # 2. 渲染普通热点
+    for stat in normal_stats:
+        out.write(HTML_WORD_GROUP_START.format(style="", word=html_escape(stat["word"]), count=stat['count']))
+        _write_news_items(out, stat["titles"])
+        out.write("</div>")
+        
+    # 3. 渲染随机推荐 (沉底)
+    if random_stats:
+        out.write(HTML_RANDOM_DIVIDER)
+        for stat in random_stats:
+            out.write(HTML_WORD_GROUP_START.format(style=' style="color:#059669;"', word=html_escape(stat["word"]), count=stat['count']))
+            _write_news_items(out, stat["titles"])
+            out.write("</div>")
+
+    if report_data["failed_ids"]:
+        out.write(HTML_FAILED.format(ids=', '.join(report_data['failed_ids'])))
+
+    out.write(HTML_PAGE_FOOTER)
+    out.write(json.dumps(search_src or "", ensure_ascii=False))
+    out.write(HTML_PAGE_END)
+
+def render_html_content(
+    report_data: Dict,
+    total_titles: int,
+    is_daily_summary: bool = False,
+    mode: str = "daily",
+    update_info: Optional[Dict] = None,
+    search_src: Optional[str] = None
+) -> str:
+    """渲染 HTML 为字符串（通知等需要完整内容时使用）"""
+    buf = io.StringIO()
+    write_html_content(buf, report_data, total_titles, is_daily_summary, mode, update_info, search_src)
+    return buf.getvalue()
+
+MARKDOWN_BATCH_FORMATS = ("wework", "ntfy", "feishu", "dingtalk")
+
+
+class BatchBuilder:
+    """按字节预算拼装消息批次：每段文本只编码一次，用累计字节数判断是否超限"""
+
+    def __init__(self, header: str, footer: str, max_bytes: int):
+        self.header = header
+        self.footer = footer
+        self.header_bytes = len(header.encode("utf-8"))
+        # 批次正文与尾部之和必须严格小于 max_bytes
+        self.budget = max_bytes - len(footer.encode("utf-8"))
+        self.batches: List[str] = []
+        self.parts = [header]
+        self.size = self.header_bytes
+        self.has_content = False
+
+    def fits(self, nbytes: int) -> bool:
+        return self.size + nbytes < self.budget
+
+    def add(self, text: str, nbytes: int):
+        self.parts.append(text)
+        self.size += nbytes
+        self.has_content = True
+
+    def add_if_fits(self, text: str, nbytes: int):
+        """可选的分隔内容：放不下时直接省略，不为它新开批次"""
+        if self.fits(nbytes):
+            self.parts.append(text)
+            self.size += nbytes
+
+    def flush(self):
+        if self.has_content:
+            self.batches.append("".join(self.parts) + self.footer)
+
+    def restart(self, *pieces: Tuple[str, int]):
+        """结束当前批次，以 (文本, 字节数) 片段开启新批次（片段作为整体，不再拆分）"""
+        self.flush()
+        self.parts = [self.header] + [text for text, _ in pieces]
+        self.size = self.header_bytes + sum(n for _, n in pieces)
+        self.has_content = True
+
+    def append(self, text: str, nbytes: int, *restart_prefix: Tuple[str, int]):
+        """放得下就追加，否则以 restart_prefix + 本段开启新批次"""
+        if self.fits(nbytes):
+            self.add(text, nbytes)
+        else:
+            self.restart(*restart_prefix, (text, nbytes))
+
+    def finish(self) -> List[str]:
+        self.flush()
+        return self.batches
+
+
+def _sized(text: str) -> Tuple[str, int]:
+    return text, len(text.encode("utf-8"))
+
+
+def split_content_into_batches(
+    report_data: Dict,
+    format_type: str,
+    update_info: Optional[Dict] = None,
+    max_bytes: int = None,
+    mode: str = "daily",
+) -> List[str]:
+    """分批处理消息内容，确保词组标题+至少第一条新闻的完整性
+
+    每条标题按目标格式只渲染、编码一次，批次大小用累计字节数维护，整体单趟线性完成。
+    除单个 标题头+一条新闻 本身就超过预算的情况外（此时该批次只含这一条新闻），每个批次（含尾部）都严格小于 max_bytes。
+    """
+    if max_bytes is None:
+        if format_type == "dingtalk":
+            max_bytes = CONFIG.get("DINGTALK_BATCH_SIZE", 20000)
+        elif format_type == "feishu":
+            max_bytes = CONFIG.get("FEISHU_BATCH_SIZE", 29000)
+        elif format_type == "ntfy":
+            max_bytes = 3800
+        else:
+            max_bytes = CONFIG.get("MESSAGE_BATCH_SIZE", 4000)
+
+    known = format_type == "telegram" or format_type in MARKDOWN_BATCH_FORMATS
+    bold = (lambda s: f"**{s}**") if format_type in MARKDOWN_BATCH_FORMATS else (lambda s: s)
+
+    total_titles = sum(
+        len(stat["titles"]) for stat in report_data["stats"] if stat["count"] > 0
+    )
+    now_text = get_beijing_time().strftime("%Y-%m-%d %H:%M:%S")
+
+    base_header = ""
+    if format_type == "wework":
+        base_header = f"**总新闻数：** {total_titles}\n\n\n\n"
+    elif format_type == "telegram":
+        base_header = f"总新闻数： {total_titles}\n\n"
+    elif format_type == "ntfy":
+        base_header = f"**总新闻数：** {total_titles}\n\n"
+    elif format_type == "dingtalk":
+        base_header = (
+            f"**总新闻数：** {total_titles}\n\n**时间：** {now_text}\n\n**类型：** 热点分析报告\n\n---\n\n"
+        )
+
+    base_footer = ""
+    if format_type == "feishu":
+        base_footer = f"\n\n<font color='grey'>更新时间：{now_text}</font>"
+        if update_info:
+            base_footer += f"\n<font color='grey'>TrendRadar 发现新版本 {update_info['remote_version']}，当前 {update_info['current_version']}</font>"
+    elif format_type == "telegram":
+        base_footer = f"\n\n更新时间：{now_text}"
+        if update_info:
+            base_footer += f"\nTrendRadar 发现新版本 {update_info['remote_version']}，当前 {update_info['current_version']}"
+    elif known:
+        base_footer = ("\n\n\n" if format_type == "wework" else "\n\n") + f"> 更新时间：{now_text}"
+        if update_info:
+            base_footer += f"\n> TrendRadar 发现新版本 **{update_info['remote_version']}**，当前 **{update_info['current_version']}**"
+
+    # 词组之间、以及新增/失败段落之前的分隔符
+    separator = ""
+    if format_type == "wework":
+        separator = "\n\n\n\n"
+    elif format_type in ("telegram", "ntfy"):
+        separator = "\n\n"
+    elif format_type == "feishu":
+        separator = f"\n{CONFIG['FEISHU_MESSAGE_SEPARATOR']}\n\n"
+    elif format_type == "dingtalk":
+        separator = "\n---\n\n"
+
+    if (
+        not report_data["stats"]
+        and not report_data["new_titles"]
+        and not report_data["failed_ids"]
+    ):
+        if mode == "incremental":
+            mode_text = "增量模式下暂无新增匹配的热点词汇"
+        elif mode == "current":
+            mode_text = "当前榜单模式下暂无匹配的热点词汇"
+        else:
+            mode_text = "暂无匹配的热点词汇"
+        return [base_header + f"📭 {mode_text}\n\n" + base_footer]
+
+    def title_line(no: int, title_data: Dict, show_source: bool, tail: str = "") -> Tuple[str, int]:
+        if known:
+            formatted_title = format_title_for_platform(format_type, title_data, show_source=show_source)
+        else:
+            formatted_title = title_data["title"]
+        return _sized(f"  {no}. {formatted_title}\n{tail}")
+
+    builder = BatchBuilder(base_header, base_footer, max_bytes)
+
+    # 处理热点词汇统计
+    if report_data["stats"]:
+        stats_header = _sized(f"📊 {bold('热点词汇统计')}\n\n" if known else "")
+        builder.append(*stats_header)
+        sep = _sized(separator)
+        total_count = len(report_data["stats"])
+
+        for i, stat in enumerate(report_data["stats"]):
+            word = stat["word"]
+            count = stat["count"]
+            icon = "🔥" if count >= 10 else "📈" if count >= 5 else "📌"
+            sequence_display = f"[{i + 1}/{total_count}]"
+
+            word_header = ""
+            if format_type == "feishu":
+                count_display = (
+                    f"<font color='red'>{count}</font>" if count >= 10
+                    else f"<font color='orange'>{count}</font>" if count >= 5
+                    else count
+                )
+                word_header = f"{icon} <font color='grey'>{sequence_display}</font> **{word}** : {count_display} 条\n\n"
+            elif known:
+                count_display = bold(count) if count >= 5 else count
+                word_header = f"{icon} {sequence_display} {bold(word)} : {count_display} 条\n\n"
+            word_header = _sized(word_header)
+
+            titles = stat["titles"]
+            last = len(titles) - 1
+            lines = [title_line(j + 1, t, True, "\n" if j < last else "") for j, t in enumerate(titles)]
+
+            # 原子性：词组标题+第一条新闻必须放在同一批次
+            first = lines[0] if lines else ("", 0)
+            builder.append(word_header[0] + first[0], word_header[1] + first[1], stats_header)
+            for line in lines[1:]:
+                builder.append(*line, stats_header, word_header)
+
+            if i < total_count - 1:
+                builder.add_if_fits(*sep)
+
+    # 处理新增新闻（同样确保来源标题+第一条新闻的原子性）
+    if report_data["new_titles"]:
+        label = f"🆕 {bold('本次新增热点新闻')} (共 {report_data['total_new_count']} 条)\n\n"
+        new_header = _sized(separator + label if known else "")
+        builder.append(*new_header)
+        newline = _sized("\n")
+
+        for source_data in report_data["new_titles"]:
+            titles = source_data["titles"]
+            source_header = _sized(
+                f"{bold(source_data['source_name'])} ({len(titles)} 条):\n\n" if known else ""
+            )
+            lines = [title_line(j + 1, dict(t, is_new=False), False) for j, t in enumerate(titles)]
+
+            first = lines[0] if lines else ("", 0)
+            builder.append(source_header[0] + first[0], source_header[1] + first[1], new_header)
+            for line in lines[1:]:
+                builder.append(*line, new_header, source_header)
+            builder.add_if_fits(*newline)
+
+    if report_data["failed_ids"]:
+        failed_header = _sized(separator + f"⚠️ {bold('数据获取失败的平台：')}\n\n" if known else "")
+        builder.append(*failed_header)
+        for id_value in report_data["failed_ids"]:
+            if format_type == "feishu":
+                failed_line = f"  • <font color='red'>{id_value}</font>\n"
+            elif format_type == "dingtalk":
+                failed_line = f"  • **{id_value}**\n"
+            else:
+                failed_line = f"  • {id_value}\n"
+            builder.append(*_sized(failed_line), failed_header)
+
+    return builder.finish()
+
+
+
+# === 推送发件箱 ===
+class NotificationRetryPolicy(RetryPolicy):
+    """推送重试：接口返回的业务错误（多为限流）同样可重试"""
+
+    RETRYABLE_KINDS = RetryPolicy.RETRYABLE_KINDS | {"api_error"}
+
+
+NOTIFICATION_CHANNEL_LABELS = {"feishu": "飞书", "dingtalk": "钉钉", "wework": "企业微信", "telegram": "Telegram", "ntfy": "ntfy"}
+# 消息中的生成时间不参与幂等键计算，同一次运行重跑时内容相同即视为同一批次
+NOTIFICATION_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+
+def check_notification_response(channel: str, response: requests.Response) -> Optional[str]:
+    """检查推送接口的业务返回码，成功返回 None，否则返回错误信息"""
+    if channel == "ntfy":
+        return None
+    result = response.json()
+    if channel == "feishu":
+        if result.get("StatusCode") == 0 or result.get("code") == 0:
+            return None
+        return result.get("msg") or result.get("StatusMessage", "未知错误")
+    if channel == "telegram":
+        return None if result.get("ok") else result.get("description", "未知错误")
+    return None if result.get("errcode") == 0 else result.get("errmsg", "未知错误")
+
+
+class NotificationOutbox(PushRecordManager):
+    """持久化推送发件箱：渲染好的批次先落盘再发送，失败的批次由 drain 按退避重试，同一次运行重跑时跳过已送达的批次
+
+    与推送记录共用 output/.push_records 目录，按天一个 outbox_YYYYMMDD.json，随推送记录一起按保留天数清理。
+    只保存消息内容，webhook 地址、令牌等在发送时由 register_endpoint 提供，不落盘。
+    批次状态：pending 待发送 / delivered 已送达 / failed 不可重试的错误或本轮重试用尽（下次运行仍会补发）
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, proxy_url: Optional[str] = None, run_id: Optional[str] = None):
+        super().__init__()
+        self.path = self.record_dir / f"outbox_{get_beijing_time().strftime('%Y%m%d')}.json"
+        self.session = session
+        self.proxies = {"http": proxy_url, "https": proxy_url} if proxy_url else None
+        self.retry_policy = NotificationRetryPolicy(**CONFIG["OUTBOX_RETRY"])
+        # 运行标识（快照名）参与幂等键：只有同一次运行的重跑才会跳过已送达的批次
+        self.run_id = run_id or format_time_filename()
+        # 渠道 -> (url, headers, 追加到 JSON 消息体的字段)
+        self.endpoints: Dict[str, Tuple[str, Dict, Dict]] = {}
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not CONFIG["OUTBOX_ENABLED"] or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"读取推送发件箱失败，将重新记录: {e}")
+            return {}
+
+    def _save(self):
+        if not CONFIG["OUTBOX_ENABLED"]:
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"保存推送发件箱失败: {e}")
+
+    def register_endpoint(self, channel: str, url: str, headers: Dict, extra_json: Optional[Dict] = None):
+        self.endpoints[channel] = (url, headers, extra_json or {})
+
+    @staticmethod
+    def idempotency_key(run_id: str, channel: str, report_type: str, payload: Dict) -> str:
+        content = NOTIFICATION_TIMESTAMP_RE.sub("", json.dumps(payload, ensure_ascii=False, sort_keys=True))
+        return hashlib.sha256(f"{run_id}\x00{report_type}\x00{channel}\x00{content}".encode("utf-8")).hexdigest()[:24]
+
+    def enqueue(self, channel: str, report_type: str, payloads: List[Dict], batch_numbers: Optional[List[int]] = None) -> List[str]:
+        """批次入队，返回按发送顺序排列的幂等键；已存在的批次保留原有状态
+
+        batch_numbers 为各批次展示给用户的编号（发送顺序与编号不一致时传入，如 ntfy 倒序推送）
+        """
+        keys = []
+        with self._lock:
+            for i, payload in enumerate(payloads):
+                key = self.idempotency_key(self.run_id, channel, report_type, payload)
+                if key not in self.entries:
+                    batch_no = batch_numbers[i] if batch_numbers else i + 1
+                    self.entries[key] = {
+                        "run": self.run_id, "channel": channel, "report_type": report_type, "batch": f"{batch_no}/{len(payloads)}",
+                        "payload": payload, "status": "pending", "attempts": 0, "last_error": "",
+                        "seq": len(self.entries), "created": get_beijing_time().strftime("%Y-%m-%d %H:%M:%S"),
+                    }
+                keys.append(key)
+            self._save()
+        return keys
+
+    def _post(self, entry: Dict) -> Optional[FetchError]:
+        channel = entry["channel"]
+        if channel not in self.endpoints:
+            return FetchError("client_error", "渠道未配置")
+        url, headers, extra_json = self.endpoints[channel]
+        payload = entry["payload"]
+        try:
+            if "json" in payload:
+                response = (self.session or requests).post(
+                    url, headers=headers, json={**payload["json"], **extra_json}, proxies=self.proxies, timeout=30
+                )
+            else:
+                response = (self.session or requests).post(
+                    url, headers={**headers, **payload.get("headers", {})}, data=payload["data"].encode("utf-8"),
+                    proxies=self.proxies, timeout=30
+                )
+            response.raise_for_status()
+            error = check_notification_response(channel, response)
+            return FetchError("api_error", error) if error else None
+        except Exception as e:
+            return self.retry_policy.classify(e)
+
+    def _attempt(self, entry: Dict) -> Optional[FetchError]:
+        """发送一次并记录结果：可重试的错误保持 pending，其余错误标记为 failed"""
+        error = self._post(entry)
+        with self._lock:
+            entry["attempts"] += 1
+            if error is None:
+                entry["status"] = "delivered"
+                entry["delivered"] = get_beijing_time().strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                entry["last_error"] = str(error)
+                entry["status"] = "pending" if error.kind in self.retry_policy.RETRYABLE_KINDS else "failed"
+            self._save()
+        return error
+
+    def deliver(self, keys: List[str], interval: float, retry: bool = False) -> bool:
+        """按顺序发送批次：已送达的跳过，某个批次失败即停止该渠道（剩余批次保持待发送）
+
+        retry=False（本次推送）每个批次只发一次，失败的交给 drain；
+        retry=True（drain 补发）可重试的错误按退避重试，用尽 max_retries 后标记为 failed
+        """
+        sent = False
+        for key in keys:
+            entry = self.entries[key]
+            label = f"{NOTIFICATION_CHANNEL_LABELS.get(entry['channel'], entry['channel'])}第 {entry['batch']} 批次 [{entry['report_type']}]"
+            if entry["status"] == "delivered":
+                print(f"{label} 已送达，跳过")
+                continue
+            if sent and interval:
+                time.sleep(interval)
+
+            attempt = 0
+            while True:
+                attempt += 1
+                error = self._attempt(entry)
+                if error is None:
+                    print(f"{label} 发送成功")
+                    sent = True
+                    break
+                delay = self.retry_policy.next_delay(attempt, error) if retry else None
+                if delay is None:
+                    if retry and entry["status"] == "pending":
+                        with self._lock:
+                            entry["status"] = "failed"
+                            self._save()
+                    print(f"{label} 发送失败（第 {entry['attempts']} 次）：{error}")
+                    return False
+                print(f"{label} 发送失败（第 {entry['attempts']} 次）：{error}，{delay:.1f} 秒后重试")
+                time.sleep(delay)
+        return True
+
+    def pending_by_channel(self) -> Dict[str, List[str]]:
+        with self._lock:
+            pending = sorted((e["seq"], key, e["channel"]) for key, e in self.entries.items() if e["status"] != "delivered")
+        by_channel: Dict[str, List[str]] = {}
+        for _, key, channel in pending:
+            by_channel.setdefault(channel, []).append(key)
+        return by_channel
+
+    def drain(self) -> Dict[str, Dict]:
+        """补发所有未送达的批次并按退避重试（各渠道并发，渠道内按原顺序）
+
+        failed 的批次同样补发，配置错误修正后即可送达；渠道内某批次仍失败时停止，后面的批次不会越过它先发
+        """
+        by_channel = {ch: keys for ch, keys in self.pending_by_channel().items() if ch in self.endpoints}
+        if not by_channel:
+            return {}
+        window = CONFIG["PUSH_WINDOW"]
+        if window["ENABLED"] and not self.is_in_time_range(window["TIME_RANGE"]["START"], window["TIME_RANGE"]["END"]):
+            return {}
+        print(f"推送发件箱：补发 {sum(len(k) for k in by_channel.values())} 个未送达批次")
+        return dispatch_notifications([
+            (ch, lambda keys=keys, ch=ch: self.deliver(keys, notification_interval(ch), retry=True))
+            for ch, keys in by_channel.items()
+        ])
+
+    def drain_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.drain, name="outbox-drain")
+        thread.start()
+        return thread
+
+    def register_configured_endpoints(self):
+        """按配置登记所有渠道的发送地址（补发遗留批次时使用）"""
+        if CONFIG["FEISHU_WEBHOOK_URL"]:
+            self.register_endpoint("feishu", CONFIG["FEISHU_WEBHOOK_URL"], {"Content-Type": "application/json"})
+        if CONFIG["DINGTALK_WEBHOOK_URL"]:
+            self.register_endpoint("dingtalk", CONFIG["DINGTALK_WEBHOOK_URL"], {"Content-Type": "application/json"})
+        if CONFIG["WEWORK_WEBHOOK_URL"]:
+            self.register_endpoint("wework", CONFIG["WEWORK_WEBHOOK_URL"], {"Content-Type": "application/json"})
+        if CONFIG["TELEGRAM_BOT_TOKEN"] and CONFIG["TELEGRAM_CHAT_ID"]:
+            register_telegram_endpoint(self, CONFIG["TELEGRAM_BOT_TOKEN"], CONFIG["TELEGRAM_CHAT_ID"])
+        if CONFIG["NTFY_SERVER_URL"] and CONFIG["NTFY_TOPIC"]:
+            register_ntfy_endpoint(self, CONFIG["NTFY_SERVER_URL"], CONFIG["NTFY_TOPIC"], CONFIG.get("NTFY_TOKEN", ""))
+        return self
+
+
+def notification_interval(channel: str) -> float:
+    """渠道内批次间隔：ntfy 公共服务器建议 2 秒，自托管 1 秒，其余使用 batch_send_interval"""
+    if channel == "ntfy":
+        return 2 if "ntfy.sh" in CONFIG["NTFY_SERVER_URL"] else 1
+    return CONFIG["BATCH_SEND_INTERVAL"]
+
+
+def register_telegram_endpoint(outbox: NotificationOutbox, bot_token: str, chat_id: str):
+    outbox.register_endpoint(
+        "telegram", f"https://api.telegram.org/bot{bot_token}/sendMessage",
+        {"Content-Type": "application/json"}, {"chat_id": chat_id},
+    )
+
+
+def register_ntfy_endpoint(outbox: NotificationOutbox, server_url: str, topic: str, token: Optional[str]):
+    base_url = server_url.rstrip("/")
+    if not base_url.startswith(("http://", "https://")):
+        base_url = f"https://{base_url}"
+    headers = {"Content-Type": "text/plain; charset=utf-8", "Markdown": "yes", "Priority": "default", "Tags": "news"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    outbox.register_endpoint("ntfy", f"{base_url}/{topic}", headers)
+
+
+# === 通知推送 ===
+def dispatch_notifications(channels: List[Tuple[str, Callable[[], bool]]]) -> Dict[str, Dict]:
+    """并发推送到各渠道：渠道之间互不等待，渠道内部仍按批次顺序发送并保留批次间隔
+
+    返回 {渠道: {"success": 是否成功, "elapsed": 耗时秒数}}，整体耗时约等于最慢的渠道
+    """
+    if not channels:
+        return {}
+
+    def timed(name, sender):
+        start = time.perf_counter()
+        try:
+            success = bool(sender())
+        except Exception as e:
+            print(f"{name} 推送出错：{e}")
+            success = False
+        return {"success": success, "elapsed": round(time.perf_counter() - start, 3)}
+
+    with ThreadPoolExecutor(max_workers=len(channels)) as pool:
+        futures = [(name, pool.submit(timed, name, sender)) for name, sender in channels]
+        results = {name: future.result() for name, future in futures}
+
+    summary = ", ".join(
+        f"{name} {'成功' if r['success'] else '失败'} {r['elapsed']:.2f}s" for name, r in results.items()
+    )
+    print(f"通知推送完成：{summary}")
+    return results
+
+
+def send_to_notifications(
+    stats: List[Dict],
+    failed_ids: Optional[List] = None,
+    report_type: str = "当日汇总",
+    new_titles: Optional[Dict] = None,
+    id_to_name: Optional[Dict] = None,
+    update_info: Optional[Dict] = None,
+    proxy_url: Optional[str] = None,
+    mode: str = "daily",
+    html_file_path: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    outbox: Optional[NotificationOutbox] = None,
+) -> Dict[str, Dict]:
+    """发送数据到多个通知平台（各渠道并发发送）"""
+    if CONFIG["PUSH_WINDOW"]["ENABLED"]:
+        push_manager = PushRecordManager()
+        time_range_start = CONFIG["PUSH_WINDOW"]["TIME_RANGE"]["START"]
+        time_range_end = CONFIG["PUSH_WINDOW"]["TIME_RANGE"]["END"]
+
+        if not push_manager.is_in_time_range(time_range_start, time_range_end):
+            now = get_beijing_time()
+            print(
+                f"推送窗口控制：当前时间 {now.strftime('%H:%M')} 不在推送时间窗口 {time_range_start}-{time_range_end} 内，跳过推送"
+            )
+            return {}
+
+        if CONFIG["PUSH_WINDOW"]["ONCE_PER_DAY"]:
+            if push_manager.has_pushed_today():
+                print(f"推送窗口控制：今天已推送过，跳过本次推送")
+                return {}
+            else:
+                print(f"推送窗口控制：今天首次推送")
+
+    report_data = prepare_report_data(stats, failed_ids, new_titles, id_to_name, mode)
+    update_info_to_send = update_info if CONFIG["SHOW_VERSION_UPDATE"] else None
+    # 各渠道共用一个发件箱：批次先落盘，失败的留待下次运行补发
+    outbox = outbox or NotificationOutbox(session, proxy_url)
+    common = (report_data, report_type, update_info_to_send, proxy_url, mode, session, outbox)
+
+    channels = []
+    if CONFIG["FEISHU_WEBHOOK_URL"]:
+        channels.append(("feishu", lambda: send_to_feishu(CONFIG["FEISHU_WEBHOOK_URL"], *common)))
+    if CONFIG["DINGTALK_WEBHOOK_URL"]:
+        channels.append(("dingtalk", lambda: send_to_dingtalk(CONFIG["DINGTALK_WEBHOOK_URL"], *common)))
+    if CONFIG["WEWORK_WEBHOOK_URL"]:
+        channels.append(("wework", lambda: send_to_wework(CONFIG["WEWORK_WEBHOOK_URL"], *common)))
+    if CONFIG["TELEGRAM_BOT_TOKEN"] and CONFIG["TELEGRAM_CHAT_ID"]:
+        channels.append(("telegram", lambda: send_to_telegram(CONFIG["TELEGRAM_BOT_TOKEN"], CONFIG["TELEGRAM_CHAT_ID"], *common)))
+    if CONFIG["NTFY_SERVER_URL"] and CONFIG["NTFY_TOPIC"]:
+        channels.append(("ntfy", lambda: send_to_ntfy(CONFIG["NTFY_SERVER_URL"], CONFIG["NTFY_TOPIC"], CONFIG.get("NTFY_TOKEN", ""), *common)))
+    if CONFIG["EMAIL_FROM"] and CONFIG["EMAIL_PASSWORD"] and CONFIG["EMAIL_TO"]:
+        channels.append(("email", lambda: send_to_email(
+            CONFIG["EMAIL_FROM"], CONFIG["EMAIL_PASSWORD"], CONFIG["EMAIL_TO"], report_type, html_file_path,
+            CONFIG.get("EMAIL_SMTP_SERVER", ""), CONFIG.get("EMAIL_SMTP_PORT", ""),
+        )))
+
+    if not channels:
+        print("未配置任何通知渠道，跳过通知发送")
+        return {}
+
+    results = dispatch_notifications(channels)
+
+    # 如果成功发送了任何通知，且启用了每天只推一次，则记录推送
+    if (
+        CONFIG["PUSH_WINDOW"]["ENABLED"]
+        and CONFIG["PUSH_WINDOW"]["ONCE_PER_DAY"]
+        and any(r["success"] for r in results.values())
+    ):
+        PushRecordManager().record_push(report_type)
+
+    return results
+
+
+def send_to_feishu(
+    webhook_url: str,
+    report_data: Dict,
+    report_type: str,
+    update_info: Optional[Dict] = None,
+    proxy_url: Optional[str] = None,
+    mode: str = "daily",
+    session: Optional[requests.Session] = None,
+    outbox: Optional[NotificationOutbox] = None,
+) -> bool:
+    """发送到飞书（支持分批发送）"""
+    outbox = outbox or NotificationOutbox(session, proxy_url)
+    outbox.register_endpoint("feishu", webhook_url, {"Content-Type": "application/json"})
+
+    # 获取分批内容，使用飞书专用的批次大小
+    batches = split_content_into_batches(
+        report_data,
+        "feishu",
+        update_info,
+        max_bytes=CONFIG.get("FEISHU_BATCH_SIZE", 29000),
+        mode=mode,
+    )
+
+    print(f"飞书消息分为 {len(batches)} 批次发送 [{report_type}]")
+
+    total_titles = sum(
+        len(stat["titles"]) for stat in report_data["stats"] if stat["count"] > 0
+    )
+    now = get_beijing_time()
+
+    payloads = []
+    for i, batch_content in enumerate(batches, 1):
+        # 添加批次标识
+        if len(batches) > 1:
+            batch_header = f"**[第 {i}/{len(batches)} 批次]**\n\n"
+            # 将批次标识插入到适当位置（在统计标题之后）
+            if "📊 **热点词汇统计**" in batch_content:
+                batch_content = batch_content.replace(
+                    "📊 **热点词汇统计**\n\n", f"📊 **热点词汇统计** {batch_header}"
+                )
+            else:
+                # 如果没有统计标题，直接在开头添加
+                batch_content = batch_header + batch_content
+
+        payloads.append({"json": {
+            "msg_type": "text",
+            "content": {
+                "total_titles": total_titles,
+                "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "report_type": report_type,
+                "text": batch_content,
+            },
+        }})
+
+    keys = outbox.enqueue("feishu", report_type, payloads)
+    return outbox.deliver(keys, notification_interval("feishu"))
+
+
+def send_to_dingtalk(
+    webhook_url: str,
+    report_data: Dict,
+    report_type: str,
+    update_info: Optional[Dict] = None,
+    proxy_url: Optional[str] = None,
+    mode: str = "daily",
+    session: Optional[requests.Session] = None,
+    outbox: Optional[NotificationOutbox] = None,
+) -> bool:
+    """发送到钉钉（支持分批发送）"""
+    outbox = outbox or NotificationOutbox(session, proxy_url)
+    outbox.register_endpoint("dingtalk", webhook_url, {"Content-Type": "application/json"})
+
+    # 获取分批内容，使用钉钉专用的批次大小
+    batches = split_content_into_batches(
+        report_data,
+        "dingtalk",
+        update_info,
+        max_bytes=CONFIG.get("DINGTALK_BATCH_SIZE", 20000),
+        mode=mode,
+    )
+
+    print(f"钉钉消息分为 {len(batches)} 批次发送 [{report_type}]")
+
+    payloads = []
+    for i, batch_content in enumerate(batches, 1):
+        # 添加批次标识
+        if len(batches) > 1:
+            batch_header = f"**[第 {i}/{len(batches)} 批次]**\n\n"
+            # 将批次标识插入到适当位置（在标题之后）
+            if "📊 **热点词汇统计**" in batch_content:
+                batch_content = batch_content.replace(
+                    "📊 **热点词汇统计**\n\n", f"📊 **热点词汇统计** {batch_header}\n\n"
+                )
+            else:
+                # 如果没有统计标题，直接在开头添加
+                batch_content = batch_header + batch_content
+
+        payloads.append({"json": {
+            "msgtype": "markdown",
+            "markdown": {
+                "title": f"TrendRadar 热点分析报告 - {report_type}",
+                "text": batch_content,
+            },
+        }})
+
+    keys = outbox.enqueue("dingtalk", report_type, payloads)
+    return outbox.deliver(keys, notification_interval("dingtalk"))
+
+
+def send_to_wework(
+    webhook_url: str,
+    report_data: Dict,
+    report_type: str,
+    update_info: Optional[Dict] = None,
+    proxy_url: Optional[str] = None,
+    mode: str = "daily",
+    session: Optional[requests.Session] = None,
+    outbox: Optional[NotificationOutbox] = None,
+) -> bool:
+    """发送到企业微信（支持分批发送）"""
+    outbox = outbox or NotificationOutbox(session, proxy_url)
+    outbox.register_endpoint("wework", webhook_url, {"Content-Type": "application/json"})
+
+    # 获取分批内容
+    batches = split_content_into_batches(report_data, "wework", update_info, mode=mode)
+
+    print(f"企业微信消息分为 {len(batches)} 批次发送 [{report_type}]")
+
+    payloads = []
+    for i, batch_content in enumerate(batches, 1):
+        # 添加批次标识
+        if len(batches) > 1:
+            batch_content = f"**[第 {i}/{len(batches)} 批次]**\n\n" + batch_content
+        payloads.append({"json": {"msgtype": "markdown", "markdown": {"content": batch_content}}})
+
+    keys = outbox.enqueue("wework", report_type, payloads)
+    return outbox.deliver(keys, notification_interval("wework"))
+
+
+def send_to_telegram(
+    bot_token: str,
+    chat_id: str,
+    report_data: Dict,
+    report_type: str,
+    update_info: Optional[Dict] = None,
+    proxy_url: Optional[str] = None,
+    mode: str = "daily",
+    session: Optional[requests.Session] = None,
+    outbox: Optional[NotificationOutbox] = None,
+) -> bool:
+    """发送到Telegram（支持分批发送）"""
+    outbox = outbox or NotificationOutbox(session, proxy_url)
+    # chat_id 在发送时才并入消息体，不写入发件箱
+    register_telegram_endpoint(outbox, bot_token, chat_id)
+
+    # 获取分批内容
+    batches = split_content_into_batches(
+        report_data, "telegram", update_info, mode=mode
+    )
+
+    print(f"Telegram消息分为 {len(batches)} 批次发送 [{report_type}]")
+
+    payloads = []
+    for i, batch_content in enumerate(batches, 1):
+        # 添加批次标识
+        if len(batches) > 1:
+            batch_content = f"<b>[第 {i}/{len(batches)} 批次]</b>\n\n" + batch_content
+        payloads.append({"json": {
+            "text": batch_content,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True,
+        }})
+
+    keys = outbox.enqueue("telegram", report_type, payloads)
+    return outbox.deliver(keys, notification_interval("telegram"))
+
+
+
+def send_to_email(
+    from_email: str,
+    password: str,
+    to_email: str,
+    report_type: str,
+    html_file_path: str,
+    custom_smtp_server: Optional[str] = None,
+    custom_smtp_port: Optional[int] = None,
+) -> bool:
+    """发送邮件通知"""
+    try:
+        if not html_file_path or not Path(html_file_path).exists():
+            print(f"错误：HTML文件不存在或未提供: {html_file_path}")
+            return False
+
+        print(f"使用HTML文件: {html_file_path}")
+        with open(html_file_path, "r", encoding="utf-8") as f:
+            html_content = f.read()
+
+        domain = from_email.split("@")[-1].lower()
+
+        if custom_smtp_server and custom_smtp_port:
+            # 使用自定义 SMTP 配置
+            smtp_server = custom_smtp_server
+            smtp_port = int(custom_smtp_port)
+            # 根据端口判断加密方式：465=SSL, 587=TLS
+            if smtp_port == 465:
+                use_tls = False  # SSL 模式（SMTP_SSL）
+            elif smtp_port == 587:
+                use_tls = True   # TLS 模式（STARTTLS）
+            else:
+                # 其他端口优先尝试 TLS（更安全，更广泛支持）
+                use_tls = True
+        elif domain in SMTP_CONFIGS:
+            # 使用预设配置
+            config = SMTP_CONFIGS[domain]
+            smtp_server = config["server"]
+            smtp_port = config["port"]
+            use_tls = config["encryption"] == "TLS"
+        else:
+            print(f"未识别的邮箱服务商: {domain}，使用通用 SMTP 配置")
+            smtp_server = f"smtp.{domain}"
+            smtp_port = 587
+            use_tls = True
+
+        msg = MIMEMultipart("alternative")
+
+        # 严格按照 RFC 标准设置 From header
+        sender_name = "TrendRadar"
+        msg["From"] = formataddr((sender_name, from_email))
+
+        # 设置收件人
+        recipients = [addr.strip() for addr in to_email.split(",")]
+        if len(recipients) == 1:
+            msg["To"] = recipients[0]
+        else:
+            msg["To"] = ", ".join(recipients)
+
+        # 设置邮件主题
+        now = get_beijing_time()
+        subject = f"TrendRadar 热点分析报告 - {report_type} - {now.strftime('%m月%d日 %H:%M')}"
+        msg["Subject"] = Header(subject, "utf-8")
+
+        # 设置其他标准 header
+        msg["MIME-Version"] = "1.0"
+        msg["Date"] = formatdate(localtime=True)
+        msg["Message-ID"] = make_msgid()
+
+        # 添加纯文本部分（作为备选）
+        text_content = f"""
+TrendRadar 热点分析报告
+========================
+报告类型：{report_type}
+生成时间：{now.strftime('%Y-%m-%d %H:%M:%S')}
+
+请使用支持HTML的邮件客户端查看完整报告内容。
+        """
+        text_part = MIMEText(text_content, "plain", "utf-8")
+        msg.attach(text_part)
+
+        html_part = MIMEText(html_content, "html", "utf-8")
+        msg.attach(html_part)
+
+        print(f"正在发送邮件到 {to_email}...")
+        print(f"SMTP 服务器: {smtp_server}:{smtp_port}")
+        print(f"发件人: {from_email}")
+
+        try:
+            if use_tls:
+                # TLS 模式
+                server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
+                server.set_debuglevel(0)  # 设为1可以查看详细调试信息
+                server.ehlo()
+                server.starttls()
+                server.ehlo()
+            else:
+                # SSL 模式
+                server = smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=30)
+                server.set_debuglevel(0)
+                server.ehlo()
+
+            # 登录
+            server.login(from_email, password)
+
+            # 发送邮件
+            server.send_message(msg)
+            server.quit()
+
+            print(f"邮件发送成功 [{report_type}] -> {to_email}")
+            return True
+
+        except smtplib.SMTPServerDisconnected:
+            print(f"邮件发送失败：服务器意外断开连接，请检查网络或稍后重试")
+            return False
+
+    except smtplib.SMTPAuthenticationError as e:
+        print(f"邮件发送失败：认证错误，请检查邮箱和密码/授权码")
+        print(f"详细错误: {str(e)}")
+        return False
+    except smtplib.SMTPRecipientsRefused as e:
+        print(f"邮件发送失败：收件人地址被拒绝 {e}")
+        return False
+    except smtplib.SMTPSenderRefused as e:
+        print(f"邮件发送失败：发件人地址被拒绝 {e}")
+        return False
+    except smtplib.SMTPDataError as e:
+        print(f"邮件发送失败：邮件数据错误 {e}")
+        return False
+    except smtplib.SMTPConnectError as e:
+        print(f"邮件发送失败：无法连接到 SMTP 服务器 {smtp_server}:{smtp_port}")
+        print(f"详细错误: {str(e)}")
+        return False
+    except Exception as e:
+        print(f"邮件发送失败 [{report_type}]：{e}")
+        import traceback
+
+        traceback.print_exc()
+        return False
+
+
+def send_to_ntfy(
+    server_url: str,
+    topic: str,
+    token: Optional[str],
+    report_data: Dict,
+    report_type: str,
+    update_info: Optional[Dict] = None,
+    proxy_url: Optional[str] = None,
+    mode: str = "daily",
+    session: Optional[requests.Session] = None,
+    outbox: Optional[NotificationOutbox] = None,
+) -> bool:
+    """发送到ntfy（支持分批发送，严格遵守4KB限制）"""
+    # 避免 HTTP header 编码问题
+    report_type_en_map = {
+        "当日汇总": "Daily Summary",
+        "当前榜单汇总": "Current Ranking",
+        "增量更新": "Incremental Update",
+        "实时增量": "Realtime Incremental",
+        "实时当前榜单": "Realtime Current Ranking",
+    }
+    report_type_en = report_type_en_map.get(report_type, "News Report")
+
+    outbox = outbox or NotificationOutbox(session, proxy_url)
+    register_ntfy_endpoint(outbox, server_url, topic, token)
+
+    # 获取分批内容，使用ntfy专用的4KB限制
+    batches = split_content_into_batches(
+        report_data, "ntfy", update_info, max_bytes=3800, mode=mode
+    )
+
+    total_batches = len(batches)
+    print(f"ntfy消息分为 {total_batches} 批次发送 [{report_type}]")
+
+    # 反转批次顺序，使得在ntfy客户端显示时顺序正确
+    # ntfy显示最新消息在上面，所以我们从最后一批开始推送
+    print(f"ntfy将按反向顺序推送（最后批次先推送），确保客户端显示顺序正确")
+
+    payloads = []
+    batch_numbers = list(range(total_batches, 0, -1))
+    for actual_batch_num in batch_numbers:
+        batch_content = batches[actual_batch_num - 1]
+
+        # 检查消息大小，确保不超过4KB
+        batch_size = len(batch_content.encode("utf-8"))
+        if batch_size > 4096:
+            print(f"警告：ntfy第 {actual_batch_num} 批次消息过大（{batch_size} 字节），可能被拒绝")
+
+        # 添加批次标识（使用正确的批次编号）
+        headers = {"Title": report_type_en}
+        if total_batches > 1:
+            batch_content = f"**[第 {actual_batch_num}/{total_batches} 批次]**\n\n" + batch_content
+            headers["Title"] = f"{report_type_en} ({actual_batch_num}/{total_batches})"
+        payloads.append({"data": batch_content, "headers": headers})
+
+    keys = outbox.enqueue("ntfy", report_type, payloads, batch_numbers)
+    return outbox.deliver(keys, notification_interval("ntfy"))
+
+
 
 # === 主分析器 ===
 class NewsAnalyzer:
@@ -983,6 +3339,8 @@ class NewsAnalyzer:
         self.update_info = None
         self.proxy_url = CONFIG["DEFAULT_PROXY"] if CONFIG["USE_PROXY"] else None
         self.data_fetcher = DataFetcher(self.proxy_url)
+        self.outbox = NotificationOutbox(self.data_fetcher.session, self.proxy_url)
+        self._outbox_drain: Optional[threading.Thread] = None
 
     def _load_analysis_data(self):
         current_ids = [p["id"] for p in CONFIG["PLATFORMS"]]
@@ -992,40 +3350,311 @@ class NewsAnalyzer:
         wg, fw = load_frequency_words()
         return all_res, id_map, t_info, new_t, wg, fw
 
-    def _run_analysis_pipeline(self, data_source, mode, title_info, new_titles, wg, fw, id_to_name, failed_ids=None, is_daily_summary=False):
-        stats, total_titles = count_word_frequency(
+    def _run_analysis_pipeline(self, data_source, mode, title_info, new_titles, wg, fw, id_to_name, failed_ids=None, is_daily_summary=False, search_src=None, counted=None):
+        stats, total_titles = counted or count_word_frequency(
             data_source, wg, fw, id_to_name, title_info, self.rank_threshold, new_titles, mode=mode
         )
         html_file = generate_html_report(
             stats, total_titles, failed_ids, new_titles, id_to_name, mode, is_daily_summary, self.update_info,
-            raw_data=data_source 
+            raw_data=data_source, search_src=search_src
         )
         return stats, html_file
 
-    # 省略通知发送逻辑，请确保原代码中的 send_to_notifications 等函数存在
-    def _send_notification_if_needed(self, stats, report_type, mode, failed_ids, new_titles, id_to_name, html_file_path):
-         # 这里假设 send_to_notifications 函数在外部定义或已存在
-         pass
+    def _run_report_jobs(self, jobs: List[Dict]) -> List[Tuple]:
+        """执行多个报告流水线，返回与 jobs 顺序一致的结果；开启 parallel_reports 时在线程池中并发渲染"""
+        if len(jobs) > 1 and CONFIG["PARALLEL_REPORTS"]:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                return list(pool.map(lambda job: self._run_analysis_pipeline(**job), jobs))
+        return [self._run_analysis_pipeline(**job) for job in jobs]
+
+    def _has_notification_configured(self) -> bool:
+        return any([
+            CONFIG["FEISHU_WEBHOOK_URL"], CONFIG["DINGTALK_WEBHOOK_URL"], CONFIG["WEWORK_WEBHOOK_URL"],
+            CONFIG["TELEGRAM_BOT_TOKEN"] and CONFIG["TELEGRAM_CHAT_ID"],
+            CONFIG["EMAIL_FROM"] and CONFIG["EMAIL_PASSWORD"] and CONFIG["EMAIL_TO"],
+            CONFIG["NTFY_SERVER_URL"] and CONFIG["NTFY_TOPIC"],
+        ])
+
+    def _has_valid_content(self, stats: List[Dict], new_titles: Optional[Dict] = None) -> bool:
+        has_matched_news = any(stat["count"] > 0 for stat in stats)
+        if self.report_mode in ("incremental", "current"):
+            return has_matched_news
+        return has_matched_news or bool(new_titles and any(new_titles.values()))
+
+    def _send_notification_if_needed(self, stats, report_type, mode, failed_ids, new_titles, id_to_name, html_file_path) -> bool:
+        has_notification = self._has_notification_configured()
+        if not CONFIG["ENABLE_NOTIFICATION"]:
+            print(f"跳过{report_type}通知：通知功能已禁用")
+        elif not has_notification:
+            print("⚠️ 警告：通知功能已启用但未配置任何通知渠道，将跳过通知发送")
+        elif not self._has_valid_content(stats, new_titles):
+            print(f"跳过{report_type}通知：未匹配到有效的新闻内容")
+        else:
+            # 先等遗留批次补发完，保证各渠道内消息顺序
+            if self._outbox_drain:
+                self._outbox_drain.join()
+            # 各渠道并发推送，复用爬取时的持久化连接池
+            results = send_to_notifications(
+                stats, failed_ids or [], report_type, new_titles, id_to_name, self.update_info, self.proxy_url,
+                mode=mode, html_file_path=html_file_path, session=self.data_fetcher.session, outbox=self.outbox,
+            )
+            if CONFIG["OUTBOX_ENABLED"] and not all(r["success"] for r in results.values()):
+                # 推送时每个批次只发一次，失败的批次在后台按退避重试
+                self._outbox_drain = self.outbox.drain_in_background()
+            return True
+        return False
 
     def run(self):
         print(f"开始执行... 模式: {self.report_mode}")
+        if self._outbox_drain:
+            self._outbox_drain.join()
+        # 常驻模式下跨天时切换到当天的发件箱
+        self.outbox = NotificationOutbox(self.data_fetcher.session, self.proxy_url)
+        if CONFIG["ENABLE_NOTIFICATION"] and CONFIG["OUTBOX_ENABLED"]:
+            # 上次运行未送达的批次在后台补发，与本次爬取并行
+            self._outbox_drain = self.outbox.register_configured_endpoints().drain_in_background()
         results, id_to_name, failed_ids = self.data_fetcher.crawl_websites([(p["id"], p.get("name", p["id"])) for p in CONFIG["PLATFORMS"]])
-        save_titles_to_file(results, id_to_name, failed_ids)
+        snapshot_name = save_snapshot(results, id_to_name, failed_ids, self.data_fetcher.last_unchanged)
+        self.data_fetcher.fingerprints.commit(snapshot_name)
+        self.outbox.run_id = snapshot_name
         
         data = self._load_analysis_data()
         if not data: return
         all_res, id_map, t_info, new_t, wg, fw = data
         
         strategy = self.MODE_STRATEGIES.get(self.report_mode, self.MODE_STRATEGIES["daily"])
+        # 当天所有报告共用一份搜索索引
+        search_src = write_search_index(all_res, id_map)
+        
+        # 所有标题只归类一次，实时报告与汇总报告共用
+        classify_titles(all_res, wg, fw)
         
         target_data = all_res if self.report_mode == "current" else results
-        stats, html_file = self._run_analysis_pipeline(target_data, self.report_mode, t_info, new_t, wg, fw, id_map, failed_ids)
+        common = {"title_info": t_info, "new_titles": new_t, "wg": wg, "fw": fw, "id_to_name": id_map, "failed_ids": failed_ids, "search_src": search_src}
+        jobs = [dict(common, data_source=target_data, mode=self.report_mode)]
+        if strategy["should_generate_summary"]:
+            summary_job = dict(common, data_source=all_res, mode=strategy["summary_mode"], is_daily_summary=True)
+            if target_data is all_res and strategy["summary_mode"] == self.report_mode:
+                # 输入完全相同（当前榜单模式）：统计结果也只算一次
+                counted = count_word_frequency(all_res, wg, fw, id_map, t_info, self.rank_threshold, new_t, mode=self.report_mode)
+                jobs[0]["counted"] = summary_job["counted"] = counted
+            jobs.append(summary_job)
+        
+        reports = self._run_report_jobs(jobs)
+        stats, html_file = reports[0]
         print(f"HTML生成: {html_file}")
         
-        if strategy["should_generate_summary"]:
-             self._run_analysis_pipeline(all_res, strategy["summary_mode"], t_info, new_t, wg, fw, id_map, failed_ids, is_daily_summary=True)
+        if strategy["should_send_realtime"]:
+            self._send_notification_if_needed(stats, strategy["realtime_report_type"], self.report_mode, failed_ids, new_t, id_map, html_file)
+        elif strategy["should_generate_summary"]:
+            summary_stats, summary_html = reports[-1]
+            self._send_notification_if_needed(summary_stats, strategy["summary_report_type"], strategy["summary_mode"], [], new_t, id_map, summary_html)
+
+# === 常驻调度 ===
+class CronSchedule:
+    """五段式 cron 表达式（分 时 日 月 周），与容器内 supercronic 使用的 CRON_SCHEDULE 写法一致"""
+
+    FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    MONTH_NAMES = {name: i for i, name in enumerate(
+        ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"], 1)}
+    WEEKDAY_NAMES = {name: i for i, name in enumerate(["SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"])}
+    DESCRIPTORS = {
+        "@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *", "@monthly": "0 0 1 * *",
+        "@weekly": "0 0 * * 0", "@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@hourly": "0 * * * *",
+    }
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        parts = self.DESCRIPTORS.get(self.expr.lower(), self.expr).split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式需要 5 段（分 时 日 月 周）: {expr}")
+        names = ({}, {}, {}, self.MONTH_NAMES, self.WEEKDAY_NAMES)
+        fields = [self._parse_field(p.upper(), lo, hi, n) for p, (lo, hi), n in zip(parts, self.FIELD_RANGES, names)]
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        self.weekdays = {d % 7 for d in weekdays}
+        # 日与周同时受限时按标准 cron 语义取并集
+        self.day_or_weekday = parts[2] not in ("*", "?") and parts[4] not in ("*", "?")
+
+    @staticmethod
+    def _parse_field(field: str, lo: int, hi: int, names: Dict[str, int]) -> set:
+        values = set()
+        for part in field.split(","):
+            rng, has_step, step = part.partition("/")
+            step = int(step) if has_step else 1
+            if rng in ("*", "?"):
+                start, end = lo, hi
+            elif "-" in rng:
+                start, end = (int(names.get(x, x)) for x in rng.split("-", 1))
+            else:
+                start = int(names.get(rng, rng))
+                end = hi if has_step else start
+            if not lo <= start <= end <= hi or step < 1:
+                raise ValueError(f"cron 字段超出范围: {part}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        in_days = dt.day in self.days
+        in_weekdays = dt.isoweekday() % 7 in self.weekdays
+        return (in_days or in_weekdays) if self.day_or_weekday else (in_days and in_weekdays)
+
+    def next_after(self, dt: datetime) -> datetime:
+        """返回 dt 之后（不含 dt 所在分钟）的下一个触发时间"""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"cron 表达式没有可触发的时间: {self.expr}")
+
+
+class DaemonRunner:
+    """常驻调度：进程内按 cron 定时执行分析，配置、关键词匹配器、HTTP 连接池和当日聚合在两次运行之间保持常驻
+
+    健康检查：GET /health 返回运行状态（调度停滞时返回 503）；POST /run 请求立即执行一次
+    """
+
+    def __init__(self, schedule: CronSchedule, health_host: str = "127.0.0.1", health_port: int = 8090):
+        self.schedule = schedule
+        self.health_host = health_host
+        self.health_port = health_port
+        self.analyzer = NewsAnalyzer()
+        self.stop_event = threading.Event()
+        self.trigger_event = threading.Event()
+        self._lock = threading.Lock()
+        self.state = {
+            "pid": os.getpid(), "schedule": schedule.expr, "started_at": datetime.now().isoformat(timespec="seconds"),
+            "running": False, "runs": 0, "failures": 0, "last_run": None, "next_run": None,
+            # 当日聚合由运行线程维护，只在运行结束时记录，健康检查不直接读取
+            "daily_aggregates": [],
+        }
+
+    def health(self) -> Tuple[int, Dict]:
+        with self._lock:
+            state = dict(self.state)
+        next_run = state["next_run"]
+        # 非运行中且错过下次执行时间超过 5 分钟，视为调度停滞
+        stalled = (not state["running"] and next_run is not None
+                   and datetime.now() > datetime.fromisoformat(next_run) + timedelta(minutes=5))
+        state["status"] = "stalled" if stalled else "running" if state["running"] else "idle"
+        state["warm"] = {
+            "keyword_matchers": len(_keyword_matchers),
+            "daily_aggregates": state.pop("daily_aggregates"),
+            "http_pool": self.analyzer.data_fetcher.get_connection_stats(),
+        }
+        return (503 if stalled else 200), state
+
+    def start_health_server(self):
+        runner = self
+
+        class HealthHandler(BaseHTTPRequestHandler):
+            def _reply(self, code: int, body: Dict):
+                data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/health":
+                    self._reply(*runner.health())
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                if self.path.rstrip("/") == "/run":
+                    runner.trigger_event.set()
+                    self._reply(202, {"queued": True})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((self.health_host, self.health_port), HealthHandler)
+        except OSError as e:
+            print(f"健康检查端口 {self.health_host}:{self.health_port} 启动失败，继续运行: {e}")
+            return None
+        threading.Thread(target=server.serve_forever, name="health", daemon=True).start()
+        print(f"健康检查: http://{self.health_host}:{self.health_port}/health")
+        return server
+
+    def run_once(self):
+        started = time.time()
+        with self._lock:
+            self.state["running"] = True
+        error = None
+        try:
+            self.analyzer.run()
+        except Exception as e:
+            error = str(e)
+            print(f"执行出错: {e}")
+        with self._lock:
+            self.state["running"] = False
+            self.state["runs"] += 1
+            self.state["failures"] += bool(error)
+            self.state["daily_aggregates"] = list(_daily_aggregates)
+            self.state["last_run"] = {
+                "started_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+                "duration": round(time.time() - started, 2), "success": error is None, "error": error,
+            }
+
+    def serve(self, immediate: bool = False):
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: (self.stop_event.set(), self.trigger_event.set()))
+        server = self.start_health_server()
+        print(f"常驻模式启动，调度: {self.schedule.expr}")
+
+        if immediate:
+            self.run_once()
+        while not self.stop_event.is_set():
+            next_run = self.schedule.next_after(datetime.now())
+            with self._lock:
+                self.state["next_run"] = next_run.isoformat(timespec="seconds")
+            print(f"下次执行: {next_run.strftime('%Y-%m-%d %H:%M')}")
+            # 分段等待，系统时间跳变时也能及时醒来
+            while not self.stop_event.is_set() and datetime.now() < next_run:
+                if self.trigger_event.wait(min(60.0, max(0.0, (next_run - datetime.now()).total_seconds()))):
+                    break
+            if self.stop_event.is_set():
+                break
+            self.trigger_event.clear()
+            self.run_once()
+
+        print("常驻模式退出")
+        if server:
+            server.shutdown()
+        self.analyzer.data_fetcher.close()
+
 
 def main():
+    parser = argparse.ArgumentParser(description="TrendRadar 热点新闻分析")
+    parser.add_argument("--daemon", action="store_true", help="常驻运行，按 cron 表达式定时执行")
+    parser.add_argument("--schedule", default=os.environ.get("CRON_SCHEDULE", "").strip() or "*/30 * * * *", help="cron 表达式，默认读取 CRON_SCHEDULE")
+    parser.add_argument("--health-host", default=os.environ.get("HEALTH_HOST", "").strip() or "127.0.0.1")
+    parser.add_argument("--health-port", type=int, default=int(os.environ.get("HEALTH_PORT", "").strip() or 8090))
+    args = parser.parse_args()
+
+    if args.daemon:
+        try:
+            schedule = CronSchedule(args.schedule)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        immediate = os.environ.get("IMMEDIATE_RUN", "").strip().lower() in ("true", "1")
+        DaemonRunner(schedule, args.health_host, args.health_port).serve(immediate=immediate)
+        return
+
     try:
         analyzer = NewsAnalyzer()
         analyzer.run()
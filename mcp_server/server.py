@@ -5,6 +5,7 @@ TrendRadar MCP Server - FastMCP 2.0 实现
 支持 stdio 和 HTTP 两种传输模式。
 """
 
+import asyncio
 import json
 from typing import List, Optional, Dict
 
@@ -71,7 +72,7 @@ async def get_latest_news(
     **注意**：如果用户询问"为什么只显示了部分"，说明他们需要完整数据
     """
     tools = _get_tools()
-    result = tools['data'].get_latest_news(platforms=platforms, limit=limit, include_url=include_url)
+    result = await asyncio.to_thread(tools['data'].get_latest_news, platforms=platforms, limit=limit, include_url=include_url)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
@@ -96,7 +97,7 @@ async def get_trending_topics(
         JSON格式的关注词频率统计列表
     """
     tools = _get_tools()
-    result = tools['data'].get_trending_topics(top_n=top_n, mode=mode)
+    result = await asyncio.to_thread(tools['data'].get_trending_topics, top_n=top_n, mode=mode)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
@@ -139,7 +140,8 @@ async def get_news_by_date(
     **注意**：如果用户询问"为什么只显示了部分"，说明他们需要完整数据
     """
     tools = _get_tools()
-    result = tools['data'].get_news_by_date(
+    result = await asyncio.to_thread(
+        tools['data'].get_news_by_date,
         date_query=date_query,
         platforms=platforms,
         limit=limit,
@@ -204,7 +206,8 @@ async def analyze_topic_trend(
         - analyze_topic_trend(topic="ChatGPT", analysis_type="predict", lookahead_hours=6)
     """
     tools = _get_tools()
-    result = tools['analytics'].analyze_topic_trend_unified(
+    result = await asyncio.to_thread(
+        tools['analytics'].analyze_topic_trend_unified,
         topic=topic,
         analysis_type=analysis_type,
         date_range=date_range,
@@ -250,7 +253,8 @@ async def analyze_data_insights(
         - analyze_data_insights(insight_type="keyword_cooccur", min_frequency=5, top_n=15)
     """
     tools = _get_tools()
-    result = tools['analytics'].analyze_data_insights_unified(
+    result = await asyncio.to_thread(
+        tools['analytics'].analyze_data_insights_unified,
         insight_type=insight_type,
         topic=topic,
         date_range=date_range,
@@ -297,7 +301,8 @@ async def analyze_sentiment(
     - 仅在用户明确要求"总结"或"挑重点"时才进行筛选
     """
     tools = _get_tools()
-    result = tools['analytics'].analyze_sentiment(
+    result = await asyncio.to_thread(
+        tools['analytics'].analyze_sentiment,
         topic=topic,
         platforms=platforms,
         date_range=date_range,
@@ -335,7 +340,8 @@ async def find_similar_news(
     - 仅在用户明确要求"总结"或"挑重点"时才进行筛选
     """
     tools = _get_tools()
-    result = tools['analytics'].find_similar_news(
+    result = await asyncio.to_thread(
+        tools['analytics'].find_similar_news,
         reference_title=reference_title,
         threshold=threshold,
         limit=limit,
@@ -363,7 +369,8 @@ async def generate_summary_report(
         JSON格式的摘要报告，包含Markdown格式内容
     """
     tools = _get_tools()
-    result = tools['analytics'].generate_summary_report(
+    result = await asyncio.to_thread(
+        tools['analytics'].generate_summary_report,
         report_type=report_type,
         date_range=date_range
     )
@@ -442,7 +449,8 @@ async def search_news(
         - 模糊搜索: search_news(query="特斯拉降价", search_mode="fuzzy", threshold=0.4)
     """
     tools = _get_tools()
-    result = tools['search'].search_news_unified(
+    result = await asyncio.to_thread(
+        tools['search'].search_news_unified,
         query=query,
         search_mode=search_mode,
         date_range=date_range,
@@ -489,7 +497,8 @@ async def search_related_news_history(
     - 仅在用户明确要求"总结"或"挑重点"时才进行筛选
     """
     tools = _get_tools()
-    result = tools['search'].search_related_news_history(
+    result = await asyncio.to_thread(
+        tools['search'].search_related_news_history,
         reference_text=reference_text,
         time_preset=time_preset,
         threshold=threshold,
@@ -520,7 +529,7 @@ async def get_current_config(
         JSON格式的配置信息
     """
     tools = _get_tools()
-    result = tools['config'].get_current_config(section=section)
+    result = await asyncio.to_thread(tools['config'].get_current_config, section=section)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
@@ -529,13 +538,13 @@ async def get_system_status() -> str:
     """
     获取系统运行状态和健康检查信息
 
-    返回系统版本、数据统计、缓存状态等信息
+    返回系统版本、数据统计、缓存状态（条目数、内存占用、命中/未命中/淘汰次数）、平台熔断（被隔离的数据源）等信息
 
     Returns:
         JSON格式的系统状态信息
     """
     tools = _get_tools()
-    result = tools['system'].get_system_status()
+    result = await asyncio.to_thread(tools['system'].get_system_status)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
@@ -570,7 +579,7 @@ async def trigger_crawl(
         - 使用默认平台: trigger_crawl()  # 爬取config.yaml中配置的所有平台
     """
     tools = _get_tools()
-    result = tools['system'].trigger_crawl(platforms=platforms, save_to_local=save_to_local, include_url=include_url)
+    result = await asyncio.to_thread(tools['system'].trigger_crawl, platforms=platforms, save_to_local=save_to_local, include_url=include_url)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 
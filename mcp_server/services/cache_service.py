@@ -1,56 +1,243 @@
 """
 缓存服务
 
-实现TTL缓存机制，提升数据访问性能。
+实现带容量上限的 LRU + TTL 缓存机制，提升数据访问性能。
+
+每个条目在写入时记录过期时间和估算的内存占用，
+条目数或总占用超过上限时按最近最少使用顺序淘汰。
+并发的相同加载通过 SingleFlight 合并为一次计算。
 """
 
+import sys
 import time
-from typing import Any, Optional
-from threading import Lock
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+from threading import Event, Lock
+
+
+# 默认容量上限
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 900
+
+
+def estimate_size(value: Any) -> int:
+    """
+    估算对象的内存占用（字节）
+
+    递归累加容器及其元素的 sys.getsizeof，同一对象只计算一次。
+
+    Args:
+        value: 任意对象
+
+    Returns:
+        近似字节数
+    """
+    seen = set()
+    total = 0
+    stack = [value]
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+
+    return total
+
+
+class _InflightCall:
+    """进行中的一次计算"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    并发请求合并（single-flight）
+
+    同一个键同时只有一个调用真正执行加载函数，
+    其余调用等待它完成并共享同一个结果（或同一个异常）。
+    """
+
+    def __init__(self):
+        """初始化请求合并器"""
+        self._calls = {}
+        self._lock = Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        执行或等待某个键的加载
+
+        Args:
+            key: 加载键
+            loader: 加载函数（无参数）
+
+        Returns:
+            加载结果
+
+        Raises:
+            加载函数抛出的异常
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
 
 
 class CacheService:
     """缓存服务类"""
 
-    def __init__(self):
-        """初始化缓存服务"""
-        self._cache = {}
-        self._timestamps = {}
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        初始化缓存服务
+
+        Args:
+            max_entries: 最大条目数
+            max_bytes: 所有条目估算占用的上限（字节）
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (value, size, expires_at, created_at)，按最近使用排序
+        self._cache = OrderedDict()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
         self._lock = Lock()
+        self._inflight = SingleFlight()
 
-    def get(self, key: str, ttl: int = 900) -> Optional[Any]:
+    def _remove(self, key: str) -> None:
+        """删除条目并更新占用（调用方需持有锁）"""
+        _, size, _, _ = self._cache.pop(key)
+        self._total_bytes -= size
+
+    def get(self, key: str) -> Optional[Any]:
         """
         获取缓存数据
 
         Args:
             key: 缓存键
-            ttl: 存活时间（秒），默认15分钟
 
         Returns:
             缓存的值，如果不存在或已过期则返回None
         """
         with self._lock:
-            if key in self._cache:
-                # 检查是否过期
-                if time.time() - self._timestamps[key] < ttl:
-                    return self._cache[key]
-                else:
-                    # 已过期，删除缓存
-                    del self._cache[key]
-                    del self._timestamps[key]
-        return None
+            entry = self._cache.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            if time.monotonic() >= entry[2]:
+                # 已过期，删除缓存
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
 
-    def set(self, key: str, value: Any) -> None:
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: int = DEFAULT_TTL) -> None:
         """
         设置缓存数据
 
         Args:
             key: 缓存键
             value: 缓存值
+            ttl: 存活时间（秒），默认15分钟
         """
+        size = estimate_size(value)
+        now = time.monotonic()
+
         with self._lock:
-            self._cache[key] = value
-            self._timestamps[key] = time.time()
+            if key in self._cache:
+                self._remove(key)
+
+            # 单个条目超过总上限时不缓存
+            if size > self.max_bytes:
+                return
+
+            self._cache[key] = (value, size, now + ttl, now)
+            self._total_bytes += size
+
+            while len(self._cache) > self.max_entries or self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._cache))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: int = DEFAULT_TTL) -> Any:
+        """
+        获取缓存数据，未命中时调用加载函数并写入缓存
+
+        同一个键的并发未命中只会执行一次加载函数，其余调用共享其结果。
+
+        Args:
+            key: 缓存键
+            loader: 加载函数（无参数）
+            ttl: 存活时间（秒），默认15分钟
+
+        Returns:
+            缓存的值或新加载的值
+
+        Raises:
+            加载函数抛出的异常（异常结果不会被缓存）
+        """
+        def load():
+            # 等待期间其他调用可能已写入缓存
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None and time.monotonic() < entry[2]:
+                    self._cache.move_to_end(key)
+                    return entry[0]
+            value = loader()
+            self.set(key, value, ttl)
+            return value
+
+        value = self.get(key)
+        if value is not None:
+            return value
+        return self._inflight.do(key, load)
 
     def delete(self, key: str) -> bool:
         """
@@ -64,8 +251,7 @@ class CacheService:
         """
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
-                del self._timestamps[key]
+                self._remove(key)
                 return True
         return False
 
@@ -73,29 +259,26 @@ class CacheService:
         """清空所有缓存"""
         with self._lock:
             self._cache.clear()
-            self._timestamps.clear()
+            self._total_bytes = 0
 
-    def cleanup_expired(self, ttl: int = 900) -> int:
+    def cleanup_expired(self) -> int:
         """
         清理过期缓存
 
-        Args:
-            ttl: 存活时间（秒）
-
         Returns:
             清理的条目数量
         """
         with self._lock:
-            current_time = time.time()
+            now = time.monotonic()
             expired_keys = [
-                key for key, timestamp in self._timestamps.items()
-                if current_time - timestamp >= ttl
+                key for key, entry in self._cache.items()
+                if now >= entry[2]
             ]
 
             for key in expired_keys:
-                del self._cache[key]
-                del self._timestamps[key]
+                self._remove(key)
 
+            self._expirations += len(expired_keys)
             return len(expired_keys)
 
     def get_stats(self) -> dict:
@@ -106,16 +289,22 @@ class CacheService:
             统计信息字典
         """
         with self._lock:
+            now = time.monotonic()
+            created = [entry[3] for entry in self._cache.values()]
+            lookups = self._hits + self._misses
             return {
                 "total_entries": len(self._cache),
-                "oldest_entry_age": (
-                    time.time() - min(self._timestamps.values())
-                    if self._timestamps else 0
-                ),
-                "newest_entry_age": (
-                    time.time() - max(self._timestamps.values())
-                    if self._timestamps else 0
-                )
+                "max_entries": self.max_entries,
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "coalesced": self._inflight.coalesced,
+                "oldest_entry_age": now - min(created) if created else 0,
+                "newest_entry_age": now - max(created) if created else 0
             }
 
 
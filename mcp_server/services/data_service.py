@@ -4,14 +4,17 @@
 提供统一的数据查询接口,封装数据访问逻辑。
 """
 
+import json
 import re
+import sqlite3
 from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
 from .cache_service import get_cache
-from .parser_service import ParserService
-from ..utils.errors import DataNotFoundError
+from .news_db import NEWS_DB_FILE_NAME, NewsDatabaseReader
+from .parser_service import get_parser
+from ..utils.errors import DataNotFoundError, MCPError
 
 
 class DataService:
@@ -24,8 +27,146 @@ class DataService:
         Args:
             project_root: 项目根目录
         """
-        self.parser = ParserService(project_root)
+        self.parser = get_parser(project_root)
         self.cache = get_cache()
+        self.news_db = NewsDatabaseReader(self.parser.project_root / "output" / NEWS_DB_FILE_NAME)
+
+    def _db_covered_dates(self, dates: List[datetime]) -> set:
+        """
+        找出已完整写入 SQLite 新闻库的日期（库中快照覆盖磁盘上的全部快照）
+
+        Args:
+            dates: 日期列表
+
+        Returns:
+            可直接走 SQL 查询的日期集合（YYYY-MM-DD）
+        """
+        if not dates or not self.news_db.available():
+            return set()
+
+        db_names = self.news_db.snapshot_names(
+            dates[0].strftime("%Y-%m-%d"),
+            dates[-1].strftime("%Y-%m-%d")
+        )
+
+        covered = set()
+        for date in dates:
+            date_str = date.strftime("%Y-%m-%d")
+            if date_str not in db_names:
+                continue
+            date_folder = self.parser.get_date_folder_name(date)
+            disk_names = set(self.parser.get_snapshot_store(date_folder).names())
+            txt_dir = self.parser.project_root / "output" / date_folder / "txt"
+            if txt_dir.exists():
+                disk_names.update(f.stem for f in txt_dir.glob("*.txt"))
+            if disk_names <= db_names[date_str]:
+                covered.add(date_str)
+        return covered
+
+    def get_titles_for_range(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        platforms: Optional[List[str]] = None,
+        keyword: Optional[str] = None
+    ) -> List[Tuple[str, Dict, Dict]]:
+        """
+        读取日期范围内每天的标题数据
+
+        已写入 SQLite 新闻库的日期用一次索引查询取回，其余日期逐天读取日视图（关键词走标题倒排索引）。
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            platforms: 平台过滤列表
+            keyword: 只返回包含该关键词的标题（不区分大小写），None表示不过滤
+
+        Returns:
+            [(date_str, all_titles, id_to_name), ...]，按日期排序，没有数据的日期不出现
+        """
+        dates = []
+        current_date = start_date
+        while current_date <= end_date:
+            dates.append(current_date)
+            current_date += timedelta(days=1)
+
+        from_db = {}
+        try:
+            covered = self._db_covered_dates(dates)
+            if covered:
+                from_db = self.news_db.query_titles(sorted(covered), platforms, keyword)
+        except sqlite3.Error as e:
+            print(f"Warning: 查询 SQLite 新闻库失败，改为解析快照文件: {e}")
+            covered = set()
+
+        results = []
+        for date in dates:
+            date_str = date.strftime("%Y-%m-%d")
+            if date_str in covered:
+                if date_str in from_db:
+                    results.append((date_str, *from_db[date_str]))
+                continue
+
+            try:
+                if keyword:
+                    all_titles, id_to_name = self.parser.search_titles_for_date(
+                        keyword,
+                        date=date,
+                        platform_ids=platforms
+                    )
+                else:
+                    all_titles, id_to_name, _ = self.parser.read_all_titles_for_date(
+                        date=date,
+                        platform_ids=platforms
+                    )
+            except DataNotFoundError:
+                continue
+
+            results.append((date_str, all_titles, id_to_name))
+
+        return results
+
+    def count_titles_by_date(
+        self,
+        keyword: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, int]:
+        """
+        统计日期范围内每天包含关键词的标题数
+
+        Args:
+            keyword: 关键词（不区分大小写）
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            {date_str: count}，覆盖范围内的每一天（没有数据的日期为 0）
+        """
+        dates = []
+        current_date = start_date
+        while current_date <= end_date:
+            dates.append(current_date)
+            current_date += timedelta(days=1)
+
+        counts = {date.strftime("%Y-%m-%d"): 0 for date in dates}
+        try:
+            covered = self._db_covered_dates(dates)
+            if covered:
+                counts.update(self.news_db.count_titles(sorted(covered), keyword))
+        except sqlite3.Error as e:
+            print(f"Warning: 查询 SQLite 新闻库失败，改为解析快照文件: {e}")
+            covered = set()
+
+        remaining = [date for date in dates if date.strftime("%Y-%m-%d") not in covered]
+        for date in remaining:
+            try:
+                matched, _ = self.parser.search_titles_for_date(keyword, date=date)
+            except DataNotFoundError:
+                continue
+            counts[date.strftime("%Y-%m-%d")] = sum(len(titles) for titles in matched.values())
+
+        return counts
 
     def get_latest_news(
         self,
@@ -47,12 +188,20 @@ class DataService:
         Raises:
             DataNotFoundError: 数据不存在
         """
-        # 尝试从缓存获取
         cache_key = f"latest_news:{','.join(platforms or [])}:{limit}:{include_url}"
-        cached = self.cache.get(cache_key, ttl=900)  # 15分钟缓存
-        if cached:
-            return cached
+        return self.cache.get_or_load(
+            cache_key,
+            lambda: self._load_latest_news(platforms, limit, include_url),
+            ttl=900  # 15分钟缓存
+        )
 
+    def _load_latest_news(
+        self,
+        platforms: Optional[List[str]],
+        limit: int,
+        include_url: bool
+    ) -> List[Dict]:
+        """读取今天的数据并整理为最新新闻列表（缓存未命中时调用）"""
         # 读取今天的数据
         all_titles, id_to_name, timestamps = self.parser.read_all_titles_for_date(
             date=None,
@@ -96,9 +245,6 @@ class DataService:
         # 限制返回数量
         result = news_list[:limit]
 
-        # 缓存结果
-        self.cache.set(cache_key, result)
-
         return result
 
     def get_news_by_date(
@@ -131,12 +277,23 @@ class DataService:
             ...     limit=20
             ... )
         """
-        # 尝试从缓存获取
         date_str = target_date.strftime("%Y-%m-%d")
         cache_key = f"news_by_date:{date_str}:{','.join(platforms or [])}:{limit}:{include_url}"
-        cached = self.cache.get(cache_key, ttl=1800)  # 30分钟缓存
-        if cached:
-            return cached
+        return self.cache.get_or_load(
+            cache_key,
+            lambda: self._load_news_by_date(target_date, platforms, limit, include_url),
+            ttl=1800  # 历史数据缓存更久：30分钟
+        )
+
+    def _load_news_by_date(
+        self,
+        target_date: datetime,
+        platforms: Optional[List[str]],
+        limit: int,
+        include_url: bool
+    ) -> List[Dict]:
+        """读取指定日期的数据并整理为新闻列表（缓存未命中时调用）"""
+        date_str = target_date.strftime("%Y-%m-%d")
 
         # 读取指定日期的数据
         all_titles, id_to_name, timestamps = self.parser.read_all_titles_for_date(
@@ -176,9 +333,6 @@ class DataService:
         # 限制返回数量
         result = news_list[:limit]
 
-        # 缓存结果(历史数据缓存更久)
-        self.cache.set(cache_key, result)
-
         return result
 
     def search_news_by_keyword(
@@ -210,48 +364,33 @@ class DataService:
             # 默认搜索今天
             start_date = end_date = datetime.now()
 
-        # 收集所有匹配的新闻
+        # 收集所有匹配的新闻（已入库的日期由 SQLite 索引过滤，其余日期逐天解析）
         results = []
         platform_distribution = Counter()
 
-        # 遍历日期范围
-        current_date = start_date
-        while current_date <= end_date:
-            try:
-                all_titles, id_to_name, _ = self.parser.read_all_titles_for_date(
-                    date=current_date,
-                    platform_ids=platforms
-                )
-
-                # 搜索包含关键词的标题
-                for platform_id, titles in all_titles.items():
-                    platform_name = id_to_name.get(platform_id, platform_id)
-
-                    for title, info in titles.items():
-                        if keyword.lower() in title.lower():
-                            # 计算平均排名
-                            avg_rank = sum(info["ranks"]) / len(info["ranks"]) if info["ranks"] else 0
-
-                            results.append({
-                                "title": title,
-                                "platform": platform_id,
-                                "platform_name": platform_name,
-                                "ranks": info["ranks"],
-                                "count": len(info["ranks"]),
-                                "avg_rank": round(avg_rank, 2),
-                                "url": info.get("url", ""),
-                                "mobileUrl": info.get("mobileUrl", ""),
-                                "date": current_date.strftime("%Y-%m-%d")
-                            })
-
-                            platform_distribution[platform_id] += 1
-
-            except DataNotFoundError:
-                # 该日期没有数据,继续下一天
-                pass
-
-            # 下一天
-            current_date += timedelta(days=1)
+        for date_str, all_titles, id_to_name in self.get_titles_for_range(
+            start_date, end_date, platforms=platforms, keyword=keyword
+        ):
+            for platform_id, titles in all_titles.items():
+                platform_name = id_to_name.get(platform_id, platform_id)
+
+                for title, info in titles.items():
+                    # 计算平均排名
+                    avg_rank = sum(info["ranks"]) / len(info["ranks"]) if info["ranks"] else 0
+
+                    results.append({
+                        "title": title,
+                        "platform": platform_id,
+                        "platform_name": platform_name,
+                        "ranks": info["ranks"],
+                        "count": len(info["ranks"]),
+                        "avg_rank": round(avg_rank, 2),
+                        "url": info.get("url", ""),
+                        "mobileUrl": info.get("mobileUrl", ""),
+                        "date": date_str
+                    })
+
+                    platform_distribution[platform_id] += 1
 
         if not results:
             raise DataNotFoundError(
@@ -303,12 +442,15 @@ class DataService:
         Raises:
             DataNotFoundError: 数据不存在
         """
-        # 尝试从缓存获取
         cache_key = f"trending_topics:{top_n}:{mode}"
-        cached = self.cache.get(cache_key, ttl=1800)  # 30分钟缓存
-        if cached:
-            return cached
+        return self.cache.get_or_load(
+            cache_key,
+            lambda: self._load_trending_topics(top_n, mode),
+            ttl=1800  # 30分钟缓存
+        )
 
+    def _load_trending_topics(self, top_n: int, mode: str) -> Dict:
+        """统计今天数据中的关注词频率（缓存未命中时调用）"""
         # 读取今天的数据
         all_titles, id_to_name, timestamps = self.parser.read_all_titles_for_date()
 
@@ -395,9 +537,6 @@ class DataService:
             "description": self._get_mode_description(mode)
         }
 
-        # 缓存结果
-        self.cache.set(cache_key, result)
-
         return result
 
     def _get_mode_description(self, mode: str) -> str:
@@ -421,12 +560,15 @@ class DataService:
         Raises:
             FileParseError: 配置文件解析错误
         """
-        # 尝试从缓存获取
         cache_key = f"config:{section}"
-        cached = self.cache.get(cache_key, ttl=3600)  # 1小时缓存
-        if cached:
-            return cached
+        return self.cache.get_or_load(
+            cache_key,
+            lambda: self._load_current_config(section),
+            ttl=3600  # 1小时缓存
+        )
 
+    def _load_current_config(self, section: str) -> Dict:
+        """解析配置文件并提取指定配置节（缓存未命中时调用）"""
         # 解析配置文件
         config_data = self.parser.parse_yaml_config()
         word_groups = self.parser.parse_frequency_words()
@@ -490,11 +632,20 @@ class DataService:
         else:
             result = {}
 
-        # 缓存结果
-        self.cache.set(cache_key, result)
-
         return result
 
+    def get_weight_config(self) -> Optional[Dict]:
+        """
+        获取新闻权重配置（config.yaml 的 weight 节）
+
+        Returns:
+            {rank_weight, frequency_weight, hotness_weight}，配置文件无法读取时返回 None（使用默认权重）
+        """
+        try:
+            return self.get_current_config("weights")
+        except MCPError:
+            return None
+
     def get_available_date_range(self) -> Tuple[Optional[datetime], Optional[datetime]]:
         """
         扫描 output 目录，返回实际可用的日期范围
@@ -600,5 +751,51 @@ class DataService:
                 "latest_record": latest_record.strftime("%Y-%m-%d") if latest_record else None,
             },
             "cache": self.cache.get_stats(),
+            "crawler_health": self.get_crawler_health(),
             "health": "healthy"
         }
+
+    def get_crawler_health(self) -> Dict:
+        """
+        读取爬虫写入的平台熔断状态
+
+        Returns:
+            熔断状态字典，包含被隔离（熔断中）的平台列表
+        """
+        state_file = self.parser.project_root / "output" / ".crawler_state" / "circuit_breaker.json"
+
+        if not state_file.exists():
+            return {
+                "quarantined_platforms": [],
+                "platforms": {},
+                "updated_at": None
+            }
+
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except Exception as e:
+            return {
+                "quarantined_platforms": [],
+                "platforms": {},
+                "updated_at": None,
+                "error": f"熔断状态文件读取失败: {e}"
+            }
+
+        platforms = {}
+        quarantined = []
+        for platform_id, entry in state.get("platforms", {}).items():
+            platforms[platform_id] = {
+                "state": entry.get("state", "closed"),
+                "consecutive_failures": entry.get("failures", 0),
+                "last_failure": entry.get("last_failure"),
+                "next_probe_time": entry.get("next_probe_time")
+            }
+            if entry.get("state", "closed") != "closed":
+                quarantined.append(platform_id)
+
+        return {
+            "quarantined_platforms": quarantined,
+            "platforms": platforms,
+            "updated_at": state.get("updated_at")
+        }
@@ -0,0 +1,96 @@
+"""
+HTTP 连接池服务
+
+为 MCP 侧的外部请求提供共享的 keep-alive 会话，复用 TCP/TLS 连接。
+"""
+
+from threading import Lock
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HttpClientService:
+    """HTTP 连接池服务类"""
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 8):
+        """
+        初始化连接池
+
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机的最大连接数
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = Lock()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        通过共享会话发送 GET 请求
+
+        Args:
+            url: 请求地址
+            **kwargs: 透传给 requests 的参数
+
+        Returns:
+            响应对象
+        """
+        return self.session.get(url, **kwargs)
+
+    def get_connection_stats(self) -> Dict[str, int]:
+        """
+        获取连接池累计统计
+
+        Returns:
+            统计信息字典：requests（请求数）、new_connections（新建连接数）、reused（复用次数）
+        """
+        requests_count = 0
+        new_connections = 0
+
+        with self._lock:
+            for adapter in set(self.session.adapters.values()):
+                managers = [adapter.poolmanager] + list(getattr(adapter, "proxy_manager", {}).values())
+                for manager in managers:
+                    if manager is None:
+                        continue
+                    for key in list(manager.pools.keys()):
+                        pool = manager.pools.get(key)
+                        if pool is None:
+                            continue
+                        requests_count += pool.num_requests
+                        new_connections += pool.num_connections
+
+        return {
+            "requests": requests_count,
+            "new_connections": new_connections,
+            "reused": max(0, requests_count - new_connections)
+        }
+
+    def close(self) -> None:
+        """关闭会话并释放连接"""
+        self.session.close()
+
+
+# 全局连接池实例
+_global_http_client = None
+
+
+def get_http_client() -> HttpClientService:
+    """
+    获取全局 HTTP 连接池实例
+
+    Returns:
+        全局 HTTP 连接池服务实例
+    """
+    global _global_http_client
+    if _global_http_client is None:
+        _global_http_client = HttpClientService()
+    return _global_http_client
@@ -0,0 +1,166 @@
+"""
+SQLite 新闻库读取服务
+
+读取 main.py 在 storage.sqlite 开启时写入的 output/news.db，
+按日期、平台、标题索引回答跨日期的范围查询，避免逐天重新解析快照文件。
+
+表结构：
+  - platforms(id, platform_id, name)
+  - titles(id, platform_ref, title, title_lower, url, mobile_url)
+  - snapshots(date, snapshot_time, crawl_time)
+  - appearances(title_id, platform_ref, date, snapshot_time, rank)
+"""
+
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+
+NEWS_DB_FILE_NAME = "news.db"
+
+
+class NewsDatabaseReader:
+    """SQLite 新闻库读取器（只读）"""
+
+    def __init__(self, path: Path):
+        """
+        初始化读取器
+
+        Args:
+            path: news.db 文件路径
+        """
+        self.path = Path(path)
+        self._conn = None
+        self._lock = Lock()
+
+    def available(self) -> bool:
+        """新闻库文件是否存在"""
+        return self.path.exists()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取只读连接（首次调用时打开）"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                f"{self.path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False
+            )
+        return self._conn
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """执行查询并返回全部结果"""
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def snapshot_names(self, start: str, end: str) -> Dict[str, Set[str]]:
+        """
+        获取日期范围内已入库的快照名
+
+        Args:
+            start: 开始日期 YYYY-MM-DD
+            end: 结束日期 YYYY-MM-DD
+
+        Returns:
+            {date: {snapshot_time, ...}}
+        """
+        names: Dict[str, Set[str]] = {}
+        for date, snapshot_time in self._query(
+            "SELECT date, snapshot_time FROM snapshots WHERE date BETWEEN ? AND ?",
+            (start, end)
+        ):
+            names.setdefault(date, set()).add(snapshot_time)
+        return names
+
+    def _filters(
+        self,
+        dates: List[str],
+        platform_ids: Optional[List[str]],
+        keyword: Optional[str]
+    ) -> Tuple[str, List]:
+        """拼接 WHERE 条件（日期走 (date, platform_ref) 索引）"""
+        clauses = [f"a.date IN ({','.join('?' * len(dates))})"]
+        params: List = list(dates)
+        if platform_ids:
+            clauses.append(f"p.platform_id IN ({','.join('?' * len(platform_ids))})")
+            params.extend(platform_ids)
+        if keyword:
+            clauses.append("instr(t.title_lower, ?) > 0")
+            params.append(keyword.lower())
+        return " AND ".join(clauses), params
+
+    def query_titles(
+        self,
+        dates: List[str],
+        platform_ids: Optional[List[str]] = None,
+        keyword: Optional[str] = None
+    ) -> Dict[str, Tuple[Dict, Dict]]:
+        """
+        查询多个日期的标题数据
+
+        Args:
+            dates: 日期列表 YYYY-MM-DD
+            platform_ids: 平台ID列表，None表示所有平台
+            keyword: 标题包含的关键词（不区分大小写），None表示不过滤
+
+        Returns:
+            {date: (all_titles, id_to_name)}，结构与 ParserService.read_all_titles_for_date 相同
+        """
+        if not dates:
+            return {}
+
+        where, params = self._filters(dates, platform_ids, keyword)
+        rows = self._query(
+            "SELECT a.date, p.platform_id, p.name, t.title, t.url, t.mobile_url, a.rank "
+            "FROM appearances a "
+            "JOIN titles t ON t.id = a.title_id "
+            "JOIN platforms p ON p.id = a.platform_ref "
+            f"WHERE {where} "
+            "ORDER BY a.date, a.snapshot_time, a.platform_ref, a.rank",
+            tuple(params)
+        )
+
+        result: Dict[str, Tuple[Dict, Dict]] = {}
+        for date, platform_id, platform_name, title, url, mobile_url, rank in rows:
+            if date not in result:
+                result[date] = ({}, {})
+            all_titles, id_to_name = result[date]
+            id_to_name[platform_id] = platform_name
+            titles = all_titles.setdefault(platform_id, {})
+            if title in titles:
+                titles[title]["ranks"].append(rank)
+            else:
+                titles[title] = {"ranks": [rank], "url": url, "mobileUrl": mobile_url}
+        return result
+
+    def count_titles(self, dates: List[str], keyword: str) -> Dict[str, int]:
+        """
+        统计每天包含关键词的不同标题数
+
+        Args:
+            dates: 日期列表 YYYY-MM-DD
+            keyword: 关键词（不区分大小写）
+
+        Returns:
+            {date: count}
+        """
+        if not dates:
+            return {}
+
+        where, params = self._filters(dates, None, keyword)
+        rows = self._query(
+            "SELECT a.date, COUNT(DISTINCT a.title_id) "
+            "FROM appearances a "
+            "JOIN titles t ON t.id = a.title_id "
+            "JOIN platforms p ON p.id = a.platform_ref "
+            f"WHERE {where} GROUP BY a.date",
+            tuple(params)
+        )
+        return dict(rows)
+
+    def close(self) -> None:
+        """关闭连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
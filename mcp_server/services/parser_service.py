@@ -5,14 +5,27 @@
 """
 
 import re
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
+from threading import Lock
 
 import yaml
 
 from ..utils.errors import FileParseError, DataNotFoundError
-from .cache_service import get_cache
+from .cache_service import SingleFlight
+from .snapshot_store import SNAPSHOT_FILE_NAME, SnapshotStoreReader
+from .title_index import TitleIndex
+
+
+# 内容未变化的平台在快照中只写入对完整快照的引用，格式: "@SAME_AS HH时MM分"
+SAME_AS_MARKER = "@SAME_AS "
+
+# 文件级解析缓存的最大文件数（约为数天的快照量）
+FILE_CACHE_SIZE = 128
+# 常驻内存的日视图天数（快照库读取器按同样的天数保留）
+DAY_VIEW_CACHE_SIZE = 32
 
 
 class ParserService:
@@ -32,8 +45,17 @@ class ParserService:
         else:
             self.project_root = Path(project_root)
 
-        # 初始化缓存服务
-        self.cache = get_cache()
+        # 按日期复用的快照库读取器，按最近使用保留 DAY_VIEW_CACHE_SIZE 天
+        self._snapshot_stores: "OrderedDict[str, SnapshotStoreReader]" = OrderedDict()
+        self._store_lock = Lock()
+
+        # 文件级解析缓存：path -> ((size, mtime_ns), (titles_by_id, id_to_name, refs))
+        self._file_cache: "OrderedDict[Path, Tuple]" = OrderedDict()
+        # 日视图：date_folder -> 全平台合并结果及标题倒排索引，新快照出现时只合并新增部分
+        self._day_views: "OrderedDict[str, Dict]" = OrderedDict()
+        self._view_lock = Lock()
+        # 同一天的并发加载只合并一次
+        self._view_inflight = SingleFlight()
 
     @staticmethod
     def clean_title(title: str) -> str:
@@ -52,17 +74,12 @@ class ParserService:
         title = title.strip()
         return title
 
-    def parse_txt_file(self, file_path: Path) -> Tuple[Dict, Dict]:
+    def _parse_txt_content(self, file_path: Path) -> Tuple[Dict, Dict, Dict]:
         """
-        解析单个txt文件的标题数据
-
-        Args:
-            file_path: txt文件路径
+        解析单个txt文件（不解析引用，不使用缓存）
 
         Returns:
-            (titles_by_id, id_to_name) 元组
-            - titles_by_id: {platform_id: {title: {ranks, url, mobileUrl}}}
-            - id_to_name: {platform_id: platform_name}
+            (titles_by_id, id_to_name, refs) 元组，refs 为 {platform_id: 被引用的快照名}
 
         Raises:
             FileParseError: 文件解析错误
@@ -72,6 +89,7 @@ class ParserService:
 
         titles_by_id = {}
         id_to_name = {}
+        refs = {}
 
         try:
             with open(file_path, "r", encoding="utf-8") as f:
@@ -97,6 +115,11 @@ class ParserService:
                         source_id = header_line
                         id_to_name[source_id] = source_id
 
+                    # 内容未变化的平台：记录引用，稍后解析
+                    if lines[1].strip().startswith(SAME_AS_MARKER):
+                        refs[source_id] = lines[1].strip()[len(SAME_AS_MARKER):].strip()
+                        continue
+
                     titles_by_id[source_id] = {}
 
                     # 解析标题行
@@ -141,7 +164,105 @@ class ParserService:
         except Exception as e:
             raise FileParseError(str(file_path), str(e))
 
-        return titles_by_id, id_to_name
+        return titles_by_id, id_to_name, refs
+
+    def _parse_txt_cached(self, file_path: Path) -> Tuple[Dict, Dict, Dict]:
+        """
+        按 (路径, 大小, 修改时间) 缓存的txt解析结果
+
+        返回的字典与缓存共享，调用方不得修改。
+
+        Raises:
+            FileParseError: 文件不存在或解析错误
+        """
+        try:
+            stat = file_path.stat()
+        except OSError:
+            raise FileParseError(str(file_path), "文件不存在")
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        with self._view_lock:
+            cached = self._file_cache.get(file_path)
+            if cached and cached[0] == signature:
+                self._file_cache.move_to_end(file_path)
+                return cached[1]
+
+        parsed = self._parse_txt_content(file_path)
+        with self._view_lock:
+            self._file_cache[file_path] = (signature, parsed)
+            self._file_cache.move_to_end(file_path)
+            while len(self._file_cache) > FILE_CACHE_SIZE:
+                self._file_cache.popitem(last=False)
+        return parsed
+
+    def _resolve_txt_snapshot(self, file_path: Path) -> Tuple[Dict, Dict]:
+        """读取txt快照并把 "@SAME_AS" 引用替换为被引用快照中的数据（结果与缓存共享，只读）"""
+        titles_by_id, id_to_name, refs = self._parse_txt_cached(file_path)
+        if not refs:
+            return titles_by_id, id_to_name
+        resolved = dict(titles_by_id)
+        for source_id, ref_name in refs.items():
+            ref_path = file_path.parent / f"{ref_name}.txt"
+            if not ref_path.exists():
+                continue
+            ref_titles = self._parse_txt_cached(ref_path)[0]
+            if source_id in ref_titles:
+                resolved[source_id] = ref_titles[source_id]
+        return resolved, id_to_name
+
+    def parse_txt_file(self, file_path: Path, resolve_refs: bool = True) -> Tuple[Dict, Dict]:
+        """
+        解析单个txt文件的标题数据
+
+        Args:
+            file_path: txt文件路径
+            resolve_refs: 是否解析 "@SAME_AS" 引用（从被引用的快照中读取该平台数据）
+
+        Returns:
+            (titles_by_id, id_to_name) 元组
+            - titles_by_id: {platform_id: {title: {ranks, url, mobileUrl}}}
+            - id_to_name: {platform_id: platform_name}
+
+        Raises:
+            FileParseError: 文件解析错误
+        """
+        if resolve_refs:
+            titles_by_id, id_to_name = self._resolve_txt_snapshot(file_path)
+        else:
+            titles_by_id, id_to_name, _ = self._parse_txt_cached(file_path)
+        # 返回副本，避免调用方修改缓存内容
+        return {
+            source_id: {title: {**info, "ranks": list(info["ranks"])} for title, info in titles.items()}
+            for source_id, titles in titles_by_id.items()
+        }, dict(id_to_name)
+
+    def get_snapshot_store(self, date_folder: str) -> SnapshotStoreReader:
+        """
+        获取某天的快照库读取器（复用已读取的内容，只增量读取新追加的帧）
+
+        Args:
+            date_folder: 日期文件夹名称
+
+        Returns:
+            快照库读取器（文件不存在时为空）
+        """
+        path = self.project_root / "output" / date_folder / SNAPSHOT_FILE_NAME
+        with self._store_lock:
+            reader = self._snapshot_stores.get(date_folder)
+            if reader is None:
+                reader = SnapshotStoreReader(path)
+                self._snapshot_stores[date_folder] = reader
+                while len(self._snapshot_stores) > DAY_VIEW_CACHE_SIZE:
+                    self._snapshot_stores.popitem(last=False)
+            else:
+                self._snapshot_stores.move_to_end(date_folder)
+        try:
+            return reader.load()
+        except FileParseError as e:
+            print(f"Warning: {e.message}")
+            with self._store_lock:
+                self._snapshot_stores.pop(date_folder, None)
+            return SnapshotStoreReader(self.project_root / "output" / date_folder / "__invalid__")
 
     def get_date_folder_name(self, date: datetime = None) -> str:
         """
@@ -157,13 +278,159 @@ class ParserService:
             date = datetime.now()
         return date.strftime("%Y年%m月%d日")
 
+    def _snapshot_sources(self, date_folder: str) -> Dict[str, Tuple]:
+        """
+        列出某天的快照来源及其签名（快照库优先，库中没有的再用 txt 文件）
+
+        Returns:
+            {快照名: (签名, txt路径或None)}
+
+        Raises:
+            DataNotFoundError: 数据目录不存在
+        """
+        txt_dir = self.project_root / "output" / date_folder / "txt"
+        store = self.get_snapshot_store(date_folder)
+
+        if not txt_dir.exists() and not store.exists():
+            raise DataNotFoundError(
+                f"未找到 {date_folder} 的数据目录",
+                suggestion="请先运行爬虫或检查日期是否正确"
+            )
+
+        sources = {name: (("store", store.get_timestamp(name)), None) for name in store.names()}
+        if txt_dir.exists():
+            for txt_file in txt_dir.glob("*.txt"):
+                if txt_file.stem not in sources:
+                    stat = txt_file.stat()
+                    sources[txt_file.stem] = (("txt", stat.st_size, stat.st_mtime_ns), txt_file)
+        return sources
+
+    def _merge_into_view(self, view: Dict, date_folder: str, names: List[str], sources: Dict[str, Tuple]) -> None:
+        """
+        按快照名顺序把快照合并进日视图（写时复制：已发布的平台字典和标题条目不会被原地修改）
+
+        Args:
+            view: 日视图（新副本，all_titles / id_to_name / timestamps 为本次新建的字典，index 只追加）
+            date_folder: 日期文件夹名称
+            names: 待合并的快照名（已排序，且都晚于视图中已有的快照）
+            sources: 快照来源
+        """
+        all_titles = view["all_titles"]
+        store = self.get_snapshot_store(date_folder) if any(sources[n][1] is None for n in names) else None
+        copied_platforms = set()
+        owned = set()
+
+        for name in names:
+            signature, txt_file = sources[name]
+            view["sources"][name] = signature
+            try:
+                if txt_file is None:
+                    titles_by_id, file_id_to_name = store.get_snapshot(name)
+                    timestamp = store.get_timestamp(name)
+                else:
+                    titles_by_id, file_id_to_name = self._resolve_txt_snapshot(txt_file)
+                    timestamp = txt_file.stat().st_mtime
+            except Exception as e:
+                # 忽略单个快照的解析错误，继续处理其他快照
+                print(f"Warning: 解析快照 {date_folder}/{name} 失败: {e}")
+                continue
+
+            view["id_to_name"].update(file_id_to_name)
+
+            for platform_id, titles in titles_by_id.items():
+                if platform_id not in copied_platforms:
+                    all_titles[platform_id] = dict(all_titles.get(platform_id, {}))
+                    copied_platforms.add(platform_id)
+                platform_titles = all_titles[platform_id]
+
+                for title, info in titles.items():
+                    existing = platform_titles.get(title)
+                    if existing is None:
+                        platform_titles[title] = {**info, "ranks": list(info["ranks"])}
+                        owned.add((platform_id, title))
+                        view["index"].add(platform_id, title)
+                    elif (platform_id, title) in owned:
+                        existing["ranks"].extend(info["ranks"])
+                    else:
+                        # 合并排名
+                        platform_titles[title] = {**existing, "ranks": existing["ranks"] + info["ranks"]}
+                        owned.add((platform_id, title))
+
+            # 记录快照时间戳（键名沿用 txt 文件名）
+            view["timestamps"][f"{name}.txt"] = timestamp
+
+    def get_day_view(self, date_folder: str) -> Dict:
+        """
+        获取某天所有平台合并后的日视图
+
+        日视图按快照签名（快照库写入时间 / txt 大小与修改时间）校验：
+        只新增了更晚的快照时在上一版基础上合并新增部分，已有快照变化或缺失时重新合并（单个文件的解析结果仍走缓存）。
+        返回的日视图发布后不再修改，可在多个调用方之间共享，但调用方不得修改其内容。
+        同一天的并发调用共享同一次校验与合并。
+
+        Args:
+            date_folder: 日期文件夹名称
+
+        Returns:
+            {"sources", "all_titles", "id_to_name", "timestamps", "index"}
+
+        Raises:
+            DataNotFoundError: 数据不存在
+        """
+        return self._view_inflight.do(date_folder, lambda: self._load_day_view(date_folder))
+
+    def _load_day_view(self, date_folder: str) -> Dict:
+        """校验并更新某天的日视图（由 get_day_view 合并并发调用）"""
+        sources = self._snapshot_sources(date_folder)
+        if not sources:
+            raise DataNotFoundError(
+                f"{date_folder} 没有数据文件",
+                suggestion="请等待爬虫任务完成"
+            )
+
+        with self._view_lock:
+            view = self._day_views.get(date_folder)
+            if view is not None:
+                self._day_views.move_to_end(date_folder)
+
+        base = None
+        if view is not None:
+            known = view["sources"]
+            new_names = sorted(name for name in sources if name not in known)
+            unchanged = all(sources.get(name, (None,))[0] == sig for name, sig in known.items())
+            if unchanged and not new_names:
+                return view
+            # 只追加了更晚的快照：在上一版基础上合并；否则整体重新合并
+            if unchanged and (not known or new_names[0] > max(known)):
+                base = view
+
+        if base is None:
+            base = {"sources": {}, "all_titles": {}, "id_to_name": {}, "timestamps": {}, "index": TitleIndex()}
+            new_names = sorted(sources)
+        new_view = {
+            "sources": dict(base["sources"]),
+            "all_titles": dict(base["all_titles"]),
+            "id_to_name": dict(base["id_to_name"]),
+            "timestamps": dict(base["timestamps"]),
+            # 索引只追加，增量合并时沿用上一版（旧版本视图查询时按自身 all_titles 过滤）
+            "index": base["index"],
+        }
+        self._merge_into_view(new_view, date_folder, new_names, sources)
+
+        with self._view_lock:
+            self._day_views[date_folder] = new_view
+            self._day_views.move_to_end(date_folder)
+            while len(self._day_views) > DAY_VIEW_CACHE_SIZE:
+                self._day_views.popitem(last=False)
+        return new_view
+
     def read_all_titles_for_date(
         self,
         date: datetime = None,
         platform_ids: Optional[List[str]] = None
     ) -> Tuple[Dict, Dict, Dict]:
         """
-        读取指定日期的所有标题文件（带缓存）
+        读取指定日期的所有标题文件（基于共享的日视图）
 
         Args:
             date: 日期对象，默认为今天
@@ -174,90 +441,91 @@ class ParserService:
             - all_titles: {platform_id: {title: {ranks, url, mobileUrl, ...}}}
             - id_to_name: {platform_id: platform_name}
             - all_timestamps: {filename: timestamp}
+            返回内容与日视图共享，调用方不得修改
 
         Raises:
             DataNotFoundError: 数据不存在
         """
-        # 生成缓存键
-        date_str = self.get_date_folder_name(date)
-        platform_key = ','.join(sorted(platform_ids)) if platform_ids else 'all'
-        cache_key = f"read_all_titles:{date_str}:{platform_key}"
-
-        # 尝试从缓存获取
-        # 对于历史数据（非今天），使用更长的缓存时间（1小时）
-        # 对于今天的数据，使用较短的缓存时间（15分钟），因为可能有新数据
-        is_today = (date is None) or (date.date() == datetime.now().date())
-        ttl = 900 if is_today else 3600  # 15分钟 vs 1小时
-
-        cached = self.cache.get(cache_key, ttl=ttl)
-        if cached:
-            return cached
-
-        # 缓存未命中，读取文件
         date_folder = self.get_date_folder_name(date)
-        txt_dir = self.project_root / "output" / date_folder / "txt"
+        view = self.get_day_view(date_folder)
+        all_titles = self._project_platforms(view, date_folder, platform_ids)
+        return all_titles, view["id_to_name"], view["timestamps"]
 
-        if not txt_dir.exists():
-            raise DataNotFoundError(
-                f"未找到 {date_folder} 的数据目录",
-                suggestion="请先运行爬虫或检查日期是否正确"
-            )
-
-        all_titles = {}
-        id_to_name = {}
-        all_timestamps = {}
-
-        # 读取所有txt文件
-        txt_files = sorted(txt_dir.glob("*.txt"))
-
-        if not txt_files:
-            raise DataNotFoundError(
-                f"{date_folder} 没有数据文件",
-                suggestion="请等待爬虫任务完成"
-            )
-
-        for txt_file in txt_files:
-            try:
-                titles_by_id, file_id_to_name = self.parse_txt_file(txt_file)
-
-                # 更新id_to_name
-                id_to_name.update(file_id_to_name)
+    def read_titles_with_index(
+        self,
+        date: datetime = None,
+        platform_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict, Dict, TitleIndex]:
+        """
+        读取指定日期的标题及同一版日视图的标题索引（供相似度搜索生成候选）
 
-                # 合并标题数据
-                for platform_id, titles in titles_by_id.items():
-                    # 如果指定了平台过滤
-                    if platform_ids and platform_id not in platform_ids:
-                        continue
+        Args:
+            date: 日期对象，默认为今天
+            platform_ids: 平台ID列表，None表示所有平台
 
-                    if platform_id not in all_titles:
-                        all_titles[platform_id] = {}
+        Returns:
+            (all_titles, id_to_name, index) 元组，返回内容与日视图共享，调用方不得修改
 
-                    for title, info in titles.items():
-                        if title in all_titles[platform_id]:
-                            # 合并排名
-                            all_titles[platform_id][title]["ranks"].extend(info["ranks"])
-                        else:
-                            all_titles[platform_id][title] = info.copy()
+        Raises:
+            DataNotFoundError: 数据不存在
+        """
+        date_folder = self.get_date_folder_name(date)
+        view = self.get_day_view(date_folder)
+        all_titles = self._project_platforms(view, date_folder, platform_ids)
+        return all_titles, view["id_to_name"], view["index"]
 
-                # 记录文件时间戳
-                all_timestamps[txt_file.name] = txt_file.stat().st_mtime
+    def _project_platforms(self, view: Dict, date_folder: str, platform_ids: Optional[List[str]]) -> Dict:
+        """
+        按平台过滤日视图（只是投影，不复制标题数据）
 
-            except Exception as e:
-                # 忽略单个文件的解析错误，继续处理其他文件
-                print(f"Warning: 解析文件 {txt_file} 失败: {e}")
-                continue
+        Raises:
+            DataNotFoundError: 过滤后没有数据
+        """
+        all_titles = view["all_titles"]
+        if platform_ids:
+            all_titles = {pid: all_titles[pid] for pid in platform_ids if pid in all_titles}
 
         if not all_titles:
             raise DataNotFoundError(
                 f"{date_folder} 没有有效的数据",
                 suggestion="请检查数据文件格式或重新运行爬虫"
             )
+        return all_titles
+
+    def search_titles_for_date(
+        self,
+        keyword: str,
+        date: datetime = None,
+        platform_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        查找指定日期包含关键词的标题（不区分大小写，走日视图的倒排索引）
 
-        # 缓存结果
-        result = (all_titles, id_to_name, all_timestamps)
-        self.cache.set(cache_key, result)
+        Args:
+            keyword: 关键词
+            date: 日期对象，默认为今天
+            platform_ids: 平台ID列表，None表示所有平台
 
-        return result
+        Returns:
+            (all_titles, id_to_name) 元组，all_titles 只包含匹配的标题，
+            平台和标题的顺序与 read_all_titles_for_date 相同；返回的标题条目与日视图共享，调用方不得修改
+
+        Raises:
+            DataNotFoundError: 数据不存在
+        """
+        date_folder = self.get_date_folder_name(date)
+        view = self.get_day_view(date_folder)
+        all_titles = self._project_platforms(view, date_folder, platform_ids)
+
+        hits = view["index"].search(keyword, all_titles.keys())
+        matched = {}
+        for platform_id, titles in all_titles.items():
+            matched[platform_id] = {
+                title: titles[title]
+                for title in hits.get(platform_id, [])
+                if title in titles
+            }
+        return matched, view["id_to_name"]
 
     def parse_yaml_config(self, config_path: str = None) -> dict:
         """
@@ -353,3 +621,29 @@ class ParserService:
             raise FileParseError(str(words_file), str(e))
 
         return word_groups
+
+
+# 按项目根目录共享的解析服务实例
+_global_parsers = {}
+_global_parsers_lock = Lock()
+
+
+def get_parser(project_root: str = None) -> ParserService:
+    """
+    获取共享的解析服务实例
+
+    同一项目根目录的所有数据服务共用一个实例，从而共享文件解析缓存、日视图和并发加载合并。
+
+    Args:
+        project_root: 项目根目录，默认为当前目录的父目录
+
+    Returns:
+        解析服务实例
+    """
+    key = str(Path(project_root).resolve()) if project_root is not None else None
+    with _global_parsers_lock:
+        parser = _global_parsers.get(key)
+        if parser is None:
+            parser = ParserService(project_root)
+            _global_parsers[key] = parser
+    return parser
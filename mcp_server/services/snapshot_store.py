@@ -0,0 +1,192 @@
+"""
+快照库读取服务
+
+读取 main.py 按天追加写入的二进制快照库 output/<日期>/snapshots.bin。
+
+文件格式：MAGIC 之后是若干帧，每帧为 类型(1字节) + 长度(u32) + 内容
+  - P: 新增平台 [id, name, ...]
+  - T: 新增标题 [title, url, mobileUrl, ...]
+  - S: 快照 名称 + 时间戳 + 行数 + 平台编号(u16[]) + 标题编号(u32[]) + 排名(u16[]) + 失败平台编号(u16[])
+"""
+
+import struct
+import sys
+from array import array
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.errors import FileParseError
+
+
+SNAPSHOT_FILE_NAME = "snapshots.bin"
+MAGIC = b"TRSS\x01"
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _unpack_array(typecode: str, buf: bytes, offset: int, count: int) -> Tuple[array, int]:
+    """从缓冲区读取定长数值数组"""
+    arr = array(typecode)
+    end = offset + arr.itemsize * count
+    arr.frombytes(buf[offset:end])
+    if not _LITTLE_ENDIAN:
+        arr.byteswap()
+    return arr, end
+
+
+def _unpack_strings(buf: bytes, offset: int) -> Tuple[List[str], int]:
+    """读取字符串列表：数量(u32) + 长度数组(u32[]) + UTF-8 内容"""
+    (count,) = struct.unpack_from("<I", buf, offset)
+    lengths, offset = _unpack_array("I", buf, offset + 4, count)
+    strings = []
+    for n in lengths:
+        strings.append(buf[offset:offset + n].decode("utf-8"))
+        offset += n
+    return strings, offset
+
+
+class SnapshotStoreReader:
+    """快照库读取器（只读，支持增量读取新追加的帧）"""
+
+    def __init__(self, path: Path):
+        """
+        初始化读取器
+
+        Args:
+            path: snapshots.bin 文件路径
+        """
+        self.path = Path(path)
+        self.platforms: List[Tuple[str, str]] = []
+        self.titles: List[Tuple[str, str, str]] = []
+        self.snapshots: Dict[str, Dict] = {}
+        self._valid_size = 0
+        self._lock = Lock()
+
+    def exists(self) -> bool:
+        """快照库文件是否存在"""
+        return self.path.exists()
+
+    def load(self) -> "SnapshotStoreReader":
+        """
+        读取自上次加载以来追加的帧，末尾不完整的帧会被忽略
+
+        Returns:
+            读取器自身
+
+        Raises:
+            FileParseError: 文件格式不正确
+        """
+        with self._lock:
+            if not self.path.exists():
+                return self
+
+            try:
+                with open(self.path, "rb") as f:
+                    if self._valid_size == 0:
+                        header = f.read(len(MAGIC))
+                        # 文件头尚未写完（写入方刚创建文件或创建后中断），按空库处理
+                        if len(header) < len(MAGIC):
+                            return self
+                        if header != MAGIC:
+                            raise FileParseError(str(self.path), "快照库文件头不正确")
+                        self._valid_size = len(MAGIC)
+                    f.seek(self._valid_size)
+                    buf = f.read()
+            except OSError as e:
+                raise FileParseError(str(self.path), str(e))
+
+            offset = 0
+            while offset + 5 <= len(buf):
+                kind, length = struct.unpack_from("<cI", buf, offset)
+                if offset + 5 + length > len(buf):
+                    break
+                payload = buf[offset + 5:offset + 5 + length]
+
+                if kind == b"P":
+                    values, _ = _unpack_strings(payload, 0)
+                    for i in range(0, len(values), 2):
+                        self.platforms.append((values[i], values[i + 1]))
+                elif kind == b"T":
+                    values, _ = _unpack_strings(payload, 0)
+                    for i in range(0, len(values), 3):
+                        self.titles.append((values[i], values[i + 1], values[i + 2]))
+                elif kind == b"S":
+                    names, pos = _unpack_strings(payload, 0)
+                    crawl_time, rows = struct.unpack_from("<dI", payload, pos)
+                    platform_col, pos = _unpack_array("H", payload, pos + 12, rows)
+                    title_col, pos = _unpack_array("I", payload, pos, rows)
+                    rank_col, pos = _unpack_array("H", payload, pos, rows)
+                    # 同名快照以最后一次写入为准
+                    self.snapshots.pop(names[0], None)
+                    self.snapshots[names[0]] = {
+                        "time": crawl_time,
+                        "platform": platform_col,
+                        "title": title_col,
+                        "rank": rank_col
+                    }
+
+                offset += 5 + length
+
+            self._valid_size += offset
+
+        return self
+
+    def names(self) -> List[str]:
+        """
+        获取快照名列表
+
+        Returns:
+            按时间排序的快照名（HH时MM分）
+        """
+        return sorted(self.snapshots)
+
+    def get_snapshot(
+        self,
+        name: str,
+        platform_ids: Optional[List[str]] = None
+    ) -> Tuple[Dict, Dict]:
+        """
+        获取单个快照的数据
+
+        Args:
+            name: 快照名（HH时MM分）
+            platform_ids: 平台ID列表，None表示所有平台
+
+        Returns:
+            (titles_by_id, id_to_name) 元组，结构与 ParserService.parse_txt_file 相同
+        """
+        snap = self.snapshots[name]
+        titles_by_id = {}
+        id_to_name = {}
+
+        for p_no, t_no, rank in zip(snap["platform"], snap["title"], snap["rank"]):
+            platform_id, platform_name = self.platforms[p_no]
+            if platform_ids and platform_id not in platform_ids:
+                continue
+
+            if platform_id not in titles_by_id:
+                titles_by_id[platform_id] = {}
+                id_to_name[platform_id] = platform_name
+
+            title, url, mobile_url = self.titles[t_no]
+            if title not in titles_by_id[platform_id]:
+                titles_by_id[platform_id][title] = {
+                    "ranks": [rank],
+                    "url": url,
+                    "mobileUrl": mobile_url
+                }
+
+        return titles_by_id, id_to_name
+
+    def get_timestamp(self, name: str) -> float:
+        """
+        获取快照的爬取时间
+
+        Args:
+            name: 快照名
+
+        Returns:
+            Unix 时间戳
+        """
+        return self.snapshots[name]["time"]
@@ -0,0 +1,234 @@
+"""
+标题倒排索引
+
+按天为日视图中的标题建立倒排索引，用于不区分大小写的子串搜索。
+
+词项：
+  - 英文/数字：连续的 [0-9a-z] 组成的单词
+  - 其他字符（中文等）：连续片段内的相邻双字
+查询先用词项的倒排表求交集得到候选标题，再逐个校验子串是否真的出现。
+合并快照时只登记新标题，分词延迟到第一次查询时进行，不搜索的调用不承担建索引的开销。
+
+另有按字符计数的倒排表，为相似度搜索生成候选：SequenceMatcher.ratio() 的匹配字符数
+不会超过两段文本的字符多重集交集，因此交集给出的上界低于阈值的标题可以直接跳过。
+"""
+
+import re
+from collections import Counter
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# 英文单词与非英文片段（空白字符作为分隔，不产生词项）
+_WORD_PATTERN = re.compile(r"[0-9a-z]+")
+_GRAM_RUN_PATTERN = re.compile(r"[^\s0-9a-z]+")
+
+
+def _title_terms(text: str) -> Tuple[Set[str], Set[str]]:
+    """
+    提取小写文本的词项
+
+    Args:
+        text: 已转为小写的文本
+
+    Returns:
+        (单词集合, 双字集合)
+    """
+    words = set(_WORD_PATTERN.findall(text))
+    grams = set()
+    for run in _GRAM_RUN_PATTERN.findall(text):
+        for i in range(len(run) - 1):
+            grams.add(run[i:i + 2])
+    return words, grams
+
+
+def ratio_upper_bound(query_counts: Counter, query_len: int, text: str) -> float:
+    """
+    SequenceMatcher(None, query, text).ratio() 的上界（同 quick_ratio）
+
+    Args:
+        query_counts: 查询文本的字符计数
+        query_len: 查询文本长度
+        text: 待比较文本（与查询使用相同的大小写处理）
+
+    Returns:
+        相似度上界
+    """
+    total = query_len + len(text)
+    if not total:
+        return 1.0
+    common = 0
+    for ch, count in Counter(text).items():
+        query_count = query_counts.get(ch)
+        if query_count:
+            common += count if count < query_count else query_count
+    return 2.0 * common / total
+
+
+class TitleIndex:
+    """单日标题倒排索引（只追加，线程安全）"""
+
+    def __init__(self):
+        """初始化空索引"""
+        self._titles: List[str] = []
+        self._lowered: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # 标题编号 -> [(加入顺序, platform_id)]
+        self._placements: List[List[Tuple[int, str]]] = []
+        self._word_postings: Dict[str, Set[int]] = {}
+        self._gram_postings: Dict[str, Set[int]] = {}
+        # 字符 -> [(标题编号, 该字符在小写标题中的个数)]
+        self._char_postings: Dict[str, List[Tuple[int, int]]] = {}
+        # 小写后长度发生变化的标题（区分大小写比较时不能用小写计数求上界）
+        self._irregular: Set[int] = set()
+        self._seq = 0
+        # 已登记但尚未分词的 (platform_id, title)
+        self._pending: List[Tuple[str, str]] = []
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._flush()
+            return len(self._titles)
+
+    def add(self, platform_id: str, title: str) -> None:
+        """
+        登记标题出现在某个平台（按登记顺序保留平台内的标题顺序）
+
+        Args:
+            platform_id: 平台ID
+            title: 标题
+        """
+        with self._lock:
+            self._pending.append((platform_id, title))
+
+    def _flush(self) -> None:
+        """把已登记的标题加入倒排表（调用方需持有锁）"""
+        for platform_id, title in self._pending:
+            title_id = self._ids.get(title)
+            if title_id is None:
+                title_id = len(self._titles)
+                lowered = title.lower()
+                self._ids[title] = title_id
+                self._titles.append(title)
+                self._lowered.append(lowered)
+                self._placements.append([])
+
+                words, grams = _title_terms(lowered)
+                for word in words:
+                    self._word_postings.setdefault(word, set()).add(title_id)
+                for gram in grams:
+                    self._gram_postings.setdefault(gram, set()).add(title_id)
+                for ch, count in Counter(lowered).items():
+                    self._char_postings.setdefault(ch, []).append((title_id, count))
+                if len(lowered) != len(title):
+                    self._irregular.add(title_id)
+
+            self._placements[title_id].append((self._seq, platform_id))
+            self._seq += 1
+        self._pending.clear()
+
+    def _word_candidates(self, word: str, exact: bool) -> Set[int]:
+        """
+        获取包含某个查询单词的标题编号（调用方需持有锁）
+
+        Args:
+            word: 查询中的英文/数字单词
+            exact: 单词两侧在查询中都有分隔符，只需匹配完整单词
+
+        Returns:
+            标题编号集合
+        """
+        if exact:
+            return self._word_postings.get(word, set())
+        # 位于查询两端的单词可能只是标题中某个单词的一部分
+        matched = set()
+        for vocab_word, ids in self._word_postings.items():
+            if word in vocab_word:
+                matched |= ids
+        return matched
+
+    def search(self, keyword: str, platform_ids: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        查找包含关键词的标题（不区分大小写的子串匹配）
+
+        Args:
+            keyword: 关键词
+            platform_ids: 平台ID列表，None表示所有平台
+
+        Returns:
+            {platform_id: [title, ...]}，平台内按加入顺序排列
+        """
+        query = keyword.lower()
+        allowed = set(platform_ids) if platform_ids else None
+
+        with self._lock:
+            self._flush()
+            candidate_sets = []
+            for match in _WORD_PATTERN.finditer(query):
+                exact = match.start() > 0 and match.end() < len(query)
+                candidate_sets.append(self._word_candidates(match.group(), exact))
+            for run in _GRAM_RUN_PATTERN.findall(query):
+                for i in range(len(run) - 1):
+                    candidate_sets.append(self._gram_postings.get(run[i:i + 2], set()))
+
+            if candidate_sets:
+                candidate_sets.sort(key=len)
+                candidates = set(candidate_sets[0])
+                for ids in candidate_sets[1:]:
+                    if not candidates:
+                        break
+                    candidates &= ids
+            else:
+                # 查询太短（如单个汉字）时没有可用词项，退回到逐个校验
+                candidates = range(len(self._titles))
+
+            # 校验：倒排表只保证包含全部词项，子串是否连续出现需要逐个确认
+            hits = []
+            for title_id in candidates:
+                if query in self._lowered[title_id]:
+                    for seq, platform_id in self._placements[title_id]:
+                        if allowed is None or platform_id in allowed:
+                            hits.append((seq, platform_id, self._titles[title_id]))
+
+        hits.sort()
+        result: Dict[str, List[str]] = {}
+        for _, platform_id, title in hits:
+            result.setdefault(platform_id, []).append(title)
+        return result
+
+    def similar_candidates(self, text: str, min_ratio: float, ignore_case: bool = True) -> Set[str]:
+        """
+        找出与文本的 SequenceMatcher 相似度可能达到阈值的标题
+
+        返回的是候选集合：不在其中的标题相似度一定低于阈值，在其中的标题仍需计算精确相似度。
+
+        Args:
+            text: 参考文本
+            min_ratio: 相似度阈值
+            ignore_case: 相似度是否在小写文本上计算
+
+        Returns:
+            候选标题集合
+        """
+        query = text.lower()
+
+        with self._lock:
+            self._flush()
+            # 阈值不大于 0 或无法求上界时，所有标题都是候选
+            if min_ratio <= 0 or (not ignore_case and len(query) != len(text)):
+                return set(self._titles)
+
+            overlap: Dict[int, int] = {}
+            for ch, query_count in Counter(query).items():
+                for title_id, count in self._char_postings.get(ch, ()):
+                    overlap[title_id] = overlap.get(title_id, 0) + (count if count < query_count else query_count)
+
+            candidates = {
+                self._titles[title_id]
+                for title_id, common in overlap.items()
+                if 2.0 * common / (len(query) + len(self._lowered[title_id])) >= min_ratio
+            }
+            if not ignore_case:
+                candidates.update(self._titles[title_id] for title_id in self._irregular)
+        return candidates
@@ -20,58 +20,131 @@ from ..utils.validators import (
 )
 from ..utils.errors import MCPError, InvalidParameterError, DataNotFoundError
 
+try:
+    import numpy as np
+except ImportError:  # 可选依赖：未安装时逐条计算权重
+    np = None
 
-def calculate_news_weight(news_data: Dict, rank_threshold: int = 5) -> float:
+
+# 权重配置默认值（config.yaml 中 weight 节缺失时使用）
+DEFAULT_WEIGHT_CONFIG = {
+    "rank_weight": 0.6,
+    "frequency_weight": 0.3,
+    "hotness_weight": 0.1
+}
+
+
+def calculate_news_weight(
+    news_data: Dict,
+    rank_threshold: int = 5,
+    weight_config: Optional[Dict] = None
+) -> float:
     """
     计算新闻权重（用于排序）
 
     基于 main.py 的权重算法实现，综合考虑：
-    - 排名权重 (60%)：新闻在榜单中的排名
-    - 频次权重 (30%)：新闻出现的次数
-    - 热度权重 (10%)：高排名出现的比例
+    - 排名权重：新闻在榜单中的排名
+    - 频次权重：新闻出现的次数
+    - 热度权重：高排名出现的比例
 
     Args:
         news_data: 新闻数据字典，包含 ranks 和 count 字段
         rank_threshold: 高排名阈值，默认5
+        weight_config: 权重配置（config.yaml 的 weight 节），默认使用 DEFAULT_WEIGHT_CONFIG
 
     Returns:
         权重分数（0-100之间的浮点数）
     """
-    ranks = news_data.get("ranks", [])
-    if not ranks:
-        return 0.0
-
-    count = news_data.get("count", len(ranks))
-
-    # 权重配置（与 config.yaml 保持一致）
-    RANK_WEIGHT = 0.6
-    FREQUENCY_WEIGHT = 0.3
-    HOTNESS_WEIGHT = 0.1
-
-    # 1. 排名权重：Σ(11 - min(rank, 10)) / 出现次数
-    rank_scores = []
-    for rank in ranks:
-        score = 11 - min(rank, 10)
-        rank_scores.append(score)
-
-    rank_weight = sum(rank_scores) / len(ranks) if ranks else 0
-
-    # 2. 频次权重：min(出现次数, 10) × 10
-    frequency_weight = min(count, 10) * 10
-
-    # 3. 热度加成：高排名次数 / 总出现次数 × 100
-    high_rank_count = sum(1 for rank in ranks if rank <= rank_threshold)
-    hotness_ratio = high_rank_count / len(ranks) if ranks else 0
-    hotness_weight = hotness_ratio * 100
-
-    # 综合权重
-    total_weight = (
-        rank_weight * RANK_WEIGHT
-        + frequency_weight * FREQUENCY_WEIGHT
-        + hotness_weight * HOTNESS_WEIGHT
+    return calculate_news_weights([news_data], rank_threshold, weight_config)[0]
+
+
+def calculate_news_weights(
+    news_list: List[Dict],
+    rank_threshold: int = 5,
+    weight_config: Optional[Dict] = None
+) -> List[float]:
+    """
+    批量计算新闻权重
+
+    把所有新闻的排名压成变长数组（offsets + values），安装了 numpy 时一次向量化计算，
+    否则逐条计算，两种方式结果一致。
+
+    Args:
+        news_list: 新闻数据字典列表，每项包含 ranks 和 count 字段
+        rank_threshold: 高排名阈值，默认5
+        weight_config: 权重配置（config.yaml 的 weight 节），默认使用 DEFAULT_WEIGHT_CONFIG
+
+    Returns:
+        与 news_list 一一对应的权重列表
+    """
+    wc = {**DEFAULT_WEIGHT_CONFIG, **(weight_config or {})}
+
+    offsets = [0]
+    values = []
+    counts = []
+    for news in news_list:
+        ranks = news.get("ranks", [])
+        values.extend(ranks)
+        offsets.append(len(values))
+        counts.append(news.get("count", len(ranks)))
+
+    if not counts:
+        return []
+
+    if np is None:
+        weights = []
+        for i, count in enumerate(counts):
+            ranks = values[offsets[i]:offsets[i + 1]]
+            if not ranks:
+                weights.append(0.0)
+                continue
+
+            # 1. 排名权重：Σ(11 - min(rank, 10)) / 出现次数
+            rank_weight = sum(11 - min(rank, 10) for rank in ranks) / len(ranks)
+            # 2. 频次权重：min(出现次数, 10) × 10
+            frequency_weight = min(count, 10) * 10
+            # 3. 热度加成：高排名次数 / 总出现次数 × 100
+            hotness_weight = sum(1 for rank in ranks if rank <= rank_threshold) / len(ranks) * 100
+
+            weights.append(
+                rank_weight * wc["rank_weight"]
+                + frequency_weight * wc["frequency_weight"]
+                + hotness_weight * wc["hotness_weight"]
+            )
+        return weights
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    lengths = np.diff(offsets)
+    safe_lengths = np.maximum(lengths, 1)
+
+    # 用前缀和做分段求和
+    rank_cum = np.concatenate(([0], np.cumsum(11 - np.minimum(values, 10))))
+    hot_cum = np.concatenate(([0], np.cumsum(values <= rank_threshold)))
+
+    rank_weight = (rank_cum[offsets[1:]] - rank_cum[offsets[:-1]]) / safe_lengths
+    frequency_weight = np.minimum(np.asarray(counts, dtype=np.int64), 10) * 10
+    hotness_weight = (hot_cum[offsets[1:]] - hot_cum[offsets[:-1]]) / safe_lengths * 100
+
+    weights = (
+        rank_weight * wc["rank_weight"]
+        + frequency_weight * wc["frequency_weight"]
+        + hotness_weight * wc["hotness_weight"]
     )
+    return np.where(lengths > 0, weights, 0.0).tolist()
+
 
-    return total_weight
+def sort_by_news_weight(news_list: List[Dict], weight_config: Optional[Dict] = None) -> None:
+    """
+    按权重从高到低原地排序（权重相同的保持原有顺序）
+
+    Args:
+        news_list: 新闻数据字典列表
+        weight_config: 权重配置（config.yaml 的 weight 节）
+    """
+    weights = calculate_news_weights(news_list, weight_config=weight_config)
+    order = sorted(range(len(news_list)), key=weights.__getitem__, reverse=True)
+    news_list[:] = [news_list[i] for i in order]
 
 
 class AnalyticsTools:
@@ -713,7 +786,7 @@ class AnalyticsTools:
                             news_item = {
                                 "platform": platform_name,
                                 "title": title,
-                                "ranks": info.get("ranks", []),
+                                "ranks": list(info.get("ranks", [])),
                                 "count": len(info.get("ranks", [])),
                                 "date": current_date.strftime("%Y-%m-%d")
                             }
@@ -755,10 +828,7 @@ class AnalyticsTools:
 
             # 按权重排序（如果启用）
             if sort_by_weight:
-                deduplicated_news.sort(
-                    key=lambda x: calculate_news_weight(x),
-                    reverse=True
-                )
+                sort_by_news_weight(deduplicated_news, self.data_service.get_weight_config())
 
             # 限制返回数量
             selected_news = deduplicated_news[:limit]
@@ -954,7 +1024,10 @@ class AnalyticsTools:
             limit = validate_limit(limit, default=50)
 
             # 读取数据
-            all_titles, id_to_name, _ = self.data_service.parser.read_all_titles_for_date()
+            all_titles, id_to_name, title_index = self.data_service.parser.read_titles_with_index()
+
+            # 字符计数上界低于阈值的标题不可能相似，只对候选标题计算相似度
+            candidates = title_index.similar_candidates(reference_title, threshold, ignore_case=False)
 
             # 计算相似度
             similar_items = []
@@ -963,7 +1036,7 @@ class AnalyticsTools:
                 platform_name = id_to_name.get(platform_id, platform_id)
 
                 for title, info in titles.items():
-                    if title == reference_title:
+                    if title == reference_title or title not in candidates:
                         continue
 
                     # 计算相似度
@@ -1116,10 +1189,7 @@ class AnalyticsTools:
 
             # 按权重排序（如果启用）
             if sort_by_weight:
-                related_news.sort(
-                    key=lambda x: calculate_news_weight(x),
-                    reverse=True
-                )
+                sort_by_news_weight(related_news, self.data_service.get_weight_config())
             else:
                 # 按排名排序
                 related_news.sort(key=lambda x: x["rank"])
@@ -1507,34 +1577,12 @@ class AnalyticsTools:
                 end_date = datetime.now()
                 start_date = end_date - timedelta(days=6)
 
-            # 收集话题历史数据
-            lifecycle_data = []
-            current_date = start_date
-            while current_date <= end_date:
-                try:
-                    all_titles, _, _ = self.data_service.parser.read_all_titles_for_date(
-                        date=current_date
-                    )
-
-                    # 统计该日的话题出现次数
-                    count = 0
-                    for _, titles in all_titles.items():
-                        for title in titles.keys():
-                            if topic.lower() in title.lower():
-                                count += 1
-
-                    lifecycle_data.append({
-                        "date": current_date.strftime("%Y-%m-%d"),
-                        "count": count
-                    })
-
-                except DataNotFoundError:
-                    lifecycle_data.append({
-                        "date": current_date.strftime("%Y-%m-%d"),
-                        "count": 0
-                    })
-
-                current_date += timedelta(days=1)
+            # 收集话题历史数据（已入库的日期走 SQLite 按天计数）
+            daily_counts = self.data_service.count_titles_by_date(topic, start_date, end_date)
+            lifecycle_data = [
+                {"date": date_str, "count": count}
+                for date_str, count in daily_counts.items()
+            ]
 
             # 计算分析天数
             total_days = (end_date - start_date).days + 1
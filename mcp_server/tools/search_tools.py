@@ -8,9 +8,10 @@ import re
 from collections import Counter
 from datetime import datetime, timedelta
 from difflib import SequenceMatcher
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from ..services.data_service import DataService
+from ..services.title_index import TitleIndex, ratio_upper_bound
 from ..utils.validators import validate_keyword, validate_limit
 from ..utils.errors import MCPError, InvalidParameterError, DataNotFoundError
 
@@ -126,10 +127,18 @@ class SearchTools:
 
             while current_date <= end_date:
                 try:
-                    all_titles, id_to_name, timestamps = self.data_service.parser.read_all_titles_for_date(
-                        date=current_date,
-                        platform_ids=platforms
-                    )
+                    if search_mode == "fuzzy":
+                        all_titles, id_to_name, title_index = self.data_service.parser.read_titles_with_index(
+                            date=current_date,
+                            platform_ids=platforms
+                        )
+                    else:
+                        # 关键词/实体模式只需包含查询词的标题，先用倒排索引筛出候选
+                        all_titles, id_to_name = self.data_service.parser.search_titles_for_date(
+                            query,
+                            date=current_date,
+                            platform_ids=platforms
+                        )
 
                     # 根据搜索模式执行不同的搜索逻辑
                     if search_mode == "keyword":
@@ -138,7 +147,7 @@ class SearchTools:
                         )
                     elif search_mode == "fuzzy":
                         matches = self._search_by_fuzzy_mode(
-                            query, all_titles, id_to_name, current_date, threshold, include_url
+                            query, all_titles, id_to_name, current_date, threshold, include_url, title_index
                         )
                     else:  # entity
                         matches = self._search_by_entity_mode(
@@ -187,8 +196,8 @@ class SearchTools:
             if sort_by == "relevance":
                 all_matches.sort(key=lambda x: x.get("similarity_score", 1.0), reverse=True)
             elif sort_by == "weight":
-                from .analytics import calculate_news_weight
-                all_matches.sort(key=lambda x: calculate_news_weight(x), reverse=True)
+                from .analytics import sort_by_news_weight
+                sort_by_news_weight(all_matches, self.data_service.get_weight_config())
             elif sort_by == "date":
                 all_matches.sort(key=lambda x: x.get("date", ""), reverse=True)
 
@@ -295,7 +304,8 @@ class SearchTools:
         id_to_name: Dict,
         current_date: datetime,
         threshold: float,
-        include_url: bool
+        include_url: bool,
+        title_index: Optional[TitleIndex] = None
     ) -> List[Dict]:
         """
         模糊搜索模式（使用相似度算法）
@@ -306,16 +316,21 @@ class SearchTools:
             id_to_name: 平台ID到名称映射
             current_date: 当前日期
             threshold: 相似度阈值
+            title_index: 当天的标题索引，提供时只对候选标题计算相似度
 
         Returns:
             匹配的新闻列表
         """
         matches = []
+        candidates = self._fuzzy_candidates(query, threshold, title_index) if title_index else None
 
         for platform_id, titles in all_titles.items():
             platform_name = id_to_name.get(platform_id, platform_id)
 
             for title, info in titles.items():
+                if candidates is not None and title not in candidates:
+                    continue
+
                 # 模糊匹配
                 is_match, similarity = self._fuzzy_match(query, title, threshold)
 
@@ -439,6 +454,31 @@ class SearchTools:
 
         return False, similarity
 
+    def _fuzzy_candidates(self, query: str, threshold: float, title_index: TitleIndex) -> Set[str]:
+        """
+        用标题索引筛出 _fuzzy_match 可能命中的标题
+
+        不在候选中的标题三种匹配方式都不可能命中：
+        既不包含查询文本，也不包含任何查询关键词，相似度上界也低于阈值。
+
+        Args:
+            query: 查询文本
+            threshold: 相似度阈值
+            title_index: 标题索引
+
+        Returns:
+            候选标题集合
+        """
+        candidates = title_index.similar_candidates(query, threshold)
+
+        # 直接包含与关键词重合都要求标题包含查询文本或其中的关键词；
+        # 关键词提取会移除方括号内容，可能把两侧文字拼成新词，含方括号的标题一律保留
+        for term in [query, "["] + self._extract_keywords(query):
+            for titles in title_index.search(term).values():
+                candidates.update(titles)
+
+        return candidates
+
     def _extract_keywords(self, text: str, min_length: int = 2) -> List[str]:
         """
         从文本中提取关键词
@@ -574,62 +614,61 @@ class SearchTools:
 
             # 收集所有相关新闻
             all_related_news = []
-            current_date = search_start
-
-            while current_date <= search_end:
-                try:
-                    # 读取该日期的数据
-                    all_titles, id_to_name, _ = self.data_service.parser.read_all_titles_for_date(current_date)
-
-                    # 搜索相关新闻
-                    for platform_id, titles in all_titles.items():
-                        platform_name = id_to_name.get(platform_id, platform_id)
-
-                        for title, info in titles.items():
-                            # 计算标题相似度
-                            title_similarity = self._calculate_similarity(reference_text, title)
-
-                            # 提取标题关键词
-                            title_keywords = self._extract_keywords(title)
-
-                            # 计算关键词重合度
-                            keyword_overlap = self._calculate_keyword_overlap(
-                                reference_keywords,
-                                title_keywords
-                            )
-
-                            # 综合相似度 (70% 关键词重合 + 30% 文本相似度)
-                            combined_score = keyword_overlap * 0.7 + title_similarity * 0.3
-
-                            if combined_score >= threshold:
-                                news_item = {
-                                    "title": title,
-                                    "platform": platform_id,
-                                    "platform_name": platform_name,
-                                    "date": current_date.strftime("%Y-%m-%d"),
-                                    "similarity_score": round(combined_score, 4),
-                                    "keyword_overlap": round(keyword_overlap, 4),
-                                    "text_similarity": round(title_similarity, 4),
-                                    "common_keywords": list(set(reference_keywords) & set(title_keywords)),
-                                    "rank": info["ranks"][0] if info["ranks"] else 0
-                                }
-
-                                # 条件性添加 URL 字段
-                                if include_url:
-                                    news_item["url"] = info.get("url", "")
-                                    news_item["mobileUrl"] = info.get("mobileUrl", "")
-
-                                all_related_news.append(news_item)
 
-                except DataNotFoundError:
-                    # 该日期没有数据，继续下一天
-                    pass
-                except Exception as e:
-                    # 记录错误但继续处理其他日期
-                    print(f"Warning: 处理日期 {current_date.strftime('%Y-%m-%d')} 时出错: {e}")
+            # 候选筛选：没有共同关键词的标题综合分只来自文本相似度，用字符计数上界排除
+            reference_lower = reference_text.lower()
+            reference_counts = Counter(reference_lower)
+
+            # 已入库的日期由 SQLite 一次取回，其余日期逐天解析
+            for date_str, all_titles, id_to_name in self.data_service.get_titles_for_range(
+                search_start, search_end
+            ):
+                # 搜索相关新闻
+                for platform_id, titles in all_titles.items():
+                    platform_name = id_to_name.get(platform_id, platform_id)
+
+                    for title, info in titles.items():
+                        if (
+                            "[" not in title
+                            and not any(keyword in title for keyword in reference_keywords)
+                            and ratio_upper_bound(reference_counts, len(reference_lower), title.lower()) * 0.3 < threshold
+                        ):
+                            continue
+
+                        # 计算标题相似度
+                        title_similarity = self._calculate_similarity(reference_text, title)
+
+                        # 提取标题关键词
+                        title_keywords = self._extract_keywords(title)
+
+                        # 计算关键词重合度
+                        keyword_overlap = self._calculate_keyword_overlap(
+                            reference_keywords,
+                            title_keywords
+                        )
 
-                # 移动到下一天
-                current_date += timedelta(days=1)
+                        # 综合相似度 (70% 关键词重合 + 30% 文本相似度)
+                        combined_score = keyword_overlap * 0.7 + title_similarity * 0.3
+
+                        if combined_score >= threshold:
+                            news_item = {
+                                "title": title,
+                                "platform": platform_id,
+                                "platform_name": platform_name,
+                                "date": date_str,
+                                "similarity_score": round(combined_score, 4),
+                                "keyword_overlap": round(keyword_overlap, 4),
+                                "text_similarity": round(title_similarity, 4),
+                                "common_keywords": list(set(reference_keywords) & set(title_keywords)),
+                                "rank": info["ranks"][0] if info["ranks"] else 0
+                            }
+
+                            # 条件性添加 URL 字段
+                            if include_url:
+                                news_item["url"] = info.get("url", "")
+                                news_item["mobileUrl"] = info.get("mobileUrl", "")
+
+                            all_related_news.append(news_item)
 
             if not all_related_news:
                 return {
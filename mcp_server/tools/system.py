@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 
 from ..services.data_service import DataService
+from ..services.http_client import get_http_client
 from ..utils.validators import validate_platforms
 from ..utils.errors import MCPError, CrawlTaskError
 
@@ -90,7 +91,6 @@ class SystemManagementTools:
             import json
             import time
             import random
-            import requests
             from datetime import datetime
             import pytz
             import yaml
@@ -142,6 +142,10 @@ class SystemManagementTools:
 
             print(f"开始临时爬取，平台: {[p.get('name', p['id']) for p in target_platforms]}")
 
+            # 共享连接池，复用 keep-alive 连接
+            http_client = get_http_client()
+            stats_before = http_client.get_connection_stats()
+
             # 爬取数据
             results = {}
             id_to_name = {}
@@ -174,7 +178,7 @@ class SystemManagementTools:
 
                 while retries <= max_retries and not success:
                     try:
-                        response = requests.get(url, headers=headers, timeout=10)
+                        response = http_client.get(url, headers=headers, timeout=10)
                         response.raise_for_status()
 
                         data_text = response.text
@@ -221,6 +225,13 @@ class SystemManagementTools:
                     actual_interval = max(50, actual_interval)
                     time.sleep(actual_interval / 1000)
 
+            # 本次爬取的连接复用统计
+            stats_after = http_client.get_connection_stats()
+            connection_stats = {
+                key: max(0, stats_after[key] - stats_before[key])
+                for key in stats_after
+            }
+
             # 格式化返回数据
             news_data = []
             for platform_id, titles_data in results.items():
@@ -254,6 +265,7 @@ class SystemManagementTools:
                 "total_news": len(news_data),
                 "failed_platforms": failed_ids,
                 "data": news_data,
+                "connection_stats": connection_stats,
                 "saved_to_local": save_to_local
             }
 
@@ -0,0 +1,139 @@
+# coding=utf-8
+"""
+split_content_into_batches 的性质测试
+
+用随机生成的 report_data 覆盖五种推送格式和多个 max_bytes，检查：
+  - 每个批次（含尾部）都严格小于 max_bytes，
+    唯一的例外是 标题头+一条新闻 本身就超过预算，此时该批次只含这一条新闻；
+  - 每个词组标题 / 来源标题都和它后面的第一条新闻在同一批次；
+  - 所有新闻都被完整发出，且顺序不变。
+"""
+
+import os
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# main.py 在导入时按相对路径读取 config/
+os.chdir(ROOT)
+sys.path.insert(0, str(ROOT))
+
+import main  # noqa: E402
+
+
+FORMATS = ("wework", "telegram", "ntfy", "feishu", "dingtalk")
+MAX_BYTES = (300, 800, 2000, 4000)
+SEEDS = range(25)
+
+CHARS = "新闻热点科技经济体育天气发布会议数据市场增长aBcDxYz0123456789"
+TITLE_LINE = re.compile(r"^  (\d+)\. (.*)$", re.MULTILINE)
+GROUP_HEADER = re.compile(r"\[(\d+)/\d+\]")
+SOURCE_HEADER = re.compile(r"^(?:\*\*)?(平台\d+)(?:\*\*)? \(\d+ 条\):$", re.MULTILINE)
+
+
+def random_title(rng: random.Random, serial: int) -> str:
+    # 偶尔生成超长标题，覆盖单条新闻超过预算的情况
+    length = rng.randint(300, 900) if rng.random() < 0.03 else rng.randint(2, 60)
+    words = ["".join(rng.choice(CHARS) for _ in range(rng.randint(1, 8))) for _ in range(max(1, length // 5))]
+    # 序号保证标题互不相同，便于核对顺序
+    return f"T{serial}T " + " ".join(words)
+
+
+def random_title_data(rng: random.Random, serial: int, source_name: str) -> dict:
+    ranks = sorted(rng.sample(range(1, 51), rng.randint(1, 4)))
+    url = f"https://example.com/{serial}" if rng.random() < 0.7 else ""
+    return {
+        "title": random_title(rng, serial),
+        "source_name": source_name,
+        "time_display": rng.choice(["", "08时00分", "[08时00分 ~ 12时30分]"]),
+        "count": rng.randint(1, 12),
+        "ranks": ranks,
+        "rank_threshold": 5,
+        "url": url,
+        "mobile_url": url if rng.random() < 0.5 else "",
+        "is_new": rng.random() < 0.3,
+    }
+
+
+def random_report(rng: random.Random) -> dict:
+    serial = 0
+    stats = []
+    for g in range(rng.randint(0, 8)):
+        titles = []
+        for _ in range(rng.randint(1, 15)):
+            serial += 1
+            titles.append(random_title_data(rng, serial, f"平台{rng.randint(1, 9)}"))
+        stats.append({"word": f"词组{g}", "count": len(titles), "titles": titles})
+
+    new_titles = []
+    for s in rng.sample(range(1, 10), rng.randint(0, 4)):
+        titles = []
+        for _ in range(rng.randint(1, 10)):
+            serial += 1
+            titles.append(random_title_data(rng, serial, f"平台{s}"))
+        new_titles.append({"source_id": f"p{s}", "source_name": f"平台{s}", "titles": titles})
+
+    return {
+        "stats": stats,
+        "new_titles": new_titles,
+        "failed_ids": [f"fail{i}" for i in range(rng.randint(0, 3))],
+        "total_new_count": sum(len(s["titles"]) for s in new_titles),
+    }
+
+
+def tokens(batch: str):
+    """按出现顺序列出批次中的标题头和新闻行：("header", 键) / ("line", 序号, 标题)"""
+    found = []
+    for m in GROUP_HEADER.finditer(batch):
+        found.append((m.start(), ("header", "group", m.group(1))))
+    for m in SOURCE_HEADER.finditer(batch):
+        found.append((m.start(), ("header", "source", m.group(1))))
+    for m in TITLE_LINE.finditer(batch):
+        serial = re.search(r"T(\d+)T", m.group(2))
+        found.append((m.start(), ("line", int(m.group(1)), int(serial.group(1)))))
+    found.sort()
+    return [t for _, t in found]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("max_bytes", MAX_BYTES)
+@pytest.mark.parametrize("format_type", FORMATS)
+def test_batches_respect_budget_and_keep_headers_with_first_item(format_type, max_bytes, seed):
+    rng = random.Random(f"{format_type}-{max_bytes}-{seed}")
+    report = random_report(rng)
+    update_info = {"remote_version": "9.9.9", "current_version": "1.0.0"} if rng.random() < 0.3 else None
+
+    batches = main.split_content_into_batches(report, format_type, update_info, max_bytes=max_bytes)
+    assert batches
+
+    sent = []
+    first_seen = set()
+    for batch in batches:
+        items = tokens(batch)
+        lines = [t for t in items if t[0] == "line"]
+
+        if len(batch.encode("utf-8")) >= max_bytes:
+            # 超限只允许发生在 标题头+一条新闻 本身放不下的批次
+            assert len(lines) == 1, f"超限批次包含 {len(lines)} 条新闻"
+            assert batch.count("  • ") == 0
+
+        for i, item in enumerate(items):
+            if item[0] != "header":
+                continue
+            nxt = items[i + 1] if i + 1 < len(items) else None
+            assert nxt is not None and nxt[0] == "line", f"标题头 {item} 与第一条新闻不在同一批次"
+            if item not in first_seen:
+                first_seen.add(item)
+                assert nxt[1] == 1, f"标题头 {item} 首次出现时后面不是第一条新闻"
+
+        sent.extend(serial for _, _, serial in lines)
+
+    expected = [int(re.match(r"T(\d+)T", t["title"]).group(1)) for s in report["stats"] for t in s["titles"]]
+    expected += [int(re.match(r"T(\d+)T", t["title"]).group(1)) for s in report["new_titles"] for t in s["titles"]]
+    assert sent == expected
+    for failed in report["failed_ids"]:
+        assert any(failed in batch for batch in batches)